@@ -1,6 +1,9 @@
 from django.contrib import admin
 
-from .models import AccountingConnection, SyncLog
+from .models import (
+    AccountingConnection, ExternalIdMapping, RateLimitBucket, SyncCursor, SyncLog, SyncLogDailySummary,
+    SyncOutbox, SyncRecordFailure, SyncRetentionPolicy,
+)
 
 @admin.register(AccountingConnection)
 class AccountingConnectionAdmin(admin.ModelAdmin):
@@ -10,7 +13,48 @@ class AccountingConnectionAdmin(admin.ModelAdmin):
 
 @admin.register(SyncLog)
 class SyncLogAdmin(admin.ModelAdmin):
-    list_display = ['connection', 'direction', 'entity_type', 'records_synced', 'status', 'created_at']
+    list_display = ['connection', 'direction', 'entity_type', 'records_synced', 'status', 'attempt', 'dead_letter', 'created_at']
+    list_filter = ['dead_letter']
     search_fields = ['direction', 'entity_type', 'status', 'error_message']
+    readonly_fields = ['timings', 'created_at', 'updated_at']
+
+@admin.register(SyncCursor)
+class SyncCursorAdmin(admin.ModelAdmin):
+    list_display = ['connection', 'direction', 'entity_type', 'watermark', 'updated_at']
+    search_fields = ['entity_type', 'direction']
+    readonly_fields = ['updated_at']
+
+@admin.register(RateLimitBucket)
+class RateLimitBucketAdmin(admin.ModelAdmin):
+    list_display = ['key', 'tokens', 'refilled_at', 'blocked_until']
+    search_fields = ['key']
+
+@admin.register(ExternalIdMapping)
+class ExternalIdMappingAdmin(admin.ModelAdmin):
+    list_display = ['connection', 'entity_type', 'local_id', 'remote_id', 'updated_at']
+    search_fields = ['local_id', 'remote_id']
+    readonly_fields = ['updated_at']
+
+@admin.register(SyncRetentionPolicy)
+class SyncRetentionPolicyAdmin(admin.ModelAdmin):
+    list_display = ['hub_id', 'retention_days', 'updated_at']
+
+@admin.register(SyncLogDailySummary)
+class SyncLogDailySummaryAdmin(admin.ModelAdmin):
+    list_display = ['day', 'connection', 'direction', 'entity_type', 'logs_count', 'error_count', 'records_synced']
+    list_filter = ['direction']
+    search_fields = ['entity_type']
+
+@admin.register(SyncRecordFailure)
+class SyncRecordFailureAdmin(admin.ModelAdmin):
+    list_display = ['connection', 'direction', 'entity_type', 'record_key', 'attempts', 'updated_at']
+    list_filter = ['direction']
+    search_fields = ['record_key', 'error_message']
     readonly_fields = ['created_at', 'updated_at']
 
+@admin.register(SyncOutbox)
+class SyncOutboxAdmin(admin.ModelAdmin):
+    list_display = ['connection', 'entity_type', 'local_id', 'operation', 'updated_at']
+    list_filter = ['operation']
+    search_fields = ['local_id']
+    readonly_fields = ['created_at', 'updated_at']
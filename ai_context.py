@@ -32,11 +32,14 @@ CONTEXT = """
 2. Complete OAuth flow → store `access_token` and `refresh_token`
 3. Set `status='connected'` and `sync_enabled=True`
 
+**Check whether sync is healthy:**
+- Use `get_sync_health` (aggregated success rates, error clusters, throughput) instead of listing logs
+
 **Review sync history:**
 - Query `SyncLog.objects.filter(connection=conn).order_by('-created_at')`
 - Check `status` and `error_message` for failed syncs
 
 ### Relationships
 - AccountingConnection → SyncLog (one-to-many, related_name `logs`)
-- No direct FK to invoicing or expenses — sync logic reads those models separately
+- No direct FK to invoicing or expenses — those modules register push sources and track their models in the sync outbox (`SyncOutbox`), so pushes only send records changed since the last sync
 """
@@ -1,40 +1,107 @@
 """AI tools for the Accounting Sync module."""
+import uuid
+
 from assistant.tools import AssistantTool, register_tool
 
+# Hard caps keep tool results small enough for the assistant prompt.
+MAX_CONNECTIONS = 50
+MAX_LOGS = 50
+DEFAULT_LOGS = 20
+ERROR_MESSAGE_CHARS = 200
+MAX_HEALTH_DAYS = 90
+
+
+def _hub_id(request):
+    return request.session.get('hub_id')
+
+
+def _int_arg(args, name, default, low, high):
+    """``args[name]`` clamped to ``low``..``high``; ``default`` when missing or not a number."""
+    try:
+        value = int(args.get(name) or default)
+    except (TypeError, ValueError):
+        value = default
+    return min(max(value, low), high)
+
+
+def _uuid_arg(value):
+    """``value`` as a UUID string, or None if it is not one."""
+    try:
+        return str(uuid.UUID(str(value)))
+    except ValueError:
+        return None
+
+
+def _truncate(text, length=ERROR_MESSAGE_CHARS):
+    return text if len(text) <= length else text[:length - 1] + '…'
+
 
 @register_tool
 class ListAccountingConnections(AssistantTool):
     name = "list_accounting_connections"
-    description = "List accounting integrations (Xero, QuickBooks, Sage)."
+    description = f"List accounting integrations (Xero, QuickBooks, Sage), at most {MAX_CONNECTIONS} per call; pass next_cursor back as cursor for more."
     module_id = "accounting_sync"
     required_permission = "accounting_sync.view_accountingconnection"
-    parameters = {"type": "object", "properties": {"status": {"type": "string", "description": "connected, disconnected, error"}}, "required": [], "additionalProperties": False}
+    parameters = {"type": "object", "properties": {"status": {"type": "string", "description": "connected, disconnected, error"}, "cursor": {"type": "string", "description": "next_cursor from a previous call"}}, "required": [], "additionalProperties": False}
 
     def execute(self, args, request):
         from accounting_sync.models import AccountingConnection
-        qs = AccountingConnection.objects.all()
+        from accounting_sync.pagination import KeysetPaginator
+        qs = AccountingConnection.objects.filter(hub_id=_hub_id(request)).only('id', 'created_at', 'provider', 'name', 'status', 'sync_enabled', 'last_sync_at')
         if args.get('status'):
             qs = qs.filter(status=args['status'])
-        return {"connections": [{"id": str(c.id), "provider": c.provider, "name": c.name, "status": c.status, "sync_enabled": c.sync_enabled, "last_sync_at": c.last_sync_at.isoformat() if c.last_sync_at else None} for c in qs]}
+        page = KeysetPaginator(qs, MAX_CONNECTIONS, descending=False).get_page(args.get('cursor'))
+        return {"connections": [{"id": str(c.id), "provider": c.provider, "name": c.name, "status": c.status, "sync_enabled": c.sync_enabled, "last_sync_at": c.last_sync_at.isoformat() if c.last_sync_at else None} for c in page], "total": page.estimated_total, "next_cursor": page.next_cursor}
 
 
 @register_tool
 class ListSyncLogs(AssistantTool):
     name = "list_sync_logs"
-    description = "List accounting sync logs."
+    description = f"List accounting sync logs, newest first, at most {MAX_LOGS} per call (error messages truncated); pass next_cursor back as cursor for more. Use get_sync_health for summaries."
     module_id = "accounting_sync"
     required_permission = "accounting_sync.view_synclog"
-    parameters = {"type": "object", "properties": {"status": {"type": "string"}, "connection_id": {"type": "string"}, "limit": {"type": "integer"}}, "required": [], "additionalProperties": False}
+    parameters = {"type": "object", "properties": {"status": {"type": "string"}, "connection_id": {"type": "string"}, "limit": {"type": "integer", "description": f"1-{MAX_LOGS}, default {DEFAULT_LOGS}"}, "cursor": {"type": "string", "description": "next_cursor from a previous call"}}, "required": [], "additionalProperties": False}
 
     def execute(self, args, request):
         from accounting_sync.models import SyncLog
-        qs = SyncLog.objects.select_related('connection').all()
+        from accounting_sync.pagination import KeysetPaginator
+        qs = SyncLog.objects.filter(hub_id=_hub_id(request)).select_related('connection').only(
+            'id', 'created_at', 'connection', 'connection__name', 'direction', 'entity_type', 'records_synced', 'status', 'error_message',
+        )
         if args.get('status'):
             qs = qs.filter(status=args['status'])
         if args.get('connection_id'):
-            qs = qs.filter(connection_id=args['connection_id'])
-        limit = args.get('limit', 20)
-        return {"logs": [{"id": str(l.id), "connection": l.connection.name if l.connection else None, "direction": l.direction, "entity_type": l.entity_type, "records_synced": l.records_synced, "status": l.status, "error_message": l.error_message, "created_at": l.created_at.isoformat()} for l in qs.order_by('-created_at')[:limit]]}
+            connection_id = _uuid_arg(args['connection_id'])
+            if connection_id is None:
+                return {"error": "Connection not found"}
+            qs = qs.filter(connection_id=connection_id)
+        limit = _int_arg(args, 'limit', DEFAULT_LOGS, 1, MAX_LOGS)
+        page = KeysetPaginator(qs, limit).get_page(args.get('cursor'))
+        return {"logs": [{"id": str(l.id), "connection": l.connection.name, "direction": l.direction, "entity_type": l.entity_type, "records_synced": l.records_synced, "status": l.status, "error_message": _truncate(l.error_message), "created_at": l.created_at.isoformat()} for l in page], "total": page.estimated_total, "next_cursor": page.next_cursor}
+
+
+@register_tool
+class GetSyncHealth(AssistantTool):
+    name = "get_sync_health"
+    description = "Summarize accounting sync health: per-connection success rates, the most common errors, daily throughput and queue depth."
+    module_id = "accounting_sync"
+    required_permission = "accounting_sync.view_synclog"
+    parameters = {"type": "object", "properties": {"days": {"type": "integer", "description": f"Look-back window, 1-{MAX_HEALTH_DAYS} (default 7)"}, "connection_id": {"type": "string", "description": "Limit to one connection"}}, "required": [], "additionalProperties": False}
+
+    def execute(self, args, request):
+        from datetime import timedelta
+
+        from django.utils import timezone
+
+        from accounting_sync.stats import get_sync_health
+        connection_id = None
+        if args.get('connection_id'):
+            connection_id = _uuid_arg(args['connection_id'])
+            if connection_id is None:
+                return {"error": "Connection not found"}
+        days = _int_arg(args, 'days', 7, 1, MAX_HEALTH_DAYS)
+        health = get_sync_health(_hub_id(request), timezone.now() - timedelta(days=days), connection_id=connection_id)
+        return {"days": days, **health}
 
 
 @register_tool
@@ -56,7 +123,12 @@ class ToggleAccountingSync(AssistantTool):
 
     def execute(self, args, request):
         from accounting_sync.models import AccountingConnection
-        c = AccountingConnection.objects.get(id=args['connection_id'])
+        connection_id = _uuid_arg(args['connection_id'])
+        if connection_id is None:
+            return {"error": "Connection not found"}
+        c = AccountingConnection.objects.filter(hub_id=_hub_id(request)).only('id', 'provider', 'name', 'sync_enabled').filter(id=connection_id).first()
+        if c is None:
+            return {"error": "Connection not found"}
         c.sync_enabled = args['enabled']
         c.save(update_fields=['sync_enabled'])
         return {"id": str(c.id), "provider": c.provider, "name": c.name, "sync_enabled": c.sync_enabled}
@@ -65,7 +137,7 @@ class ToggleAccountingSync(AssistantTool):
 @register_tool
 class TriggerAccountingSync(AssistantTool):
     name = "trigger_accounting_sync"
-    description = "Manually trigger a sync for an accounting connection."
+    description = "Manually trigger a sync for an accounting connection. If one is already queued for the same direction and entity, that one is returned instead."
     module_id = "accounting_sync"
     required_permission = "accounting_sync.change_accountingconnection"
     requires_confirmation = True
@@ -81,14 +153,15 @@ class TriggerAccountingSync(AssistantTool):
     }
 
     def execute(self, args, request):
-        from accounting_sync.models import AccountingConnection, SyncLog
-        c = AccountingConnection.objects.get(id=args['connection_id'])
+        from accounting_sync.bulk import enqueue_sync
+        from accounting_sync.models import AccountingConnection
+        connection_id = _uuid_arg(args['connection_id'])
+        if connection_id is None:
+            return {"error": "Connection not found"}
+        c = AccountingConnection.objects.filter(hub_id=_hub_id(request)).only('id', 'hub_id', 'name', 'status').filter(id=connection_id).first()
+        if c is None:
+            return {"error": "Connection not found"}
         if c.status != 'connected':
             return {"error": f"Connection is {c.status}, must be connected to sync"}
-        log = SyncLog.objects.create(
-            connection=c,
-            direction=args.get('direction', 'push'),
-            entity_type=args.get('entity_type', 'all'),
-            status='pending',
-        )
-        return {"id": str(log.id), "connection": c.name, "direction": log.direction, "status": "pending", "triggered": True}
+        log, created = enqueue_sync(c, args.get('direction', 'push'), args.get('entity_type', 'all'))
+        return {"id": str(log.id), "connection": c.name, "direction": log.direction, "status": log.status, "triggered": created, "coalesced": not created}
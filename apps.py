@@ -9,4 +9,7 @@ class AccountingSyncConfig(AppConfig):
     verbose_name = _('Accounting Sync (Xero/QB)')
 
     def ready(self):
-        pass
+        from django.db.models.signals import post_migrate
+
+        from . import pull, push, signals  # noqa: F401  (registers the sync handlers and signal receivers)
+        post_migrate.connect(signals.ensure_search_index, sender=self)
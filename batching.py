@@ -0,0 +1,141 @@
+"""
+Batching stage for push syncs.
+
+Outgoing records are grouped per ``entity_type`` and sent through the
+provider's batch endpoint. Batch sizes adapt per entity type: they grow
+while batches are fast and clean, and halve on slow responses, record
+errors or failed requests.
+"""
+import time
+from collections import defaultdict
+
+from .engine import SyncResult
+from .progress import get_progress
+from .providers import BatchItemResult, ProviderError
+from .tracing import span
+
+MAX_ERROR_MESSAGES = 5
+# Errors that no smaller batch can fix: fail the whole sync instead.
+ABORT_STATUS_CODES = (401, 403, 429)
+
+
+class AdaptiveBatchSizer:
+    """Additive-increase / multiplicative-decrease batch size controller."""
+
+    def __init__(self, initial=10, minimum=1, maximum=50, target_latency=2.0, max_error_rate=0.1):
+        self.minimum = max(1, minimum)
+        self.maximum = max(self.minimum, maximum)
+        self.size = min(max(initial, self.minimum), self.maximum)
+        self.target_latency = target_latency
+        self.max_error_rate = max_error_rate
+
+    def record(self, latency, total, failed=0):
+        """Feed back one batch's latency (seconds) and failure count."""
+        error_rate = failed / total if total else 0
+        if latency > self.target_latency or error_rate > self.max_error_rate:
+            self.size = max(self.minimum, self.size // 2)
+        else:
+            self.size = min(self.maximum, self.size + max(1, self.size // 4))
+        return self.size
+
+
+class BatchPusher:
+    """
+    Buffers outgoing records per entity type and flushes them in batches.
+
+    ``add()`` records as they are produced and call ``close()`` to flush the
+    remainder and get the ``SyncResult``. Every flushed batch is reported to
+    the log's ``ProgressReporter`` so progress is visible while the sync runs.
+    """
+
+    def __init__(self, log, adapter, initial_batch_size=10, target_latency=2.0):
+        self.log = log
+        self.adapter = adapter
+        self.initial_batch_size = initial_batch_size
+        self.target_latency = target_latency
+        self.buffers = defaultdict(list)
+        self.sizers = {}
+        self.result = SyncResult()
+        self.errors = []
+        self.batches_sent = 0
+
+    def get_sizer(self, entity_type):
+        sizer = self.sizers.get(entity_type)
+        if sizer is None:
+            sizer = AdaptiveBatchSizer(
+                initial=self.initial_batch_size,
+                maximum=self.adapter.max_batch_size,
+                target_latency=self.target_latency,
+            )
+            self.sizers[entity_type] = sizer
+        return sizer
+
+    def add(self, record):
+        buffer = self.buffers[record.entity_type]
+        buffer.append(record)
+        if len(buffer) >= self.get_sizer(record.entity_type).size:
+            self.flush(record.entity_type)
+
+    def flush(self, entity_type=None):
+        entity_types = [entity_type] if entity_type else list(self.buffers)
+        for et in entity_types:
+            batch, self.buffers[et] = self.buffers[et], []
+            if batch:
+                self._send(et, batch)
+
+    def close(self):
+        self.flush()
+        get_progress(self.log).close()
+        if self.errors:
+            self.result.error_message = '\n'.join(self.errors)
+        return self.result
+
+    # -- Internals -----------------------------------------------------
+
+    def _send(self, entity_type, batch):
+        sizer = self.get_sizer(entity_type)
+        started = time.monotonic()
+        try:
+            with span('push', count=len(batch)):
+                results = self.adapter.push_batch(entity_type, [r.payload for r in batch])
+        except ProviderError as exc:
+            sizer.record(time.monotonic() - started, len(batch), failed=len(batch))
+            if exc.status_code in ABORT_STATUS_CODES:
+                raise
+            if len(batch) > 1 and exc.status_code and 400 <= exc.status_code < 500:
+                # Bisect so one poison record cannot fail its whole batch.
+                middle = len(batch) // 2
+                self._send(entity_type, batch[:middle])
+                self._send(entity_type, batch[middle:])
+                return
+            self._record(batch, [None] * len(batch), errors=[str(exc)] * len(batch))
+            return
+        missing = len(batch) - len(results)
+        if missing > 0:
+            results = list(results) + [BatchItemResult(ok=False, error='Missing batch response')] * missing
+        sizer.record(time.monotonic() - started, len(batch), failed=sum(1 for r in results if not r.ok))
+        self._record(batch, results, errors=[r.error for r in results])
+
+    def _record(self, batch, results, errors):
+        self.batches_sent += 1
+        pushed, failed = [], []
+        for record, result, error in zip(batch, results, errors):
+            if result is not None and result.ok:
+                pushed.append((record, result))
+            else:
+                failed.append((record, error))
+                if error and len(self.errors) < MAX_ERROR_MESSAGES and error not in self.errors:
+                    self.errors.append(error)
+        if pushed:
+            self.on_batch_pushed(pushed)
+        if failed:
+            self.on_batch_failed(failed)
+        self.result.records_synced += len(pushed)
+        self.result.records_failed += len(failed)
+        get_progress(self.log).advance(done=len(batch), synced=len(pushed))
+
+    def on_batch_pushed(self, pushed):
+        """Hook called with ``[(record, BatchItemResult), ...]`` the provider accepted."""
+
+    def on_batch_failed(self, failed):
+        """Hook called with ``[(record, error), ...]`` the provider rejected or never received."""
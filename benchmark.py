@@ -0,0 +1,286 @@
+"""
+Synthetic data and view benchmarks for accounting_sync.
+
+``seed_data`` fills fresh hubs with connections and logs through chunked
+``bulk_create`` calls. Log timestamps are spread over the last ``days`` days
+and the stats tables are filled to match, so the dashboard sees the same
+data as the list views. Seeded connections have sync disabled and every
+seeded log is finished, so workers and the scheduler leave them alone.
+
+``run_benchmarks`` renders each view in ``BENCHMARK_CASES`` as the HTMX
+partial for one hub. It reports latency percentiles over ``runs`` requests,
+then the query count and Python peak memory of one extra request each.
+Queries and memory are measured on their own requests because capturing
+them slows the request down. Streaming exports are consumed in full, so
+their numbers cover the whole file.
+"""
+import json
+import math
+import random
+import time
+import tracemalloc
+import uuid
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection as db_connection
+from django.db.models import Sum
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from .models import AccountingConnection, ConnectionSyncStats, HourlySyncStats, SyncLog
+from .providers import PROVIDERS
+from .stats import rebuild_stats
+
+SEED_BATCH_SIZE = 5000
+SEED_ENTITY_TYPES = ('invoices', 'expenses', 'contacts', 'payments')
+# status -> weight; only finished statuses, so no worker ever claims a seeded log.
+SEED_STATUSES = {'success': 85, 'partial': 5, 'error': 10}
+SEED_ERRORS = (
+    'Connection timeout after 30s',
+    'Rate limit exceeded, retry later',
+    'Invalid contact reference',
+    'Token expired',
+    'Validation failed: missing tax rate',
+)
+SEED_TOKEN_LENGTH = 1500
+
+# (name, url name, query params)
+BENCHMARK_CASES = [
+    ('dashboard', 'accounting_sync:dashboard', {}),
+    ('connections_list', 'accounting_sync:accounting_connections_list', {'per_page': 96}),
+    ('sync_logs_list', 'accounting_sync:sync_logs_list', {}),
+    ('sync_logs_sorted', 'accounting_sync:sync_logs_list', {'sort': 'status', 'dir': 'asc'}),
+    ('sync_logs_search', 'accounting_sync:sync_logs_list', {'q': 'timeout'}),
+    ('sync_logs_export_csv', 'accounting_sync:sync_logs_list', {'export': 'csv'}),
+    ('sync_logs_export_excel', 'accounting_sync:sync_logs_list', {'export': 'excel'}),
+]
+BENCHMARK_USER_EMAIL = 'benchmark@accounting-sync.invalid'
+
+
+@dataclass
+class SeedResult:
+    hub_ids: list
+    connections: int = 0
+    logs: int = 0
+    seconds: float = 0.0
+
+
+@dataclass
+class ViewBenchmark:
+    name: str
+    status_code: int
+    runs: int
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+    max_ms: float
+    queries: int
+    peak_memory_kb: float
+    response_kb: float
+    samples_ms: list = field(default_factory=list, repr=False)
+
+
+@contextmanager
+def explicit_timestamps(model):
+    """Let ``bulk_create`` keep the ``auto_now``/``auto_now_add`` values set on the instances."""
+    fields = [f for f in model._meta.concrete_fields if getattr(f, 'auto_now', False) or getattr(f, 'auto_now_add', False)]
+    saved = [(f, f.auto_now, f.auto_now_add) for f in fields]
+    for f in fields:
+        f.auto_now = f.auto_now_add = False
+    try:
+        yield
+    finally:
+        for f, auto_now, auto_now_add in saved:
+            f.auto_now, f.auto_now_add = auto_now, auto_now_add
+
+
+def _batches(items, size):
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _seed_connections(rng, hub_ids, count, now, batch_size):
+    providers = sorted(PROVIDERS)
+    token = 't' * SEED_TOKEN_LENGTH
+    connections = [
+        AccountingConnection(
+            id=uuid.uuid4(), hub_id=hub_ids[i % len(hub_ids)], provider=providers[i % len(providers)],
+            name=f'Benchmark {providers[i % len(providers)].title()} {i}', status='connected',
+            access_token=token, refresh_token=token, sync_enabled=False,
+            last_sync_at=now - timedelta(minutes=rng.randrange(60 * 24)),
+        )
+        for i in range(count)
+    ]
+    AccountingConnection.objects.bulk_create(connections, batch_size=batch_size)
+    return [(c.id, c.hub_id) for c in connections]
+
+
+def _generate_logs(rng, connections, count, now, days, hourly):
+    statuses, weights = zip(*SEED_STATUSES.items())
+    span = days * 24 * 3600
+    for _ in range(count):
+        connection_id, hub_id = connections[rng.randrange(len(connections))]
+        status = rng.choices(statuses, weights)[0]
+        created_at = now - timedelta(seconds=rng.randrange(span))
+        finished_at = created_at + timedelta(seconds=rng.randrange(1, 120))
+        records = 0 if status == 'error' else rng.randrange(1, 500)
+        counters = hourly.setdefault((hub_id, finished_at.replace(minute=0, second=0, microsecond=0)), [0, 0, 0])
+        counters[0] += 1
+        counters[1] += status == 'error'
+        counters[2] += records
+        yield SyncLog(
+            id=uuid.uuid4(), hub_id=hub_id, connection_id=connection_id,
+            direction=rng.choice(('push', 'pull')), entity_type=rng.choice(SEED_ENTITY_TYPES),
+            records_synced=records, status=status,
+            error_message=rng.choice(SEED_ERRORS) if status != 'success' else '',
+            started_at=created_at, finished_at=finished_at,
+            created_at=created_at, updated_at=finished_at,
+        )
+
+
+def seed_data(hubs=5, connections=50, logs=10000, days=30, batch_size=SEED_BATCH_SIZE, seed=None, progress=None):
+    """
+    Create ``hubs`` new hubs holding ``connections`` connections and ``logs`` logs in total.
+
+    ``seed`` makes the data layout reproducible (hub ids are always new).
+    ``progress(logs_written)`` is called after every batch.
+    """
+    started = time.perf_counter()
+    rng = random.Random(seed)
+    now = timezone.now()
+    hub_ids = [uuid.uuid4() for _ in range(hubs)]
+    seeded = _seed_connections(rng, hub_ids, max(connections, hubs), now, batch_size)
+
+    hourly = {}
+    written = 0
+    with explicit_timestamps(SyncLog):
+        for batch in _batches(_generate_logs(rng, seeded, logs, now, days, hourly), batch_size):
+            SyncLog.objects.bulk_create(batch)
+            written += len(batch)
+            if progress:
+                progress(written)
+    HourlySyncStats.objects.bulk_create(
+        [
+            HourlySyncStats(hub_id=hub_id, hour=hour, logs_finished=finished, error_count=errors, records_synced=records)
+            for (hub_id, hour), (finished, errors, records) in hourly.items()
+        ],
+        batch_size=batch_size,
+    )
+    for hub_id in hub_ids:
+        rebuild_stats(hub_id=hub_id)
+    return SeedResult(hub_ids, len(seeded), written, time.perf_counter() - started)
+
+
+def busiest_hub():
+    """The hub with the most logs, according to the stats table."""
+    row = (
+        ConnectionSyncStats.objects.order_by().values('hub_id')
+        .annotate(logs=Sum('total_logs')).order_by('-logs').first()
+    )
+    return row['hub_id'] if row else None
+
+
+def benchmark_client(hub_id):
+    """A test client logged in as a benchmark admin of ``hub_id``."""
+    from django.contrib.auth.hashers import make_password
+
+    from apps.accounts.models import LocalUser
+
+    user, _ = LocalUser.objects.get_or_create(
+        hub_id=hub_id, email=BENCHMARK_USER_EMAIL,
+        defaults={'name': 'Benchmark', 'role': 'admin', 'pin_hash': make_password(None), 'is_active': True},
+    )
+    client = Client()
+    session = client.session
+    session.update({
+        'local_user_id': str(user.id), 'user_name': user.name, 'user_email': user.email,
+        'user_role': user.role, 'hub_id': str(hub_id), 'store_config_checked': True,
+    })
+    session.save()
+    return client
+
+
+def percentile(samples, pct):
+    """Nearest-rank percentile of ``samples``."""
+    ordered = sorted(samples)
+    return ordered[max(0, math.ceil(pct / 100 * len(ordered)) - 1)]
+
+
+def _request(client, url, params):
+    response = client.get(url, params, HTTP_HX_REQUEST='true')
+    if response.streaming:
+        size = sum(len(chunk) for chunk in response.streaming_content)
+    else:
+        size = len(response.content)
+    return response.status_code, size
+
+
+def benchmark_view(client, name, url, params, runs=10, warmup=1):
+    # Percentiles need at least one sample.
+    runs = max(1, runs)
+    for _ in range(warmup):
+        _request(client, url, params)
+    samples = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        status_code, size = _request(client, url, params)
+        samples.append((time.perf_counter() - started) * 1000)
+
+    with CaptureQueriesContext(db_connection) as ctx:
+        _request(client, url, params)
+
+    tracing = tracemalloc.is_tracing()
+    if not tracing:
+        tracemalloc.start()
+    tracemalloc.reset_peak()
+    baseline = tracemalloc.get_traced_memory()[0]
+    _request(client, url, params)
+    peak = tracemalloc.get_traced_memory()[1] - baseline
+    if not tracing:
+        tracemalloc.stop()
+
+    return ViewBenchmark(
+        name=name, status_code=status_code, runs=runs,
+        p50_ms=round(percentile(samples, 50), 2), p95_ms=round(percentile(samples, 95), 2),
+        p99_ms=round(percentile(samples, 99), 2), max_ms=round(max(samples), 2),
+        queries=len(ctx.captured_queries), peak_memory_kb=round(peak / 1024, 1),
+        response_kb=round(size / 1024, 1), samples_ms=[round(s, 2) for s in samples],
+    )
+
+
+def run_benchmarks(hub_id, runs=10, cases=None, warmup=1):
+    """Benchmark every case in ``BENCHMARK_CASES`` (or only the ``cases`` names) for ``hub_id``."""
+    selected = [case for case in BENCHMARK_CASES if not cases or case[0] in cases]
+    with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']):
+        client = benchmark_client(hub_id)
+        return [
+            benchmark_view(client, name, reverse(url_name), params, runs=runs, warmup=warmup)
+            for name, url_name, params in selected
+        ]
+
+
+def format_report(results):
+    header = f'{"view":<24} {"status":>6} {"p50 ms":>9} {"p95 ms":>9} {"p99 ms":>9} {"max ms":>9} {"queries":>8} {"peak KiB":>10} {"body KiB":>10}'
+    lines = [header, '-' * len(header)]
+    for r in results:
+        lines.append(
+            f'{r.name:<24} {r.status_code:>6} {r.p50_ms:>9.2f} {r.p95_ms:>9.2f} {r.p99_ms:>9.2f} '
+            f'{r.max_ms:>9.2f} {r.queries:>8} {r.peak_memory_kb:>10.1f} {r.response_kb:>10.1f}'
+        )
+    return '\n'.join(lines)
+
+
+def report_json(results, **meta):
+    """JSON report, for diffing runs before and after a change."""
+    return json.dumps({**meta, 'results': [asdict(r) for r in results]}, indent=2, default=str)
@@ -0,0 +1,152 @@
+"""
+Set-based bulk operations for connections and sync logs.
+
+Views resolve a selection (explicit ids or every row matching the current
+search) to a queryset; these functions then act on it with one UPDATE or a
+batched ``bulk_create``, never loading one model instance per row.
+"""
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from . import fragments, stats
+from .models import SyncLog, SyncRecordFailure
+
+BULK_CREATE_BATCH_SIZE = 500
+
+
+def set_sync_enabled(connections, enabled):
+    """Enable or disable sync on ``connections``; return the number changed."""
+    changed = connections.exclude(sync_enabled=enabled)
+    with transaction.atomic():
+        fragments.bump_versions(changed)
+        return changed.update(sync_enabled=enabled, updated_at=timezone.now())
+
+
+def delete_connections(connections):
+    with transaction.atomic():
+        fragments.bump_versions(connections)
+        return connections.update(is_deleted=True, deleted_at=timezone.now())
+
+
+def delete_logs(logs):
+    with transaction.atomic():
+        fragments.bump_versions(logs)
+        stats.remove_logs(logs)
+        return logs.update(is_deleted=True, deleted_at=timezone.now())
+
+
+def _create_pending_logs(keys, retry_failed_only=False):
+    """
+    ``bulk_create`` pending logs for ``(hub_id, connection_id, direction, entity_type)`` keys.
+
+    Keys another request queued in the meantime hit
+    ``accounting_sync_pending_unique`` and are skipped; only the logs
+    actually inserted are returned and counted.
+    """
+    logs = [
+        SyncLog(hub_id=hub_id, connection_id=connection_id, direction=direction,
+                entity_type=entity_type, status='pending', retry_failed_only=retry_failed_only)
+        for hub_id, connection_id, direction, entity_type in keys
+    ]
+    if not logs:
+        return []
+    with transaction.atomic():
+        SyncLog.objects.bulk_create(logs, batch_size=BULK_CREATE_BATCH_SIZE, ignore_conflicts=True)
+        inserted = set(SyncLog.objects.filter(id__in=[log.pk for log in logs]).values_list('id', flat=True))
+        logs = [log for log in logs if log.pk in inserted]
+        stats.add_logs(logs)
+        for hub_id in {log.hub_id for log in logs}:
+            fragments.bump_version(hub_id)
+    return logs
+
+
+def _pending_logs():
+    # A running log has already read its source, so only a pending one covers
+    # a new trigger. Failed-record retries re-send stored records only, so they
+    # do not stand in for a full sync either.
+    return SyncLog.objects.filter(status='pending', is_deleted=False, retry_failed_only=False)
+
+
+def _pending_keys(connection_ids):
+    return set(
+        _pending_logs().filter(connection_id__in=connection_ids)
+        .values_list('connection_id', 'direction', 'entity_type')
+    )
+
+
+def enqueue_sync(connection, direction='push', entity_type='all'):
+    """
+    Return ``(log, created)``: the connection's pending log for ``direction``
+    and ``entity_type``, or a new one.
+    """
+    key = {'connection': connection, 'direction': direction, 'entity_type': entity_type}
+    pending = _pending_logs().filter(**key).order_by('created_at')
+    log = pending.first()
+    if log is not None:
+        return log, False
+    try:
+        with transaction.atomic():
+            log = SyncLog.objects.create(hub_id=connection.hub_id, status='pending', **key)
+    except IntegrityError:
+        # A concurrent trigger queued it between the lookup and the insert. A
+        # worker may have claimed it since; it then still started after this call.
+        latest = SyncLog.objects.filter(is_deleted=False, retry_failed_only=False, **key).order_by('-created_at')
+        return pending.first() or latest.first(), False
+    return log, True
+
+
+def trigger_syncs(connections, direction='push', entity_type='all'):
+    """
+    Queue one pending log per connected connection in ``connections``.
+
+    Connections that already have a pending log for the same direction and
+    entity type are skipped. Returns the created logs.
+    """
+    targets = connections.filter(status='connected', is_deleted=False).order_by()
+    pending = _pending_keys(targets.values('id'))
+    keys = [
+        (hub_id, connection_id, direction, entity_type)
+        for connection_id, hub_id in targets.values_list('id', 'hub_id').iterator()
+        if (connection_id, direction, entity_type) not in pending
+    ]
+    return _create_pending_logs(keys)
+
+
+def retry_failed_logs(logs):
+    """
+    Queue a retry for every distinct (connection, direction, entity type) among the failed ``logs``.
+
+    Failed means ``error``, or ``partial`` once automatic retries gave up on
+    it (dead-lettered). Where records of the combination are stored in
+    ``SyncRecordFailure``, the failed run already moved the cursor past them,
+    so the retry re-sends just those (``retry_failed_only``); otherwise it is
+    a full sync. Only connected connections are retried, and combinations
+    that already have a pending retry of the same kind are skipped. Returns
+    the created logs.
+    """
+    failed = logs.filter(
+        Q(status='error') | Q(status='partial', dead_letter=True),
+        is_deleted=False, connection__status='connected', connection__is_deleted=False,
+    ).order_by()
+    connection_ids = failed.values('connection_id')
+    stored = set(
+        SyncRecordFailure.objects.filter(connection_id__in=connection_ids).order_by()
+        .values_list('connection_id', 'direction', 'entity_type').distinct()
+    )
+    stored_directions = {key[:2] for key in stored}
+    pending_full = _pending_keys(connection_ids)
+    pending_failed_only = set(
+        SyncLog.objects.filter(status='pending', is_deleted=False, retry_failed_only=True,
+                               connection_id__in=connection_ids)
+        .values_list('connection_id', 'direction', 'entity_type')
+    )
+    full, failed_only = [], []
+    for key in failed.values_list('hub_id', 'connection_id', 'direction', 'entity_type').distinct():
+        # An 'all' log covers every entity type of its direction.
+        has_failures = key[1:] in stored or (key[3] == 'all' and key[1:3] in stored_directions)
+        if has_failures and key[1:] not in pending_failed_only:
+            failed_only.append(key)
+        elif not has_failures and key[1:] not in pending_full:
+            full.append(key)
+    return _create_pending_logs(full) + _create_pending_logs(failed_only, retry_failed_only=True)
@@ -0,0 +1,54 @@
+"""
+Incremental sync cursors.
+
+Each (connection, entity_type, direction) keeps its own modified-since
+watermark and optional provider change token, so a sync of ``invoices``
+never moves the freshness of ``payments`` or ``customers``.
+"""
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import SyncCursor
+
+
+def get_cursor(connection, entity_type, direction):
+    cursor, _ = SyncCursor.objects.get_or_create(
+        connection=connection, entity_type=entity_type, direction=direction,
+        defaults={'hub_id': connection.hub_id},
+    )
+    return cursor
+
+
+def get_cursor_for_log(log):
+    return get_cursor(log.connection, log.entity_type, log.direction)
+
+
+def advance_cursor(cursor, watermark=None, change_token=None):
+    """
+    Move ``cursor`` forward after a successful delta.
+
+    The watermark only ever increases, even if two syncs of the same
+    entity race each other. Pass the sync start time (not the finish time)
+    so records modified while the sync ran are fetched again next time.
+    """
+    now = timezone.now()
+    if watermark is not None:
+        SyncCursor.objects.filter(pk=cursor.pk).filter(
+            Q(watermark__isnull=True) | Q(watermark__lt=watermark)
+        ).update(watermark=watermark, updated_at=now)
+        if cursor.watermark is None or watermark > cursor.watermark:
+            cursor.watermark = watermark
+    if change_token:
+        SyncCursor.objects.filter(pk=cursor.pk).update(change_token=change_token, updated_at=now)
+        cursor.change_token = change_token
+    return cursor
+
+
+def reset_cursors(connection, entity_type=None, direction=None):
+    """Forget watermarks so the next sync is a full re-sync."""
+    qs = SyncCursor.objects.filter(connection=connection)
+    if entity_type:
+        qs = qs.filter(entity_type=entity_type)
+    if direction:
+        qs = qs.filter(direction=direction)
+    return qs.update(watermark=None, change_token='', updated_at=timezone.now())
@@ -0,0 +1,329 @@
+"""
+Sync engine for the Accounting Sync module.
+
+Pending ``SyncLog`` rows are the job queue: workers claim them with
+row-level locks (``SKIP LOCKED`` where the database supports it), run them
+on a bounded thread pool and move each log through
+``pending`` → ``running`` → ``success`` / ``partial`` / ``error``. Failed
+logs are queued again with backoff (see ``retry``).
+
+A claim is a lease: the worker refreshes ``heartbeat_at`` of its running
+logs every ``HEARTBEAT_INTERVAL`` seconds (progress writes refresh it too).
+A running log whose heartbeat is older than ``ACCOUNTING_SYNC_CLAIM_TIMEOUT``
+seconds (default 900) belonged to a worker that died; the next claim fails
+it as a retryable error, which frees its connection.
+"""
+import logging
+import os
+import socket
+import time
+import uuid
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import Tuple
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from . import metrics, tracing
+from .cursors import advance_cursor, get_cursor
+from .models import AccountingConnection, SyncLog
+from .progress import get_progress
+from .providers import ProviderError, UnknownProviderError
+from .ratelimit import RateLimited
+from .retry import schedule_retry
+from .tokens import TokenRefreshError
+
+logger = logging.getLogger(__name__)
+
+# direction -> callable(log) -> SyncResult
+SYNC_HANDLERS = {}
+
+DEFAULT_CLAIM_TIMEOUT = 900
+HEARTBEAT_INTERVAL = 30.0
+LEASE_EXPIRED_MESSAGE = 'Worker stopped responding; the sync was abandoned.'
+
+
+def register_sync_handler(direction):
+    """Register the function that executes logs for ``direction``."""
+    def decorator(func):
+        SYNC_HANDLERS[direction] = func
+        return func
+    return decorator
+
+
+class SyncError(Exception):
+    """Raised when a sync job cannot be executed."""
+
+
+@dataclass
+class SyncResult:
+    records_synced: int = 0
+    records_failed: int = 0
+    # Records left alone because nothing changed since the last sync.
+    records_skipped: int = 0
+    error_message: str = ''
+    change_token: str = ''
+    # Entity types whose cursors advance on success (defaults to the log's).
+    entity_types: Tuple[str, ...] = ()
+    # Every failed record was stored in SyncRecordFailure, so a retry can
+    # re-send just those and the cursor may move on.
+    failures_tracked: bool = False
+    # False when running the log again cannot succeed (dead-letter it).
+    retryable: bool = True
+
+    @property
+    def status(self):
+        if self.records_failed and self.records_synced:
+            return 'partial'
+        if self.records_failed or self.error_message:
+            return 'error'
+        return 'success'
+
+
+def is_retryable(exc):
+    """Whether a sync that raised ``exc`` may succeed when run again."""
+    if isinstance(exc, (SyncError, UnknownProviderError)):
+        return False
+    if isinstance(exc, TokenRefreshError):
+        return not exc.rejected
+    if isinstance(exc, ProviderError) and exc.status_code:
+        return exc.status_code >= 500 or exc.status_code == 408
+    return True
+
+
+def default_worker_id():
+    return f'{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}'
+
+
+# ======================================================================
+# Claiming
+# ======================================================================
+
+def claim_timeout():
+    return getattr(settings, 'ACCOUNTING_SYNC_CLAIM_TIMEOUT', DEFAULT_CLAIM_TIMEOUT)
+
+
+def heartbeat(log_ids, worker_id):
+    """Extend the lease of ``worker_id``'s running logs among ``log_ids``."""
+    if log_ids:
+        SyncLog.objects.filter(id__in=log_ids, status='running', claimed_by=worker_id).update(
+            heartbeat_at=timezone.now(),
+        )
+
+
+def reap_expired_logs(now=None):
+    """Fail running logs whose worker stopped heartbeating; return them."""
+    now = now or timezone.now()
+    deadline = now - timedelta(seconds=claim_timeout())
+    with transaction.atomic():
+        expired = list(
+            SyncLog.objects.select_for_update(skip_locked=True, of=('self',)).select_related('connection')
+            .filter(status='running', is_deleted=False, heartbeat_at__lt=deadline)
+        )
+        for log in expired:
+            logger.warning('Sync log %s claimed by %s lost its lease', log.pk, log.claimed_by)
+            finish_or_fail(log, SyncResult(error_message=LEASE_EXPIRED_MESSAGE))
+    return expired
+
+
+def claim_pending_logs(worker_id, limit):
+    """
+    Atomically claim up to ``limit`` pending logs for ``worker_id``.
+
+    At most one log per connection is claimed, and connections that already
+    have a running log are skipped, so a connection never syncs twice at once.
+    Running logs with an expired lease are failed first. The claim also locks the connection rows: a worker claiming at the same
+    time skips them, because it cannot see this worker's uncommitted
+    ``running`` rows.
+    """
+    if limit <= 0:
+        return []
+    reap_expired_logs()
+    now = timezone.now()
+    with transaction.atomic():
+        busy = SyncLog.objects.filter(status='running', is_deleted=False).values('connection_id')
+        candidates = list(
+            SyncLog.objects
+            .select_for_update(skip_locked=True)
+            .filter(status='pending', is_deleted=False)
+            .filter(Q(next_attempt_at__isnull=True) | Q(next_attempt_at__lte=now))
+            .exclude(connection_id__in=busy)
+            .order_by('created_at')
+            .values_list('id', 'connection_id')[:limit * 4]
+        )
+        # Re-checked in the locking statement: a claim committed since the
+        # query above is visible here, and one still in flight holds the lock.
+        free = set(
+            AccountingConnection.objects
+            .select_for_update(skip_locked=True)
+            .filter(id__in={connection_id for _, connection_id in candidates})
+            .exclude(id__in=busy)
+            .values_list('id', flat=True)
+        )
+        ids, seen = [], set()
+        for log_id, connection_id in candidates:
+            if connection_id in seen or connection_id not in free:
+                continue
+            seen.add(connection_id)
+            ids.append(log_id)
+            if len(ids) >= limit:
+                break
+        if not ids:
+            return []
+        # The status guard keeps the claim safe on backends without row locks.
+        SyncLog.objects.filter(id__in=ids, status='pending').update(
+            status='running', claimed_by=worker_id, started_at=now, heartbeat_at=now, updated_at=now,
+            phase='starting', progress_done=0, progress_total=None,
+        )
+    return list(
+        SyncLog.objects.select_related('connection')
+        .filter(id__in=ids, status='running', claimed_by=worker_id)
+        .order_by('created_at')
+    )
+
+
+# ======================================================================
+# Execution
+# ======================================================================
+
+def run_log(log):
+    """Execute one claimed log and persist its final state."""
+    close_old_connections()
+    try:
+        handler = SYNC_HANDLERS.get(log.direction)
+        if handler is None:
+            raise SyncError(f'No sync handler registered for direction {log.direction!r}')
+        with tracing.record_spans(log):
+            result = handler(log)
+    except RateLimited as exc:
+        logger.info('Sync log %s deferred: %s', log.pk, exc)
+        try:
+            defer_log(log, exc.retry_at)
+        finally:
+            close_old_connections()
+        return None
+    except Exception as exc:
+        logger.exception('Sync log %s failed', log.pk)
+        result = SyncResult(
+            records_synced=0, error_message=str(exc) or exc.__class__.__name__, retryable=is_retryable(exc),
+        )
+    try:
+        finish_or_fail(log, result)
+    finally:
+        close_old_connections()
+    return result
+
+
+def defer_log(log, retry_at):
+    """
+    Put a claimed log back in the queue, not to be claimed before ``retry_at``.
+
+    Records already synced are saved on the log (and counted in the stats);
+    the next run adds its own to them.
+    """
+    log.status = 'pending'
+    log.claimed_by = ''
+    log.next_attempt_at = retry_at
+    log.phase = 'deferred'
+    log.records_synced = get_progress(log).records_synced
+    log.save(update_fields=['status', 'claimed_by', 'next_attempt_at', 'phase', 'records_synced', 'updated_at'])
+
+
+def finish_log(log, result):
+    now = timezone.now()
+    log.status = result.status
+    # Runs before a rate-limit deferral left their count on the log.
+    log.records_synced = (log.records_synced or 0) + result.records_synced
+    log.error_message = result.error_message
+    log.finished_at = now
+    log.phase = 'done'
+    log.timings = tracing.get_timings(log)
+    log.progress_done = max(
+        log.progress_done or 0, result.records_synced + result.records_failed + result.records_skipped,
+    )
+    log.save(update_fields=[
+        'status', 'records_synced', 'error_message', 'finished_at', 'phase', 'progress_done', 'timings',
+        'updated_at',
+    ])
+    metrics.observe_sync(log)
+    if log.status in ('success', 'partial'):
+        log.connection.last_sync_at = now
+        log.connection.save(update_fields=['last_sync_at', 'updated_at'])
+    # Failed-record retries never read the source, so they must not move it.
+    # Other runs move it on success, or when every failed record is stored
+    # for retry; otherwise the old watermark makes the next run re-read them.
+    if not log.retry_failed_only and (log.status == 'success' or result.failures_tracked):
+        for entity_type in result.entity_types or (log.entity_type,):
+            cursor = get_cursor(log.connection, entity_type, log.direction)
+            advance_cursor(cursor, watermark=log.started_at, change_token=result.change_token)
+    schedule_retry(log, result, now=now)
+
+
+def finish_or_fail(log, result):
+    """
+    ``finish_log``, or mark the log ``error`` if finishing raises.
+
+    Either way the log leaves ``running``, so its connection is not blocked.
+    """
+    try:
+        with transaction.atomic():
+            finish_log(log, result)
+    except Exception as exc:
+        logger.exception('Finishing sync log %s failed', log.pk)
+        stuck = SyncLog.objects.filter(pk=log.pk, status='running').first()
+        if stuck is not None:
+            stuck.status = 'error'
+            stuck.error_message = result.error_message or f'Finishing the sync failed: {exc}'
+            stuck.finished_at = timezone.now()
+            stuck.phase = 'done'
+            stuck.save(update_fields=['status', 'error_message', 'finished_at', 'phase', 'updated_at'])
+
+
+class SyncWorker:
+    """Claim-and-run loop over a bounded thread pool."""
+
+    def __init__(self, concurrency=8, worker_id=None):
+        self.concurrency = max(1, concurrency)
+        self.worker_id = worker_id or default_worker_id()
+
+    def run_once(self):
+        """Claim one batch, run it to completion and return the number of logs run."""
+        logs = claim_pending_logs(self.worker_id, self.concurrency)
+        if not logs:
+            return 0
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix='accounting-sync') as pool:
+            inflight = {pool.submit(run_log, log): log.pk for log in logs}
+            while inflight:
+                done, _ = wait(inflight, timeout=HEARTBEAT_INTERVAL, return_when=FIRST_COMPLETED)
+                for future in done:
+                    del inflight[future]
+                heartbeat(list(inflight.values()), self.worker_id)
+        return len(logs)
+
+    def run_forever(self, poll_interval=5.0, stop_event=None):
+        """Keep the pool full until ``stop_event`` is set."""
+        inflight = {}
+        last_heartbeat = time.monotonic()
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix='accounting-sync') as pool:
+            while not (stop_event and stop_event.is_set()):
+                free = self.concurrency - len(inflight)
+                for log in claim_pending_logs(self.worker_id, free):
+                    inflight[pool.submit(run_log, log)] = log.pk
+                if inflight:
+                    done, _ = wait(inflight, timeout=poll_interval, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        del inflight[future]
+                        if future.exception():
+                            logger.error('Sync job crashed: %s', future.exception())
+                elif stop_event:
+                    stop_event.wait(poll_interval)
+                else:
+                    time.sleep(poll_interval)
+                if time.monotonic() - last_heartbeat >= HEARTBEAT_INTERVAL:
+                    heartbeat(list(inflight.values()), self.worker_id)
+                    last_heartbeat = time.monotonic()
+            wait(inflight)
@@ -6,10 +6,11 @@ from .models import AccountingConnection, SyncLog
 class AccountingConnectionForm(forms.ModelForm):
     class Meta:
         model = AccountingConnection
-        fields = ['provider', 'name', 'status', 'access_token', 'refresh_token', 'last_sync_at', 'sync_enabled']
+        fields = ['provider', 'name', 'tenant_id', 'status', 'access_token', 'refresh_token', 'last_sync_at', 'sync_enabled']
         widgets = {
             'provider': forms.TextInput(attrs={'class': 'input input-sm w-full'}),
             'name': forms.TextInput(attrs={'class': 'input input-sm w-full'}),
+            'tenant_id': forms.TextInput(attrs={'class': 'input input-sm w-full'}),
             'status': forms.TextInput(attrs={'class': 'input input-sm w-full'}),
             'access_token': forms.Textarea(attrs={'class': 'textarea textarea-sm w-full', 'rows': 3}),
             'refresh_token': forms.Textarea(attrs={'class': 'textarea textarea-sm w-full', 'rows': 3}),
@@ -0,0 +1,114 @@
+"""
+Versioned cache of rendered HTMX fragments.
+
+Each hub has a version counter (``HubCacheVersion``). Writes to its
+connections and logs bump it: model signals cover ``save()``, and the
+set-based helpers in ``bulk``/``tokens`` bump explicitly. A rendered
+fragment is cached under (fragment, hub, version, language, view
+parameters). Any write therefore makes the hub's cached fragments
+unreachable at once, with no invalidation pass.
+
+Entries live in a process-local LRU of ``ACCOUNTING_SYNC_FRAGMENT_CACHE_SIZE``
+fragments (default 256; 0 disables the cache). Entries also expire after
+``ACCOUNTING_SYNC_FRAGMENT_CACHE_TTL`` seconds (default 60), because some
+fragments show relative times and 24-hour windows. A hit costs one indexed
+query for the hub's version.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils import translation
+
+from .models import HubCacheVersion
+from .stats import upsert_counters
+
+DEFAULT_CACHE_SIZE = 256
+DEFAULT_CACHE_TTL = 60.0
+
+
+class FragmentCache:
+    """Thread-safe LRU of ``key -> (content, content_type)`` with a time-to-live."""
+
+    def __init__(self, max_entries=DEFAULT_CACHE_SIZE, ttl=DEFAULT_CACHE_TTL, clock=time.monotonic):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or self.clock() - entry[0] > self.ttl:
+                self._entries.pop(key, None)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, value):
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (self.clock(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+
+fragment_cache = FragmentCache(
+    max_entries=getattr(settings, 'ACCOUNTING_SYNC_FRAGMENT_CACHE_SIZE', DEFAULT_CACHE_SIZE),
+    ttl=getattr(settings, 'ACCOUNTING_SYNC_FRAGMENT_CACHE_TTL', DEFAULT_CACHE_TTL),
+)
+
+
+def get_version(hub_id):
+    return HubCacheVersion.objects.filter(hub_id=hub_id).values_list('version', flat=True).first() or 0
+
+
+def bump_version(hub_id):
+    """Invalidate every cached fragment of ``hub_id``."""
+    if hub_id is not None:
+        upsert_counters(HubCacheVersion, {'hub_id': hub_id}, {}, {'version': 1})
+
+
+def bump_versions(queryset):
+    """Invalidate the fragments of every hub with a row in ``queryset`` (call before set-based writes)."""
+    for hub_id in queryset.order_by().values_list('hub_id', flat=True).distinct():
+        bump_version(hub_id)
+
+
+def cached_fragment(name, hub_id, params, render):
+    """
+    Return the cached ``name`` fragment for ``hub_id`` and ``params``, or ``render()`` and cache it.
+
+    ``params`` are the normalized view parameters that change the output.
+    Only 200 responses are cached.
+    """
+    if fragment_cache.max_entries <= 0:
+        return render()
+    # Read the version before the data, so a concurrent write can only
+    # leave fresh content under an old key, never stale content under the new one.
+    key = (name, str(hub_id), get_version(hub_id), translation.get_language(), tuple(sorted(params.items())))
+    cached = fragment_cache.get(key)
+    if cached is not None:
+        content, content_type = cached
+        return HttpResponse(content, content_type=content_type)
+    response = render()
+    if response.status_code == 200 and not response.streaming:
+        fragment_cache.set(key, (response.content, response['Content-Type']))
+    return response
@@ -0,0 +1,30 @@
+"""Benchmark the accounting sync list, search, export and dashboard views."""
+from django.core.management.base import BaseCommand, CommandError
+
+from accounting_sync.benchmark import BENCHMARK_CASES, busiest_hub, format_report, report_json, run_benchmarks
+
+
+class Command(BaseCommand):
+    help = 'Report latency percentiles, query counts and peak memory per view for one hub.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hub-id', default=None, help='Hub to benchmark (default: the hub with the most logs)')
+        parser.add_argument('--runs', type=int, default=10, help='Timed requests per view (at least 1)')
+        parser.add_argument('--warmup', type=int, default=1, help='Untimed requests per view before timing')
+        parser.add_argument(
+            '--case', action='append', dest='cases', choices=[name for name, _, _ in BENCHMARK_CASES],
+            help='Only run this view (repeatable)',
+        )
+        parser.add_argument('--json', action='store_true', help='Print a JSON report instead of a table')
+
+    def handle(self, *args, **options):
+        hub_id = options['hub_id'] or busiest_hub()
+        if hub_id is None:
+            raise CommandError('No sync data found; run accounting_sync_seed first or pass --hub-id')
+        runs = max(1, options['runs'])
+        results = run_benchmarks(hub_id, runs=runs, cases=options['cases'], warmup=options['warmup'])
+        if options['json']:
+            self.stdout.write(report_json(results, hub_id=hub_id, runs=runs))
+        else:
+            self.stdout.write(f'Hub {hub_id}, {runs} run(s) per view')
+            self.stdout.write(format_report(results))
@@ -0,0 +1,24 @@
+"""Roll up and delete sync logs past their hub's retention period."""
+from django.core.management.base import BaseCommand
+
+from accounting_sync.retention import PURGE_BATCH_SIZE, purge_expired_logs
+
+
+class Command(BaseCommand):
+    help = 'Roll expired SyncLog rows into daily summaries and delete them in bounded batches.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hub-id', default=None, help='Only purge this hub')
+        parser.add_argument('--batch-size', type=int, default=PURGE_BATCH_SIZE, help='Logs deleted per transaction')
+        parser.add_argument('--max-batches', type=int, default=None, help='Stop each hub after this many batches')
+
+    def handle(self, *args, **options):
+        purged = purge_expired_logs(
+            hub_id=options['hub_id'],
+            batch_size=options['batch_size'],
+            max_batches=options['max_batches'],
+        )
+        for hub_id, count in purged.items():
+            if count:
+                self.stdout.write(f'{hub_id}: {count} logs purged')
+        self.stdout.write(self.style.SUCCESS(f'Purged {sum(purged.values())} sync logs'))
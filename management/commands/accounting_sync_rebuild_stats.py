@@ -0,0 +1,15 @@
+"""Recompute accounting sync statistics from the log table."""
+from django.core.management.base import BaseCommand
+
+from accounting_sync.stats import rebuild_stats
+
+
+class Command(BaseCommand):
+    help = 'Recompute per-connection sync statistics from SyncLog (repair after manual edits).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hub-id', default=None, help='Only rebuild this hub')
+
+    def handle(self, *args, **options):
+        rebuild_stats(hub_id=options['hub_id'])
+        self.stdout.write(self.style.SUCCESS('Sync statistics rebuilt'))
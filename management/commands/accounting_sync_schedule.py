@@ -0,0 +1,16 @@
+"""Queue periodic syncs for connections with sync enabled."""
+from django.core.management.base import BaseCommand
+
+from accounting_sync.scheduler import schedule_due_syncs
+
+
+class Command(BaseCommand):
+    help = 'Queue syncs for enabled connections whose slot has come. Run it every minute.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=None, help='Maximum connections scheduled in this run')
+        parser.add_argument('--interval', type=int, default=None, help='Seconds between syncs of one connection')
+
+    def handle(self, *args, **options):
+        created = schedule_due_syncs(interval=options['interval'], limit=options['limit'])
+        self.stdout.write(self.style.SUCCESS(f'Queued {len(created)} sync log(s)'))
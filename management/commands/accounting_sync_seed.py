@@ -0,0 +1,34 @@
+"""Seed synthetic accounting sync data for benchmarks."""
+from django.core.management.base import BaseCommand
+
+from accounting_sync.benchmark import SEED_BATCH_SIZE, seed_data
+
+
+class Command(BaseCommand):
+    help = 'Create hubs full of synthetic connections and sync logs (bulk inserts) for benchmarking.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hubs', type=int, default=5, help='Number of new hubs')
+        parser.add_argument('--connections', type=int, default=50, help='Connections in total, spread over the hubs')
+        parser.add_argument('--logs', type=int, default=10000, help='Sync logs in total, spread over the connections')
+        parser.add_argument('--days', type=int, default=30, help='Spread log timestamps over this many days')
+        parser.add_argument('--batch-size', type=int, default=SEED_BATCH_SIZE, help='Rows per INSERT')
+        parser.add_argument('--seed', type=int, default=None, help='Random seed for a reproducible layout')
+
+    def handle(self, *args, **options):
+        step = max(options['logs'] // 20, options['batch_size'])
+
+        def progress(written):
+            if written % step < options['batch_size'] or written == options['logs']:
+                self.stdout.write(f'  {written}/{options["logs"]} logs')
+
+        result = seed_data(
+            hubs=options['hubs'], connections=options['connections'], logs=options['logs'],
+            days=options['days'], batch_size=options['batch_size'], seed=options['seed'], progress=progress,
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Seeded {len(result.hub_ids)} hub(s), {result.connections} connection(s) and '
+            f'{result.logs} log(s) in {result.seconds:.1f}s'
+        ))
+        for hub_id in result.hub_ids:
+            self.stdout.write(f'  hub {hub_id}')
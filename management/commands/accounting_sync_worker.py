@@ -0,0 +1,35 @@
+"""Run the accounting sync worker."""
+import signal
+import threading
+
+from django.core.management.base import BaseCommand
+
+from accounting_sync.engine import SyncWorker
+from accounting_sync.providers import close_sessions
+
+
+class Command(BaseCommand):
+    help = 'Claim pending accounting sync logs and execute them concurrently.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=8, help='Maximum number of syncs running at once')
+        parser.add_argument('--poll-interval', type=float, default=5.0, help='Seconds to wait when the queue is empty')
+        parser.add_argument('--once', action='store_true', help='Drain a single batch and exit')
+        parser.add_argument('--worker-id', default=None, help='Identifier recorded on claimed logs')
+
+    def handle(self, *args, **options):
+        worker = SyncWorker(concurrency=options['concurrency'], worker_id=options['worker_id'])
+        if options['once']:
+            count = worker.run_once()
+            self.stdout.write(self.style.SUCCESS(f'Ran {count} sync job(s)'))
+            return
+
+        stop_event = threading.Event()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(sig, lambda *_: stop_event.set())
+        self.stdout.write(f'Accounting sync worker {worker.worker_id} started (concurrency={worker.concurrency})')
+        try:
+            worker.run_forever(poll_interval=options['poll_interval'], stop_event=stop_event)
+        finally:
+            close_sessions()
+        self.stdout.write('Accounting sync worker stopped')
@@ -0,0 +1,98 @@
+"""
+External ID mappings.
+
+``ExternalIdMapping`` remembers which provider record each Hub record was
+pushed to and the hash of the canonical payload that was sent. Push uses it
+to skip records whose payload has not changed and to turn updates into
+targeted writes against the known remote ID.
+"""
+import hashlib
+import json
+from itertools import islice
+
+from .models import ExternalIdMapping
+from .tracing import span
+
+LOOKUP_CHUNK_SIZE = 500
+
+
+def content_hash(payload):
+    """SHA-256 of the canonical JSON form of ``payload``."""
+    canonical = json.dumps(payload, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+def load_mappings(connection, entity_type, local_ids):
+    """Return ``{local_id: ExternalIdMapping}`` for the given ids."""
+    return {
+        m.local_id: m
+        for m in ExternalIdMapping.objects.filter(
+            connection=connection, entity_type=entity_type, local_id__in=local_ids,
+        ).only('id', 'local_id', 'remote_id', 'remote_version', 'content_hash')
+    }
+
+
+def filter_changed(connection, adapter, records, stats=None):
+    """
+    Yield the records that need pushing, in chunks of ``LOOKUP_CHUNK_SIZE``.
+
+    Unchanged records (same content hash as the last push) are dropped and
+    counted in ``stats['skipped']``. Known records get their remote ID
+    applied so the adapter sends a targeted update.
+    """
+    iterator = iter(records)
+    while True:
+        # Reading the source (building payloads) is timed as part of the transform.
+        with span('transform') as timed:
+            chunk = list(islice(iterator, LOOKUP_CHUNK_SIZE))
+            if not chunk:
+                return
+            timed.add(len(chunk))
+            changed = list(_changed_records(connection, adapter, chunk, stats))
+        yield from changed
+
+
+def _changed_records(connection, adapter, chunk, stats):
+    mappings = {}
+    for entity_type in {r.entity_type for r in chunk}:
+        ids = [str(r.local_id) for r in chunk if r.entity_type == entity_type]
+        for local_id, mapping in load_mappings(connection, entity_type, ids).items():
+            mappings[(entity_type, local_id)] = mapping
+    for record in chunk:
+        record.content_hash = content_hash(record.payload)
+        mapping = mappings.get((record.entity_type, str(record.local_id)))
+        if mapping is not None:
+            if mapping.content_hash == record.content_hash:
+                if stats is not None:
+                    stats['skipped'] = stats.get('skipped', 0) + 1
+                continue
+            record.payload = adapter.apply_remote_id(
+                record.entity_type, record.payload, mapping.remote_id, mapping.remote_version,
+            )
+        yield record
+
+
+def save_mappings(connection, adapter, pushed):
+    """Upsert mappings for ``[(OutgoingRecord, BatchItemResult), ...]`` accepted by the provider."""
+    rows = {}
+    for record, result in pushed:
+        remote_id = adapter.get_remote_id(record.entity_type, result.remote)
+        if not remote_id:
+            continue
+        rows[(record.entity_type, str(record.local_id))] = ExternalIdMapping(
+            hub_id=connection.hub_id,
+            connection=connection,
+            entity_type=record.entity_type,
+            local_id=str(record.local_id),
+            remote_id=remote_id,
+            remote_version=adapter.get_remote_version(record.entity_type, result.remote),
+            content_hash=record.content_hash,
+        )
+    if rows:
+        ExternalIdMapping.objects.bulk_create(
+            list(rows.values()),
+            update_conflicts=True,
+            unique_fields=['connection', 'entity_type', 'local_id'],
+            update_fields=['remote_id', 'remote_version', 'content_hash', 'updated_at'],
+        )
+    return len(rows)
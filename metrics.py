@@ -0,0 +1,127 @@
+"""
+Prometheus metrics for accounting sync.
+
+``render_metrics`` builds the text exposition format from the small stats
+tables and one grouped count of the queue. A scrape therefore costs the
+same on any log volume, and every worker process feeds the same numbers.
+
+- ``accounting_sync_logs_finished_total{provider,status}`` and
+  ``accounting_sync_records_synced_total{provider}`` are counters.
+  ``rate()`` over them gives throughput and the error rate. They come from
+  ``SyncThroughputStats``, which ``observe_sync`` only ever increments: the
+  per-connection totals shrink when logs or connections are deleted, and a
+  counter that goes down reads as a reset.
+- ``accounting_sync_queue_depth{provider,status}`` counts pending and
+  running logs.
+- ``accounting_sync_duration_seconds{provider}`` is a histogram of whole
+  syncs. ``accounting_sync_phase_duration_seconds{provider,phase}`` is a
+  histogram of each sync's total time per phase (see ``tracing``).
+"""
+import math
+
+from django.db.models import Count
+from django.db.models.functions import Lower
+
+from .models import SyncDurationStats, SyncLog, SyncThroughputStats
+from .stats import STATUS_COUNTERS, upsert_counters
+
+DURATION_BUCKETS = (0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800, math.inf)
+QUEUE_STATUSES = ('pending', 'running')
+
+
+def bucket_label(value):
+    return '+Inf' if value == math.inf else f'{value:g}'
+
+
+def bucket_for(seconds):
+    return bucket_label(next(bound for bound in DURATION_BUCKETS if seconds <= bound))
+
+
+def observe(provider, phase, seconds):
+    seconds = max(0.0, seconds)
+    upsert_counters(
+        SyncDurationStats, {'provider': provider, 'phase': phase, 'le': bucket_for(seconds)}, {},
+        {'count': 1, 'seconds': seconds},
+    )
+
+
+def observe_sync(log):
+    """Add a finished log to the throughput counters and its duration and phase timings to the histograms."""
+    provider = (log.connection.provider or '').strip().lower()
+    upsert_counters(
+        SyncThroughputStats, {'provider': provider, 'status': log.status}, {},
+        {'logs': 1, 'records_synced': log.records_synced or 0},
+    )
+    if log.started_at and log.finished_at:
+        observe(provider, 'total', (log.finished_at - log.started_at).total_seconds())
+    for phase, entry in (log.timings or {}).items():
+        observe(provider, phase, entry['ms'] / 1000)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(**labels):
+    return '{' + ','.join(f'{k}="{_escape(v)}"' for k, v in labels.items()) + '}'
+
+
+def _metric(lines, name, kind, help_text, samples):
+    lines.append(f'# HELP {name} {help_text}')
+    lines.append(f'# TYPE {name} {kind}')
+    for labels, value in samples:
+        lines.append(f'{name}{_labels(**labels)} {value}')
+
+
+def _histogram(lines, name, help_text, rows, label_names):
+    lines.append(f'# HELP {name} {help_text}')
+    lines.append(f'# TYPE {name} histogram')
+    series = {}
+    for row in rows:
+        key = tuple(row[label] for label in label_names)
+        buckets = series.setdefault(key, {'buckets': {}, 'count': 0, 'sum': 0.0})
+        buckets['buckets'][row['le']] = row['count']
+        buckets['count'] += row['count']
+        buckets['sum'] += row['seconds']
+    for key, data in sorted(series.items()):
+        labels = dict(zip(label_names, key))
+        cumulative = 0
+        for bound in DURATION_BUCKETS:
+            cumulative += data['buckets'].get(bucket_label(bound), 0)
+            lines.append(f'{name}_bucket{_labels(**labels, le=bucket_label(bound))} {cumulative}')
+        lines.append(f'{name}_sum{_labels(**labels)} {data["sum"]:g}')
+        lines.append(f'{name}_count{_labels(**labels)} {data["count"]}')
+
+
+def render_metrics():
+    lines = []
+    totals = {}
+    for row in SyncThroughputStats.objects.values('provider', 'status', 'logs', 'records_synced'):
+        entry = totals.setdefault(row['provider'], {'records': 0})
+        entry[row['status']] = row['logs']
+        entry['records'] += row['records_synced']
+    _metric(lines, 'accounting_sync_logs_finished_total', 'counter', 'Finished sync logs.', [
+        ({'provider': provider, 'status': status}, totals[provider].get(status, 0))
+        for provider in sorted(totals) for status in STATUS_COUNTERS
+    ])
+    _metric(lines, 'accounting_sync_records_synced_total', 'counter', 'Records synced.', [
+        ({'provider': provider}, totals[provider]['records']) for provider in sorted(totals)
+    ])
+    queue = (
+        SyncLog.objects.filter(status__in=QUEUE_STATUSES, is_deleted=False)
+        .annotate(provider=Lower('connection__provider')).order_by().values('provider', 'status')
+        .annotate(logs=Count('id')).order_by('provider', 'status')
+    )
+    _metric(lines, 'accounting_sync_queue_depth', 'gauge', 'Pending and running sync logs.', [
+        ({'provider': row['provider'], 'status': row['status']}, row['logs']) for row in queue
+    ])
+    durations = list(SyncDurationStats.objects.values('provider', 'phase', 'le', 'count', 'seconds'))
+    _histogram(
+        lines, 'accounting_sync_duration_seconds', 'Duration of finished syncs.',
+        [row for row in durations if row['phase'] == 'total'], ('provider',),
+    )
+    _histogram(
+        lines, 'accounting_sync_phase_duration_seconds', 'Time a sync spent per phase.',
+        [row for row in durations if row['phase'] != 'total'], ('provider', 'phase'),
+    )
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,26 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounting_sync', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='synclog',
+            name='claimed_by',
+            field=models.CharField(blank=True, max_length=100, verbose_name='Claimed By'),
+        ),
+        migrations.AddField(
+            model_name='synclog',
+            name='started_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Started At'),
+        ),
+        migrations.AddField(
+            model_name='synclog',
+            name='finished_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Finished At'),
+        ),
+    ]
@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounting_sync', '0002_synclog_worker_fields'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='accountingconnection',
+            name='tenant_id',
+            field=models.CharField(blank=True, max_length=100, verbose_name='Tenant ID'),
+        ),
+    ]
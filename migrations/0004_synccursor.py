@@ -0,0 +1,32 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounting_sync', '0003_accountingconnection_tenant_id'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SyncCursor',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('hub_id', models.UUIDField(blank=True, db_index=True, editable=False, null=True)),
+                ('entity_type', models.CharField(max_length=50, verbose_name='Entity Type')),
+                ('direction', models.CharField(max_length=10, verbose_name='Direction')),
+                ('watermark', models.DateTimeField(blank=True, null=True, verbose_name='Modified Since')),
+                ('change_token', models.CharField(blank=True, max_length=255, verbose_name='Change Token')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('connection', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='cursors', to='accounting_sync.accountingconnection')),
+            ],
+            options={
+                'db_table': 'accounting_sync_synccursor',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='synccursor',
+            constraint=models.UniqueConstraint(fields=('connection', 'entity_type', 'direction'), name='accounting_sync_cursor_unique'),
+        ),
+    ]
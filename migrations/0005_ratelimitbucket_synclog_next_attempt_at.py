@@ -0,0 +1,30 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounting_sync', '0004_synccursor'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='synclog',
+            name='next_attempt_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Next Attempt At'),
+        ),
+        migrations.CreateModel(
+            name='RateLimitBucket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=200, unique=True)),
+                ('tokens', models.FloatField(default=0)),
+                ('refilled_at', models.DateTimeField()),
+                ('blocked_until', models.DateTimeField(blank=True, null=True)),
+                ('version', models.PositiveBigIntegerField(default=0)),
+            ],
+            options={
+                'db_table': 'accounting_sync_ratelimitbucket',
+            },
+        ),
+    ]
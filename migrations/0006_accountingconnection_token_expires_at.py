@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounting_sync', '0005_ratelimitbucket_synclog_next_attempt_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='accountingconnection',
+            name='token_expires_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Token Expires At'),
+        ),
+    ]
@@ -0,0 +1,37 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounting_sync', '0006_accountingconnection_token_expires_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExternalIdMapping',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('hub_id', models.UUIDField(blank=True, db_index=True, editable=False, null=True)),
+                ('entity_type', models.CharField(max_length=50, verbose_name='Entity Type')),
+                ('local_id', models.CharField(max_length=64, verbose_name='Local ID')),
+                ('remote_id', models.CharField(max_length=255, verbose_name='Remote ID')),
+                ('remote_version', models.CharField(blank=True, max_length=100, verbose_name='Remote Version')),
+                ('content_hash', models.CharField(blank=True, max_length=64, verbose_name='Content Hash')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('connection', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='mappings', to='accounting_sync.accountingconnection')),
+            ],
+            options={
+                'db_table': 'accounting_sync_externalidmapping',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='externalidmapping',
+            constraint=models.UniqueConstraint(fields=('connection', 'entity_type', 'local_id'), name='accounting_sync_mapping_local_unique'),
+        ),
+        migrations.AddIndex(
+            model_name='externalidmapping',
+            index=models.Index(fields=['connection', 'entity_type', 'remote_id'], name='accounting_sync_mapping_remote'),
+        ),
+    ]
@@ -0,0 +1,84 @@
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Max, Q, Sum
+
+
+def backfill_stats(apps, schema_editor):
+    SyncLog = apps.get_model('accounting_sync', 'SyncLog')
+    ConnectionSyncStats = apps.get_model('accounting_sync', 'ConnectionSyncStats')
+    rows = (
+        SyncLog.objects.filter(is_deleted=False)
+        .values('connection_id', 'connection__hub_id')
+        .annotate(
+            total_logs=Count('id'),
+            success_count=Count('id', filter=Q(status='success')),
+            partial_count=Count('id', filter=Q(status='partial')),
+            error_count=Count('id', filter=Q(status='error')),
+            records_synced=Sum('records_synced'),
+            last_success_at=Max('updated_at', filter=Q(status='success')),
+            last_error_at=Max('updated_at', filter=Q(status='error')),
+        )
+    )
+    ConnectionSyncStats.objects.bulk_create([
+        ConnectionSyncStats(
+            hub_id=row['connection__hub_id'],
+            connection_id=row['connection_id'],
+            total_logs=row['total_logs'],
+            success_count=row['success_count'],
+            partial_count=row['partial_count'],
+            error_count=row['error_count'],
+            records_synced=row['records_synced'] or 0,
+            last_success_at=row['last_success_at'],
+            last_error_at=row['last_error_at'],
+        )
+        for row in rows.order_by()
+    ], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounting_sync', '0007_externalidmapping'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ConnectionSyncStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('hub_id', models.UUIDField(blank=True, db_index=True, editable=False, null=True)),
+                ('total_logs', models.BigIntegerField(default=0)),
+                ('success_count', models.BigIntegerField(default=0)),
+                ('partial_count', models.BigIntegerField(default=0)),
+                ('error_count', models.BigIntegerField(default=0)),
+                ('records_synced', models.BigIntegerField(default=0)),
+                ('last_success_at', models.DateTimeField(blank=True, null=True)),
+                ('last_error_at', models.DateTimeField(blank=True, null=True)),
+                ('last_error_message', models.CharField(blank=True, max_length=500)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('connection', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='stats', to='accounting_sync.accountingconnection')),
+            ],
+            options={
+                'db_table': 'accounting_sync_connectionsyncstats',
+            },
+        ),
+        migrations.CreateModel(
+            name='HourlySyncStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('hub_id', models.UUIDField(blank=True, editable=False, null=True)),
+                ('hour', models.DateTimeField()),
+                ('logs_finished', models.BigIntegerField(default=0)),
+                ('error_count', models.BigIntegerField(default=0)),
+                ('records_synced', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'db_table': 'accounting_sync_hourlysyncstats',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='hourlysyncstats',
+            constraint=models.UniqueConstraint(fields=('hub_id', 'hour'), name='accounting_sync_hourly_unique'),
+        ),
+        migrations.RunPython(backfill_stats, migrations.RunPython.noop),
+    ]
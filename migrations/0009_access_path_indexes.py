@@ -0,0 +1,46 @@
+from django.db import migrations, models
+
+# Built CONCURRENTLY on PostgreSQL: SyncLog is the largest table, and a plain
+# CREATE INDEX blocks writes to it for the whole build.
+INDEXES = [
+    ('accountingconnection', models.Index(fields=['hub_id', 'is_deleted', 'name'], name='acsync_conn_hub_name')),
+    ('synclog', models.Index(fields=['hub_id', 'is_deleted', 'created_at', 'id'], name='acsync_log_hub_created')),
+    ('synclog', models.Index(fields=['hub_id', 'is_deleted', 'status'], name='acsync_log_hub_status')),
+    ('synclog', models.Index(fields=['hub_id', 'is_deleted', 'connection'], name='acsync_log_hub_conn')),
+    ('synclog', models.Index(fields=['connection', 'status', 'created_at'], name='acsync_log_conn_status')),
+    ('synclog', models.Index(fields=['status', 'is_deleted', 'created_at'], name='acsync_log_queue')),
+]
+
+
+def _concurrently(schema_editor):
+    return {'concurrently': True} if schema_editor.connection.vendor == 'postgresql' else {}
+
+
+def add_indexes(apps, schema_editor):
+    for model_name, index in INDEXES:
+        schema_editor.add_index(apps.get_model('accounting_sync', model_name), index, **_concurrently(schema_editor))
+
+
+def remove_indexes(apps, schema_editor):
+    for model_name, index in INDEXES:
+        schema_editor.remove_index(apps.get_model('accounting_sync', model_name), index, **_concurrently(schema_editor))
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction.
+    atomic = False
+
+    dependencies = [
+        ('accounting_sync', '0008_sync_stats'),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AddIndex(model_name=model_name, index=index) for model_name, index in INDEXES
+            ],
+            database_operations=[
+                migrations.RunPython(add_indexes, remove_indexes),
+            ],
+        ),
+    ]
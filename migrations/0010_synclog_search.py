@@ -0,0 +1,70 @@
+from django.db import migrations
+
+# The DDL is frozen here as it was when this migration was written;
+# accounting_sync.search may change later, a historical migration must not.
+PG_CREATE = (
+    'CREATE INDEX CONCURRENTLY IF NOT EXISTS acsync_log_search ON accounting_sync_synclog USING gin ('
+    "to_tsvector('simple'::regconfig, "
+    "coalesce(error_message, '') || ' ' || coalesce(entity_type, '') || ' ' || "
+    "coalesce(status, '') || ' ' || coalesce(direction, '')))"
+)
+SQLITE_CREATE = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS accounting_sync_synclog_fts USING fts5(log_id UNINDEXED, body, prefix='2 3')",
+    'CREATE TRIGGER IF NOT EXISTS accounting_sync_synclog_fts_ai AFTER INSERT ON accounting_sync_synclog BEGIN '
+    'INSERT INTO accounting_sync_synclog_fts (log_id, body) VALUES (new.id, '
+    "coalesce(new.error_message, '') || ' ' || coalesce(new.entity_type, '') || ' ' || "
+    "coalesce(new.status, '') || ' ' || coalesce(new.direction, '')); END",
+    'CREATE TRIGGER IF NOT EXISTS accounting_sync_synclog_fts_au '
+    'AFTER UPDATE OF error_message, entity_type, status, direction ON accounting_sync_synclog BEGIN '
+    'DELETE FROM accounting_sync_synclog_fts WHERE log_id = old.id; '
+    'INSERT INTO accounting_sync_synclog_fts (log_id, body) VALUES (new.id, '
+    "coalesce(new.error_message, '') || ' ' || coalesce(new.entity_type, '') || ' ' || "
+    "coalesce(new.status, '') || ' ' || coalesce(new.direction, '')); END",
+    'CREATE TRIGGER IF NOT EXISTS accounting_sync_synclog_fts_ad AFTER DELETE ON accounting_sync_synclog BEGIN '
+    'DELETE FROM accounting_sync_synclog_fts WHERE log_id = old.id; END',
+    'DELETE FROM accounting_sync_synclog_fts',
+    'INSERT INTO accounting_sync_synclog_fts (log_id, body) SELECT id, '
+    "coalesce(error_message, '') || ' ' || coalesce(entity_type, '') || ' ' || "
+    "coalesce(status, '') || ' ' || coalesce(direction, '') FROM accounting_sync_synclog",
+]
+SQLITE_DROP = [
+    'DROP TRIGGER IF EXISTS accounting_sync_synclog_fts_ai',
+    'DROP TRIGGER IF EXISTS accounting_sync_synclog_fts_au',
+    'DROP TRIGGER IF EXISTS accounting_sync_synclog_fts_ad',
+    'DROP TABLE IF EXISTS accounting_sync_synclog_fts',
+]
+
+
+def _execute(schema_editor, statements):
+    with schema_editor.connection.cursor() as cursor:
+        for statement in statements:
+            cursor.execute(statement)
+
+
+def install(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        _execute(schema_editor, [PG_CREATE])
+    elif vendor == 'sqlite':
+        _execute(schema_editor, SQLITE_CREATE)
+
+
+def remove(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        _execute(schema_editor, ['DROP INDEX IF EXISTS acsync_log_search'])
+    elif vendor == 'sqlite':
+        _execute(schema_editor, SQLITE_DROP)
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction.
+    atomic = False
+
+    dependencies = [
+        ('accounting_sync', '0009_access_path_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(install, remove),
+    ]
@@ -0,0 +1,51 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounting_sync', '0010_synclog_search'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SyncRetentionPolicy',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('hub_id', models.UUIDField(unique=True)),
+                ('retention_days', models.PositiveIntegerField(default=90)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'accounting_sync_syncretentionpolicy',
+            },
+        ),
+        migrations.CreateModel(
+            name='SyncLogDailySummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('hub_id', models.UUIDField(blank=True, editable=False, null=True)),
+                ('day', models.DateField()),
+                ('entity_type', models.CharField(max_length=50)),
+                ('direction', models.CharField(max_length=10)),
+                ('logs_count', models.BigIntegerField(default=0)),
+                ('success_count', models.BigIntegerField(default=0)),
+                ('partial_count', models.BigIntegerField(default=0)),
+                ('error_count', models.BigIntegerField(default=0)),
+                ('records_synced', models.BigIntegerField(default=0)),
+                ('connection', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_summaries', to='accounting_sync.accountingconnection')),
+            ],
+            options={
+                'db_table': 'accounting_sync_synclogdailysummary',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='synclogdailysummary',
+            constraint=models.UniqueConstraint(fields=('connection', 'day', 'entity_type', 'direction'), name='accounting_sync_daily_unique'),
+        ),
+        migrations.AddIndex(
+            model_name='synclogdailysummary',
+            index=models.Index(fields=['hub_id', 'day'], name='acsync_daily_hub_day'),
+        ),
+    ]
@@ -0,0 +1,26 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounting_sync', '0011_retention'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='synclog',
+            name='progress_total',
+            field=models.PositiveIntegerField(blank=True, null=True, verbose_name='Progress Total'),
+        ),
+        migrations.AddField(
+            model_name='synclog',
+            name='progress_done',
+            field=models.PositiveIntegerField(default=0, verbose_name='Progress Done'),
+        ),
+        migrations.AddField(
+            model_name='synclog',
+            name='phase',
+            field=models.CharField(blank=True, max_length=20, verbose_name='Phase'),
+        ),
+    ]
@@ -0,0 +1,56 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounting_sync', '0012_synclog_progress'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='synclog',
+            name='attempt',
+            field=models.PositiveSmallIntegerField(default=1, verbose_name='Attempt'),
+        ),
+        migrations.AddField(
+            model_name='synclog',
+            name='retry_of',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='retries', to='accounting_sync.synclog'),
+        ),
+        migrations.AddField(
+            model_name='synclog',
+            name='retry_failed_only',
+            field=models.BooleanField(default=False, verbose_name='Retry Failed Records Only'),
+        ),
+        migrations.AddField(
+            model_name='synclog',
+            name='dead_letter',
+            field=models.BooleanField(default=False, verbose_name='Dead Letter'),
+        ),
+        migrations.CreateModel(
+            name='SyncRecordFailure',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('hub_id', models.UUIDField(blank=True, db_index=True, editable=False, null=True)),
+                ('direction', models.CharField(max_length=10, verbose_name='Direction')),
+                ('entity_type', models.CharField(max_length=50, verbose_name='Entity Type')),
+                ('record_key', models.CharField(max_length=255, verbose_name='Record')),
+                ('payload', models.JSONField(blank=True, null=True)),
+                ('content_hash', models.CharField(blank=True, max_length=64)),
+                ('error_message', models.TextField(blank=True, verbose_name='Error Message')),
+                ('attempts', models.PositiveIntegerField(default=1, verbose_name='Attempts')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('connection', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='record_failures', to='accounting_sync.accountingconnection')),
+            ],
+            options={
+                'db_table': 'accounting_sync_syncrecordfailure',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='syncrecordfailure',
+            constraint=models.UniqueConstraint(fields=('connection', 'direction', 'entity_type', 'record_key'), name='accounting_sync_failure_unique'),
+        ),
+    ]
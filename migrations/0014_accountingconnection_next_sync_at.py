@@ -0,0 +1,20 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounting_sync', '0013_retry'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='accountingconnection',
+            name='next_sync_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Next Sync At'),
+        ),
+        migrations.AddIndex(
+            model_name='accountingconnection',
+            index=models.Index(fields=['sync_enabled', 'status', 'next_sync_at'], name='acsync_conn_due'),
+        ),
+    ]
@@ -0,0 +1,36 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounting_sync', '0014_accountingconnection_next_sync_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SyncOutbox',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('hub_id', models.UUIDField(blank=True, editable=False, null=True)),
+                ('entity_type', models.CharField(max_length=50, verbose_name='Entity Type')),
+                ('local_id', models.CharField(max_length=64, verbose_name='Local ID')),
+                ('operation', models.CharField(default='upsert', max_length=10, verbose_name='Operation')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('connection', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='outbox', to='accounting_sync.accountingconnection')),
+            ],
+            options={
+                'db_table': 'accounting_sync_syncoutbox',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='syncoutbox',
+            constraint=models.UniqueConstraint(fields=('connection', 'entity_type', 'local_id'), name='accounting_sync_outbox_unique'),
+        ),
+        migrations.AddIndex(
+            model_name='syncoutbox',
+            index=models.Index(fields=['connection', 'entity_type', 'updated_at', 'id'], name='acsync_outbox_drain'),
+        ),
+    ]
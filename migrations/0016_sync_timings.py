@@ -0,0 +1,34 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounting_sync', '0015_syncoutbox'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='synclog',
+            name='timings',
+            field=models.JSONField(blank=True, default=dict, verbose_name='Phase Timings'),
+        ),
+        migrations.CreateModel(
+            name='SyncDurationStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('provider', models.CharField(max_length=30)),
+                ('phase', models.CharField(max_length=20)),
+                ('le', models.CharField(max_length=20)),
+                ('count', models.BigIntegerField(default=0)),
+                ('seconds', models.FloatField(default=0)),
+            ],
+            options={
+                'db_table': 'accounting_sync_syncdurationstats',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='syncdurationstats',
+            constraint=models.UniqueConstraint(fields=('provider', 'phase', 'le'), name='accounting_sync_duration_unique'),
+        ),
+    ]
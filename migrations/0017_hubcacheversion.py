@@ -0,0 +1,22 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounting_sync', '0016_sync_timings'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HubCacheVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('hub_id', models.UUIDField(unique=True)),
+                ('version', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'db_table': 'accounting_sync_hubcacheversion',
+            },
+        ),
+    ]
@@ -0,0 +1,39 @@
+from django.db import migrations, models
+
+
+def stagger_duplicates(apps, schema_editor):
+    # Logs queued twice before the constraint existed keep running, but as
+    # scheduled ones (next_attempt_at set), which the constraint allows.
+    SyncLog = apps.get_model('accounting_sync', 'SyncLog')
+    pending = SyncLog.objects.filter(
+        status='pending', is_deleted=False, retry_failed_only=False, next_attempt_at__isnull=True,
+    ).order_by('created_at')
+    seen = set()
+    rows = pending.values_list('id', 'connection_id', 'direction', 'entity_type', 'created_at')
+    for pk, connection_id, direction, entity_type, created_at in rows.iterator():
+        key = (connection_id, direction, entity_type)
+        if key in seen:
+            SyncLog.objects.filter(pk=pk).update(next_attempt_at=created_at)
+        seen.add(key)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounting_sync', '0017_hubcacheversion'),
+    ]
+
+    operations = [
+        migrations.RunPython(stagger_duplicates, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='synclog',
+            constraint=models.UniqueConstraint(
+                condition=models.Q(
+                    ('status', 'pending'), ('is_deleted', False), ('retry_failed_only', False),
+                    ('next_attempt_at__isnull', True),
+                ),
+                fields=('connection', 'direction', 'entity_type'),
+                name='accounting_sync_pending_unique',
+            ),
+        ),
+    ]
@@ -0,0 +1,28 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounting_sync', '0018_synclog_pending_unique'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SyncThroughputStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('provider', models.CharField(max_length=30)),
+                ('status', models.CharField(max_length=20)),
+                ('logs', models.BigIntegerField(default=0)),
+                ('records_synced', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'db_table': 'accounting_sync_syncthroughputstats',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='syncthroughputstats',
+            constraint=models.UniqueConstraint(fields=('provider', 'status'), name='accounting_sync_throughput_unique'),
+        ),
+    ]
@@ -0,0 +1,24 @@
+from django.db import migrations, models
+from django.db.models import F
+
+
+def backfill_heartbeat(apps, schema_editor):
+    # Running logs claimed before the lease existed expire from their start.
+    SyncLog = apps.get_model('accounting_sync', 'SyncLog')
+    SyncLog.objects.filter(status='running').update(heartbeat_at=F('started_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounting_sync', '0019_syncthroughputstats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='synclog',
+            name='heartbeat_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Heartbeat At'),
+        ),
+        migrations.RunPython(backfill_heartbeat, migrations.RunPython.noop),
+    ]
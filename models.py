@@ -6,14 +6,22 @@ from apps.core.models.base import HubBaseModel
 class AccountingConnection(HubBaseModel):
     provider = models.CharField(max_length=30, verbose_name=_('Provider'))
     name = models.CharField(max_length=255, verbose_name=_('Name'))
+    tenant_id = models.CharField(max_length=100, blank=True, verbose_name=_('Tenant ID'))
     status = models.CharField(max_length=20, default='disconnected', verbose_name=_('Status'))
     access_token = models.TextField(blank=True, verbose_name=_('Access Token'))
     refresh_token = models.TextField(blank=True, verbose_name=_('Refresh Token'))
+    token_expires_at = models.DateTimeField(null=True, blank=True, verbose_name=_('Token Expires At'))
     last_sync_at = models.DateTimeField(null=True, blank=True, verbose_name=_('Last Sync At'))
     sync_enabled = models.BooleanField(default=False, verbose_name=_('Sync Enabled'))
+    next_sync_at = models.DateTimeField(null=True, blank=True, verbose_name=_('Next Sync At'))
 
     class Meta(HubBaseModel.Meta):
         db_table = 'accounting_sync_accountingconnection'
+        indexes = [
+            models.Index(fields=['hub_id', 'is_deleted', 'name'], name='acsync_conn_hub_name'),
+            # Scheduler: enabled connections in due order.
+            models.Index(fields=['sync_enabled', 'status', 'next_sync_at'], name='acsync_conn_due'),
+        ]
 
     def __str__(self):
         return self.name
@@ -26,10 +34,288 @@ class SyncLog(HubBaseModel):
     records_synced = models.PositiveIntegerField(default=0, verbose_name=_('Records Synced'))
     status = models.CharField(max_length=20, default='success', verbose_name=_('Status'))
     error_message = models.TextField(blank=True, verbose_name=_('Error Message'))
+    claimed_by = models.CharField(max_length=100, blank=True, verbose_name=_('Claimed By'))
+    started_at = models.DateTimeField(null=True, blank=True, verbose_name=_('Started At'))
+    finished_at = models.DateTimeField(null=True, blank=True, verbose_name=_('Finished At'))
+    next_attempt_at = models.DateTimeField(null=True, blank=True, verbose_name=_('Next Attempt At'))
+    # Lease of a running log: refreshed by its worker, expired logs are failed on the next claim.
+    heartbeat_at = models.DateTimeField(null=True, blank=True, verbose_name=_('Heartbeat At'))
+    progress_total = models.PositiveIntegerField(null=True, blank=True, verbose_name=_('Progress Total'))
+    progress_done = models.PositiveIntegerField(default=0, verbose_name=_('Progress Done'))
+    phase = models.CharField(max_length=20, blank=True, verbose_name=_('Phase'))
+    attempt = models.PositiveSmallIntegerField(default=1, verbose_name=_('Attempt'))
+    retry_of = models.ForeignKey('self', on_delete=models.SET_NULL, null=True, blank=True, related_name='retries')
+    retry_failed_only = models.BooleanField(default=False, verbose_name=_('Retry Failed Records Only'))
+    dead_letter = models.BooleanField(default=False, verbose_name=_('Dead Letter'))
+    # {phase: {'ms': total, 'calls': n, 'count': records}}, written when the log finishes.
+    timings = models.JSONField(default=dict, blank=True, verbose_name=_('Phase Timings'))
 
     class Meta(HubBaseModel.Meta):
         db_table = 'accounting_sync_synclog'
+        indexes = [
+            # List views: hub-scoped, sorted by created_at (keyset), status or connection.
+            models.Index(fields=['hub_id', 'is_deleted', 'created_at', 'id'], name='acsync_log_hub_created'),
+            models.Index(fields=['hub_id', 'is_deleted', 'status'], name='acsync_log_hub_status'),
+            models.Index(fields=['hub_id', 'is_deleted', 'connection'], name='acsync_log_hub_conn'),
+            # AI tools and per-connection history.
+            models.Index(fields=['connection', 'status', 'created_at'], name='acsync_log_conn_status'),
+            # Worker queue: pending/running logs in claim order.
+            models.Index(fields=['status', 'is_deleted', 'created_at'], name='acsync_log_queue'),
+        ]
+        constraints = [
+            # Triggers coalesce onto a pending log; this backs that across
+            # requests. Retries and deferred logs (next_attempt_at set) are
+            # queued by the engine and may sit beside a triggered one.
+            models.UniqueConstraint(
+                fields=['connection', 'direction', 'entity_type'],
+                condition=models.Q(
+                    status='pending', is_deleted=False, retry_failed_only=False, next_attempt_at__isnull=True,
+                ),
+                name='accounting_sync_pending_unique',
+            ),
+        ]
 
     def __str__(self):
         return str(self.id)
 
+
+
+class SyncCursor(models.Model):
+    """Incremental sync watermark per (connection, entity_type, direction)."""
+    hub_id = models.UUIDField(null=True, blank=True, db_index=True, editable=False)
+    connection = models.ForeignKey('AccountingConnection', on_delete=models.CASCADE, related_name='cursors')
+    entity_type = models.CharField(max_length=50, verbose_name=_('Entity Type'))
+    direction = models.CharField(max_length=10, verbose_name=_('Direction'))
+    watermark = models.DateTimeField(null=True, blank=True, verbose_name=_('Modified Since'))
+    change_token = models.CharField(max_length=255, blank=True, verbose_name=_('Change Token'))
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'accounting_sync_synccursor'
+        constraints = [
+            models.UniqueConstraint(fields=['connection', 'entity_type', 'direction'], name='accounting_sync_cursor_unique'),
+        ]
+
+    def __str__(self):
+        return f'{self.connection_id} {self.direction} {self.entity_type}'
+
+
+class RateLimitBucket(models.Model):
+    """Token bucket shared by every worker process calling one provider tenant."""
+    key = models.CharField(max_length=200, unique=True)
+    tokens = models.FloatField(default=0)
+    refilled_at = models.DateTimeField()
+    blocked_until = models.DateTimeField(null=True, blank=True)
+    version = models.PositiveBigIntegerField(default=0)
+
+    class Meta:
+        db_table = 'accounting_sync_ratelimitbucket'
+
+    def __str__(self):
+        return self.key
+
+
+class ExternalIdMapping(models.Model):
+    """Links a Hub record to its provider record, with the hash of the last pushed payload."""
+    hub_id = models.UUIDField(null=True, blank=True, db_index=True, editable=False)
+    connection = models.ForeignKey('AccountingConnection', on_delete=models.CASCADE, related_name='mappings')
+    entity_type = models.CharField(max_length=50, verbose_name=_('Entity Type'))
+    local_id = models.CharField(max_length=64, verbose_name=_('Local ID'))
+    remote_id = models.CharField(max_length=255, verbose_name=_('Remote ID'))
+    remote_version = models.CharField(max_length=100, blank=True, verbose_name=_('Remote Version'))
+    content_hash = models.CharField(max_length=64, blank=True, verbose_name=_('Content Hash'))
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'accounting_sync_externalidmapping'
+        constraints = [
+            models.UniqueConstraint(fields=['connection', 'entity_type', 'local_id'], name='accounting_sync_mapping_local_unique'),
+        ]
+        indexes = [
+            models.Index(fields=['connection', 'entity_type', 'remote_id'], name='accounting_sync_mapping_remote'),
+        ]
+
+    def __str__(self):
+        return f'{self.entity_type} {self.local_id} -> {self.remote_id}'
+
+
+class SyncRecordFailure(models.Model):
+    """A record that failed to sync, kept with its payload until a retry succeeds."""
+    hub_id = models.UUIDField(null=True, blank=True, db_index=True, editable=False)
+    connection = models.ForeignKey('AccountingConnection', on_delete=models.CASCADE, related_name='record_failures')
+    direction = models.CharField(max_length=10, verbose_name=_('Direction'))
+    entity_type = models.CharField(max_length=50, verbose_name=_('Entity Type'))
+    # Local id for pushes, provider id for pulls.
+    record_key = models.CharField(max_length=255, verbose_name=_('Record'))
+    payload = models.JSONField(null=True, blank=True)
+    content_hash = models.CharField(max_length=64, blank=True)
+    error_message = models.TextField(blank=True, verbose_name=_('Error Message'))
+    attempts = models.PositiveIntegerField(default=1, verbose_name=_('Attempts'))
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'accounting_sync_syncrecordfailure'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['connection', 'direction', 'entity_type', 'record_key'], name='accounting_sync_failure_unique',
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.direction} {self.entity_type} {self.record_key}'
+
+
+class SyncOutbox(models.Model):
+    """A Hub record changed since it was last pushed, one row per connection and record."""
+    hub_id = models.UUIDField(null=True, blank=True, editable=False)
+    connection = models.ForeignKey('AccountingConnection', on_delete=models.CASCADE, related_name='outbox')
+    entity_type = models.CharField(max_length=50, verbose_name=_('Entity Type'))
+    local_id = models.CharField(max_length=64, verbose_name=_('Local ID'))
+    operation = models.CharField(max_length=10, default='upsert', verbose_name=_('Operation'))
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'accounting_sync_syncoutbox'
+        constraints = [
+            models.UniqueConstraint(fields=['connection', 'entity_type', 'local_id'], name='accounting_sync_outbox_unique'),
+        ]
+        indexes = [
+            # Drain order per connection and entity type.
+            models.Index(fields=['connection', 'entity_type', 'updated_at', 'id'], name='acsync_outbox_drain'),
+        ]
+
+    def __str__(self):
+        return f'{self.entity_type} {self.local_id} ({self.operation})'
+
+
+class ConnectionSyncStats(models.Model):
+    """Running totals of a connection's sync logs, maintained on every SyncLog write."""
+    hub_id = models.UUIDField(null=True, blank=True, db_index=True, editable=False)
+    connection = models.OneToOneField('AccountingConnection', on_delete=models.CASCADE, related_name='stats')
+    total_logs = models.BigIntegerField(default=0)
+    success_count = models.BigIntegerField(default=0)
+    partial_count = models.BigIntegerField(default=0)
+    error_count = models.BigIntegerField(default=0)
+    records_synced = models.BigIntegerField(default=0)
+    last_success_at = models.DateTimeField(null=True, blank=True)
+    last_error_at = models.DateTimeField(null=True, blank=True)
+    last_error_message = models.CharField(max_length=500, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'accounting_sync_connectionsyncstats'
+
+    def __str__(self):
+        return f'{self.connection_id} stats'
+
+
+class HourlySyncStats(models.Model):
+    """Finished syncs per hub and hour, for throughput cards."""
+    hub_id = models.UUIDField(null=True, blank=True, editable=False)
+    hour = models.DateTimeField()
+    logs_finished = models.BigIntegerField(default=0)
+    error_count = models.BigIntegerField(default=0)
+    records_synced = models.BigIntegerField(default=0)
+
+    class Meta:
+        db_table = 'accounting_sync_hourlysyncstats'
+        constraints = [
+            models.UniqueConstraint(fields=['hub_id', 'hour'], name='accounting_sync_hourly_unique'),
+        ]
+
+    def __str__(self):
+        return f'{self.hub_id} {self.hour:%Y-%m-%d %H:00}'
+
+
+class SyncDurationStats(models.Model):
+    """Histogram buckets of sync and phase durations per provider, for the metrics endpoint."""
+    provider = models.CharField(max_length=30)
+    # 'total' for whole syncs, otherwise a span name such as 'fetch'.
+    phase = models.CharField(max_length=20)
+    # Upper bound of the (non-cumulative) bucket in seconds, or '+Inf'.
+    le = models.CharField(max_length=20)
+    count = models.BigIntegerField(default=0)
+    seconds = models.FloatField(default=0)
+
+    class Meta:
+        db_table = 'accounting_sync_syncdurationstats'
+        constraints = [
+            models.UniqueConstraint(fields=['provider', 'phase', 'le'], name='accounting_sync_duration_unique'),
+        ]
+
+    def __str__(self):
+        return f'{self.provider} {self.phase} le={self.le}'
+
+
+class SyncThroughputStats(models.Model):
+    """Finished logs and records per provider and status; only ever incremented, for the metrics counters."""
+    provider = models.CharField(max_length=30)
+    status = models.CharField(max_length=20)
+    logs = models.BigIntegerField(default=0)
+    records_synced = models.BigIntegerField(default=0)
+
+    class Meta:
+        db_table = 'accounting_sync_syncthroughputstats'
+        constraints = [
+            models.UniqueConstraint(fields=['provider', 'status'], name='accounting_sync_throughput_unique'),
+        ]
+
+    def __str__(self):
+        return f'{self.provider} {self.status}'
+
+
+class HubCacheVersion(models.Model):
+    """Per-hub counter bumped on connection and log writes; part of every cached fragment's key."""
+    hub_id = models.UUIDField(unique=True)
+    version = models.BigIntegerField(default=0)
+
+    class Meta:
+        db_table = 'accounting_sync_hubcacheversion'
+
+    def __str__(self):
+        return f'{self.hub_id} v{self.version}'
+
+
+class SyncRetentionPolicy(models.Model):
+    """Per-hub log retention; hubs without a row use ACCOUNTING_SYNC_LOG_RETENTION_DAYS."""
+    hub_id = models.UUIDField(unique=True)
+    retention_days = models.PositiveIntegerField(default=90)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'accounting_sync_syncretentionpolicy'
+
+    def __str__(self):
+        return f'{self.hub_id}: {self.retention_days} days'
+
+
+class SyncLogDailySummary(models.Model):
+    """Purged logs rolled up per day, connection, entity type and direction."""
+    hub_id = models.UUIDField(null=True, blank=True, editable=False)
+    day = models.DateField()
+    connection = models.ForeignKey(
+        'accounting_sync.AccountingConnection', on_delete=models.CASCADE, related_name='daily_summaries',
+    )
+    entity_type = models.CharField(max_length=50)
+    direction = models.CharField(max_length=10)
+    logs_count = models.BigIntegerField(default=0)
+    success_count = models.BigIntegerField(default=0)
+    partial_count = models.BigIntegerField(default=0)
+    error_count = models.BigIntegerField(default=0)
+    records_synced = models.BigIntegerField(default=0)
+
+    class Meta:
+        db_table = 'accounting_sync_synclogdailysummary'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['connection', 'day', 'entity_type', 'direction'], name='accounting_sync_daily_unique',
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['hub_id', 'day'], name='acsync_daily_hub_day'),
+        ]
+
+    def __str__(self):
+        return f'{self.connection_id} {self.day} {self.direction} {self.entity_type}'
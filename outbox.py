@@ -0,0 +1,133 @@
+"""
+Transactional outbox of local changes for push sync.
+
+Source modules call ``track_model(Invoice, 'invoices')``. Every save or
+delete of a tracked record then upserts one ``SyncOutbox`` row per
+connection of the record's hub, inside the same transaction as the change:
+a rolled-back edit leaves no outbox row, and a committed one cannot be
+missed. Repeated edits of a record coalesce into its existing row, which
+only moves to the back of the queue.
+
+Push drains the outbox of a connection in change order with
+``iter_outbox_chunks``, so a delta sync costs O(changes) instead of
+re-reading every record modified since the watermark.
+
+Set-based writes (``QuerySet.update()``, ``bulk_create``, ``bulk_update``)
+send no signals. Callers record them with ``record_changes(entity_type,
+queryset)``; push also rescans the source periodically to catch any that
+were missed (see ``push``). Only connected connections get rows, since
+others never drain them.
+"""
+from django.db.models.signals import post_delete, post_save
+from django.utils import timezone
+
+from .models import AccountingConnection, SyncOutbox
+
+OUTBOX_CHUNK_SIZE = 500
+
+# entity_type -> model
+TRACKED_MODELS = {}
+
+
+def _connection_ids(hub_id):
+    return list(
+        AccountingConnection.objects.filter(hub_id=hub_id, status='connected', is_deleted=False)
+        .values_list('id', flat=True)
+    )
+
+
+def _upsert_rows(hub_id, entity_type, local_ids, operation):
+    rows = [
+        SyncOutbox(hub_id=hub_id, connection_id=connection_id, entity_type=entity_type,
+                   local_id=str(local_id), operation=operation)
+        for connection_id in _connection_ids(hub_id)
+        for local_id in local_ids
+    ]
+    if rows:
+        SyncOutbox.objects.bulk_create(
+            rows,
+            batch_size=OUTBOX_CHUNK_SIZE,
+            update_conflicts=True,
+            unique_fields=['connection', 'entity_type', 'local_id'],
+            update_fields=['operation', 'updated_at'],
+        )
+    return len(rows)
+
+
+def record_change(hub_id, entity_type, local_id, operation='upsert'):
+    """Mark ``local_id`` dirty for every connected connection of ``hub_id``."""
+    if hub_id is None:
+        return 0
+    return _upsert_rows(hub_id, entity_type, [local_id], operation)
+
+
+def record_changes(entity_type, queryset, operation='upsert', hub_field='hub_id'):
+    """
+    Mark every record in ``queryset`` dirty, for writes that send no signals.
+
+    Call it in the same transaction as the ``update()`` / ``bulk_create`` /
+    ``bulk_update``, after the write.
+    """
+    per_hub = {}
+    for hub_id, pk in queryset.order_by().values_list(hub_field, 'pk').iterator():
+        if hub_id is not None:
+            per_hub.setdefault(hub_id, []).append(pk)
+    return sum(
+        _upsert_rows(hub_id, entity_type, local_ids[i:i + OUTBOX_CHUNK_SIZE], operation)
+        for hub_id, local_ids in per_hub.items()
+        for i in range(0, len(local_ids), OUTBOX_CHUNK_SIZE)
+    )
+
+
+def _dispatch_uid(entity_type, signal_name):
+    return f'accounting_sync_outbox:{entity_type}:{signal_name}'
+
+
+def track_model(model, entity_type, hub_field='hub_id'):
+    """Record saves and deletes of ``model`` instances in the outbox as ``entity_type`` changes."""
+    def on_save(sender, instance, **kwargs):
+        operation = 'delete' if getattr(instance, 'is_deleted', False) else 'upsert'
+        record_change(getattr(instance, hub_field), entity_type, instance.pk, operation)
+
+    def on_delete(sender, instance, **kwargs):
+        record_change(getattr(instance, hub_field), entity_type, instance.pk, 'delete')
+
+    TRACKED_MODELS[entity_type] = model
+    post_save.connect(on_save, sender=model, weak=False, dispatch_uid=_dispatch_uid(entity_type, 'save'))
+    post_delete.connect(on_delete, sender=model, weak=False, dispatch_uid=_dispatch_uid(entity_type, 'delete'))
+
+
+def untrack_model(entity_type):
+    model = TRACKED_MODELS.pop(entity_type, None)
+    if model is not None:
+        post_save.disconnect(sender=model, dispatch_uid=_dispatch_uid(entity_type, 'save'))
+        post_delete.disconnect(sender=model, dispatch_uid=_dispatch_uid(entity_type, 'delete'))
+
+
+def iter_outbox_chunks(connection, entity_type, chunk_size=OUTBOX_CHUNK_SIZE):
+    """
+    Yield ``[(local_id, operation), ...]`` chunks of dirty records, oldest change first.
+
+    A chunk is acknowledged (deleted) when the caller asks for the next one,
+    so the caller must have pushed it by then; if the sync fails, the chunk
+    stays queued. Rows edited again after they were read are kept for the
+    next sync, as are changes made after the drain started.
+    """
+    qs = SyncOutbox.objects.filter(
+        connection=connection, entity_type=entity_type, updated_at__lte=timezone.now(),
+    ).order_by('updated_at', 'id')
+    while True:
+        read_at = timezone.now()
+        rows = list(qs.values_list('id', 'local_id', 'operation')[:chunk_size])
+        if not rows:
+            return
+        yield [(local_id, operation) for _, local_id, operation in rows]
+        SyncOutbox.objects.filter(id__in=[row[0] for row in rows], updated_at__lte=read_at).delete()
+
+
+def discard_changes(connection, entity_type, before):
+    """Drop outbox rows covered by a full push that started at ``before``."""
+    deleted, _ = SyncOutbox.objects.filter(
+        connection=connection, entity_type=entity_type, updated_at__lte=before,
+    ).delete()
+    return deleted
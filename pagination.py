@@ -0,0 +1,125 @@
+"""
+Keyset (cursor) pagination.
+
+Pages are addressed by the ``(created_at, id)`` of their boundary rows
+instead of an OFFSET, so page 10,000 costs the same index range scan as
+page 1. Totals are estimated: exact while small, planner estimate beyond.
+"""
+import base64
+import json
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import List, Optional
+
+from django.db import connection as db_connection
+from django.db.models import Q
+
+EXACT_COUNT_LIMIT = 1000
+
+
+def encode_cursor(values):
+    raw = json.dumps([v.isoformat() if isinstance(v, datetime) else str(v) for v in values])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Return ``(datetime, id)`` for a cursor string, or None if it is malformed."""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        created_at, pk = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(created_at), pk
+    except (ValueError, TypeError, json.JSONDecodeError):
+        return None
+
+
+def estimate_count(queryset, exact_limit=EXACT_COUNT_LIMIT):
+    """
+    Return ``(count, is_exact)``.
+
+    Counts exactly up to ``exact_limit`` rows with a bounded subquery. Past
+    that, PostgreSQL's planner estimate is used; other backends report the
+    limit as a lower bound.
+    """
+    bounded = queryset.order_by()[:exact_limit + 1].count()
+    if bounded <= exact_limit:
+        return bounded, True
+    if db_connection.vendor == 'postgresql':
+        sql, params = queryset.order_by().values('pk').query.sql_with_params()
+        with db_connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+            plan = cursor.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return max(int(plan[0]['Plan']['Plan Rows']), bounded), False
+    return exact_limit, False
+
+
+@dataclass
+class KeysetPage:
+    object_list: List
+    per_page: int
+    next_cursor: Optional[str] = None
+    previous_cursor: Optional[str] = None
+    estimated_total: int = 0
+    total_is_exact: bool = True
+    is_keyset: bool = field(default=True, init=False)
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __bool__(self):
+        return bool(self.object_list)
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+
+class KeysetPaginator:
+    """Paginate ``queryset`` by ``(created_at, id)`` in either direction."""
+
+    def __init__(self, queryset, per_page, descending=True):
+        self.queryset = queryset
+        self.per_page = per_page
+        self.descending = descending
+
+    def _ordering(self, descending):
+        return ('-created_at', '-id') if descending else ('created_at', 'id')
+
+    def _after(self, key, descending):
+        created_at, pk = key
+        if descending:
+            return Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk)
+        return Q(created_at__gt=created_at) | Q(created_at=created_at, id__gt=pk)
+
+    def get_page(self, cursor=None, direction='next'):
+        key = decode_cursor(cursor) if cursor else None
+        backwards = key is not None and direction == 'prev'
+        descending = self.descending != backwards
+        qs = self.queryset.order_by(*self._ordering(descending))
+        if key is not None:
+            qs = qs.filter(self._after(key, descending))
+        rows = list(qs[:self.per_page + 1])
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if backwards:
+            rows.reverse()
+            has_next, has_previous = True, has_more
+        else:
+            has_next, has_previous = has_more, key is not None
+        total, exact = estimate_count(self.queryset)
+        return KeysetPage(
+            object_list=rows,
+            per_page=self.per_page,
+            next_cursor=encode_cursor((rows[-1].created_at, rows[-1].id)) if rows and has_next else None,
+            previous_cursor=encode_cursor((rows[0].created_at, rows[0].id)) if rows and has_previous else None,
+            estimated_total=total,
+            total_is_exact=exact,
+        )
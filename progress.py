@@ -0,0 +1,207 @@
+"""
+Live sync progress.
+
+Handlers report progress through the log's ``ProgressReporter``
+(``get_progress(log)``). It keeps counters in memory and writes them to the
+log at most once per ``ACCOUNTING_SYNC_PROGRESS_INTERVAL`` seconds (default
+1), so a sync that pushes thousands of small batches costs a handful of
+UPDATEs. Phase changes are written immediately.
+
+``progress_events`` feeds the server-sent-events endpoint. Every open
+stream of a hub reads the same ``HubSnapshots`` entry, which queries the
+hub's active logs at most once per ``ACCOUNTING_SYNC_PROGRESS_SNAPSHOT_TTL``
+seconds (default 1), so the database load does not grow with the number of
+open tabs. A stream sends an event only for rows whose progress changed.
+
+Each open stream holds a server thread (or task) for up to its lifetime.
+Serve the endpoint from an async or threaded server (ASGI, gunicorn with
+``gthread``/``gevent`` workers); on a sync worker pool a few open pages can
+take every worker.
+"""
+import json
+import threading
+import time
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import SyncLog
+
+DEFAULT_PROGRESS_INTERVAL = 1.0
+DEFAULT_SNAPSHOT_TTL = 1.0
+# Final states of finished logs stay readable this long, so a stream that
+# ticks just after another stream's refresh still sees them.
+FINISHED_RETENTION = 60.0
+ACTIVE_STATUSES = ('pending', 'running')
+SNAPSHOT_FIELDS = ('id', 'status', 'phase', 'progress_done', 'progress_total', 'records_synced')
+
+
+class ProgressReporter:
+    """Throttled writer for a running log's ``phase`` / ``progress_*`` / ``records_synced``."""
+
+    def __init__(self, log, interval=None, clock=time.monotonic):
+        self.log = log
+        self.interval = interval if interval is not None else getattr(
+            settings, 'ACCOUNTING_SYNC_PROGRESS_INTERVAL', DEFAULT_PROGRESS_INTERVAL,
+        )
+        self.clock = clock
+        self.phase = log.phase
+        self.total = log.progress_total
+        self.done = log.progress_done or 0
+        self.records_synced = log.records_synced or 0
+        self.writes = 0
+        self._last_write = None
+        self._dirty = False
+
+    def set_phase(self, phase, total=None):
+        self.phase = phase
+        if total is not None:
+            self.total = total
+        self.flush()
+
+    def set_total(self, total):
+        self.total = total
+        self._changed()
+
+    def advance(self, done=1, synced=0):
+        """Count ``done`` processed records, ``synced`` of them accepted."""
+        self.done += done
+        self.records_synced += synced
+        self._changed()
+
+    def _changed(self):
+        self._dirty = True
+        if self._last_write is None or self.clock() - self._last_write >= self.interval:
+            self.flush()
+
+    def flush(self):
+        now = timezone.now()
+        SyncLog.objects.filter(pk=self.log.pk).update(
+            phase=self.phase,
+            progress_total=self.total,
+            progress_done=self.done,
+            records_synced=self.records_synced,
+            heartbeat_at=now,
+            updated_at=now,
+        )
+        self.log.phase, self.log.progress_total, self.log.progress_done = self.phase, self.total, self.done
+        self._last_write = self.clock()
+        self._dirty = False
+        self.writes += 1
+
+    def close(self):
+        if self._dirty:
+            self.flush()
+
+
+def get_progress(log):
+    """Return the log's reporter, creating it on first use."""
+    reporter = getattr(log, '_progress', None)
+    if reporter is None:
+        reporter = log._progress = ProgressReporter(log)
+    return reporter
+
+
+def snapshot(row):
+    total = row['progress_total']
+    return {
+        'id': str(row['id']),
+        'status': row['status'],
+        'phase': row['phase'],
+        'done': row['progress_done'],
+        'total': total,
+        'records_synced': row['records_synced'],
+        'percent': min(100, round(100 * row['progress_done'] / total)) if total else None,
+    }
+
+
+def format_event(event, data):
+    return f'event: {event}\ndata: {json.dumps(data)}\n\n'
+
+
+class HubSnapshots:
+    """
+    Process-wide snapshots of each hub's active logs, shared by its streams.
+
+    ``get(hub_id)`` returns ``(active, finished)``: snapshots of the hub's
+    pending and running logs, and of logs that stopped being active in the
+    last ``FINISHED_RETENTION`` seconds, both keyed by log id. The hub is
+    queried again only when its snapshot is older than ``ttl``.
+    """
+
+    def __init__(self, ttl=None, clock=time.monotonic):
+        self.ttl = ttl if ttl is not None else getattr(
+            settings, 'ACCOUNTING_SYNC_PROGRESS_SNAPSHOT_TTL', DEFAULT_SNAPSHOT_TTL,
+        )
+        self.clock = clock
+        self.refreshes = 0
+        self._hubs = {}
+        self._lock = threading.Lock()
+
+    def get(self, hub_id):
+        with self._lock:
+            entry = self._hubs.setdefault(hub_id, {'lock': threading.Lock(), 'at': None, 'active': {}, 'finished': {}})
+        with entry['lock']:
+            now = self.clock()
+            if entry['at'] is None or now - entry['at'] >= self.ttl:
+                self._refresh(hub_id, entry, now)
+            return entry['active'], {log_id: data for log_id, (_, data) in entry['finished'].items()}
+
+    def _refresh(self, hub_id, entry, now):
+        rows = (
+            SyncLog.objects.filter(hub_id=hub_id, is_deleted=False, status__in=ACTIVE_STATUSES)
+            .order_by().values(*SNAPSHOT_FIELDS)
+        )
+        active = {data['id']: data for data in map(snapshot, rows)}
+        gone = set(entry['active']) - set(active)
+        finished = {
+            log_id: item for log_id, item in entry['finished'].items()
+            if now - item[0] < FINISHED_RETENTION and log_id not in active
+        }
+        if gone:
+            for row in SyncLog.objects.filter(id__in=gone).order_by().values(*SNAPSHOT_FIELDS):
+                data = snapshot(row)
+                finished[data['id']] = (now, data)
+        entry.update(at=now, active=active, finished=finished)
+        self.refreshes += 1
+
+    def clear(self):
+        with self._lock:
+            self._hubs.clear()
+
+
+hub_snapshots = HubSnapshots()
+
+
+def progress_events(hub_id, interval=2.0, lifetime=300.0, heartbeat=15.0, clock=time.monotonic, sleep=time.sleep,
+                    snapshots=None):
+    """
+    Yield SSE messages for the hub's active logs until ``lifetime`` elapses.
+
+    Each tick reads the hub's shared snapshot and emits a ``progress`` event
+    per changed row, including the final state of logs this stream saw
+    active. Browsers reconnect automatically after the stream ends, which
+    bounds how long a request holds a worker.
+    """
+    snapshots = snapshots or hub_snapshots
+    yield f'retry: {int(interval * 1000)}\n\n'
+    sent = {}
+    started = last_message = clock()
+    while True:
+        active, finished = snapshots.get(hub_id)
+        changed = [data for log_id, data in active.items() if sent.get(log_id) != data]
+        # Only logs this stream showed as active; their final state is sent once.
+        changed += [data for log_id, data in finished.items() if log_id in sent and log_id not in active]
+        for data in changed:
+            sent[data['id']] = data
+            last_message = clock()
+            yield format_event('progress', data)
+        for log_id in set(sent) - set(active):
+            del sent[log_id]
+        now = clock()
+        if now - started >= lifetime:
+            return
+        if now - last_message >= heartbeat:
+            last_message = now
+            yield ': ping\n\n'
+        sleep(interval)
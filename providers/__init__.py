@@ -0,0 +1,25 @@
+"""Accounting provider adapters (Xero, QuickBooks, Sage)."""
+from .base import (
+    PROVIDERS,
+    BatchItemResult,
+    ProviderAdapter,
+    ProviderError,
+    UnknownProviderError,
+    close_sessions,
+    get_adapter,
+    get_session,
+    register_provider,
+)
+from . import quickbooks, sage, xero  # noqa: F401  (register adapters)
+
+__all__ = [
+    'PROVIDERS',
+    'BatchItemResult',
+    'ProviderAdapter',
+    'ProviderError',
+    'UnknownProviderError',
+    'close_sessions',
+    'get_adapter',
+    'get_session',
+    'register_provider',
+]
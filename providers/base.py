@@ -0,0 +1,260 @@
+"""
+Base provider adapter and pooled HTTP sessions.
+
+Every adapter talks to its provider through a ``requests.Session`` shared by
+all connections of that provider host inside the worker process, so TLS
+handshakes and TCP connections are reused across thousands of small calls.
+"""
+import threading
+from dataclasses import dataclass
+from typing import Any
+from urllib.parse import urlsplit
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+
+from ..prefetch import get_prefetch_window, iter_pages
+from ..ratelimit import RateLimited, RateLimiter, parse_retry_after
+from ..tokens import get_access_token, refresh_access_token
+
+DEFAULT_TIMEOUT = 30
+POOL_MAXSIZE = 32
+
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+
+@dataclass
+class BatchItemResult:
+    """Outcome of one record inside a batch request."""
+    ok: bool
+    remote: Any = None
+    error: str = ''
+
+
+class ProviderError(Exception):
+    """Raised when a provider API call fails."""
+
+    def __init__(self, message, status_code=None, response=None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.response = response
+
+
+class UnknownProviderError(ProviderError):
+    """Raised when a connection's provider has no registered adapter; retrying cannot help."""
+
+
+def get_session(base_url):
+    """Return the keep-alive session shared by every adapter for ``base_url``'s host."""
+    parts = urlsplit(base_url)
+    key = f'{parts.scheme}://{parts.netloc}'
+    session = _sessions.get(key)
+    if session is not None:
+        return session
+    with _sessions_lock:
+        session = _sessions.get(key)
+        if session is None:
+            pool_maxsize = getattr(settings, 'ACCOUNTING_SYNC_HTTP_POOL_MAXSIZE', POOL_MAXSIZE)
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_maxsize, max_retries=0)
+            session = requests.Session()
+            session.mount(key, adapter)
+            session.headers.update({'Accept': 'application/json', 'Connection': 'keep-alive'})
+            _sessions[key] = session
+    return session
+
+
+def close_sessions():
+    """Close every pooled session (worker shutdown, tests)."""
+    with _sessions_lock:
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
+
+
+class ProviderAdapter:
+    """
+    Talks to one accounting provider on behalf of one ``AccountingConnection``.
+
+    Subclasses set ``name``/``base_url`` and map entity types to endpoints.
+    ``ACCOUNTING_SYNC_PROVIDER_URLS`` may override ``base_url`` per provider
+    (used to point adapters at the fake provider in tests).
+    """
+
+    name = ''
+    base_url = ''
+    token_url = ''
+    page_size = 100
+    max_batch_size = 1
+    # Pages fetched ahead during pulls; overridable via ACCOUNTING_SYNC_PULL_PREFETCH.
+    prefetch_window = 4
+    entity_endpoints = {}
+    # Field holding the provider's record id / version in API payloads.
+    remote_id_field = 'id'
+    remote_version_field = ''
+    # (capacity, period_seconds) pairs; overridable via ACCOUNTING_SYNC_RATE_LIMITS.
+    rate_limits = []
+
+    def __init__(self, connection):
+        self.connection = connection
+        self._rate_limiter = None
+
+    # -- Rate limiting -------------------------------------------------
+
+    def get_rate_limit_key(self):
+        return f'{self.name}:{self.connection.tenant_id or self.connection.pk}'
+
+    @property
+    def rate_limiter(self):
+        if self._rate_limiter is None:
+            overrides = getattr(settings, 'ACCOUNTING_SYNC_RATE_LIMITS', {})
+            limits = overrides.get(self.name, self.rate_limits)
+            self._rate_limiter = RateLimiter(self.get_rate_limit_key(), limits)
+        return self._rate_limiter
+
+    # -- HTTP ----------------------------------------------------------
+
+    def get_base_url(self):
+        overrides = getattr(settings, 'ACCOUNTING_SYNC_PROVIDER_URLS', {})
+        return overrides.get(self.name, self.base_url).rstrip('/')
+
+    @property
+    def session(self):
+        return get_session(self.get_base_url())
+
+    def get_headers(self):
+        return {'Authorization': f'Bearer {get_access_token(self)}'}
+
+    def request(self, method, path, **kwargs):
+        extra_headers = kwargs.pop('headers', {})
+        kwargs.setdefault('timeout', DEFAULT_TIMEOUT)
+        url = f'{self.get_base_url()}/{path.lstrip("/")}'
+        for attempt in range(2):
+            headers = {**self.get_headers(), **extra_headers}
+            self.rate_limiter.acquire()
+            try:
+                response = self.session.request(method, url, headers=headers, **kwargs)
+            except requests.RequestException as exc:
+                raise ProviderError(f'{self.name} {method} {path}: {exc}') from exc
+            if response.status_code != 401 or attempt:
+                break
+            # The token was revoked or expired early: refresh once and retry.
+            refresh_access_token(self, stale_token=self.connection.access_token)
+        if response.status_code == 429:
+            seconds = parse_retry_after(response.headers.get('Retry-After'))
+            raise RateLimited(self.rate_limiter.block(seconds), key=self.rate_limiter.key)
+        if response.status_code >= 400:
+            raise ProviderError(
+                f'{self.name} {method} {path}: HTTP {response.status_code}',
+                status_code=response.status_code, response=response,
+            )
+        return response.json() if response.content else {}
+
+    # -- OAuth ---------------------------------------------------------
+
+    def get_token_url(self):
+        overrides = getattr(settings, 'ACCOUNTING_SYNC_TOKEN_URLS', {})
+        return overrides.get(self.name, self.token_url)
+
+    def refresh_tokens(self, refresh_token):
+        """Exchange ``refresh_token`` and return the provider's token response."""
+        client = getattr(settings, 'ACCOUNTING_SYNC_OAUTH_CLIENTS', {}).get(self.name, {})
+        url = self.get_token_url()
+        try:
+            response = get_session(url).post(
+                url,
+                data={'grant_type': 'refresh_token', 'refresh_token': refresh_token},
+                auth=(client.get('client_id', ''), client.get('client_secret', '')),
+                timeout=DEFAULT_TIMEOUT,
+            )
+        except requests.RequestException as exc:
+            raise ProviderError(f'{self.name} token refresh: {exc}') from exc
+        if response.status_code >= 400:
+            raise ProviderError(
+                f'{self.name} token refresh: HTTP {response.status_code}',
+                status_code=response.status_code, response=response,
+            )
+        return response.json()
+
+    # -- Entities ------------------------------------------------------
+
+    def get_endpoint(self, entity_type):
+        try:
+            return self.entity_endpoints[entity_type]
+        except KeyError:
+            raise ProviderError(f'{self.name} does not support entity type {entity_type!r}')
+
+    def get_remote_id_field(self, entity_type):
+        return self.remote_id_field
+
+    def get_remote_id(self, entity_type, remote):
+        return str((remote or {}).get(self.get_remote_id_field(entity_type)) or '')
+
+    def get_remote_version(self, entity_type, remote):
+        if not self.remote_version_field:
+            return ''
+        return str((remote or {}).get(self.remote_version_field) or '')
+
+    def apply_remote_id(self, entity_type, payload, remote_id, remote_version=''):
+        """Return ``payload`` addressed to an existing provider record."""
+        return {**payload, self.get_remote_id_field(entity_type): remote_id}
+
+    def fetch_page(self, entity_type, page=1, modified_since=None):
+        """Return ``(records, has_more)`` for one page of ``entity_type``."""
+        raise NotImplementedError
+
+    def iter_records(self, entity_type, modified_since=None, window=None):
+        """
+        Yield every ``entity_type`` record modified since ``modified_since``.
+
+        Pages are fetched as the caller consumes records, at most ``window``
+        pages ahead (``prefetch_window`` by default), so memory is bounded by
+        the window rather than the number of records.
+        """
+        if window is None:
+            window = get_prefetch_window(self)
+        for records in iter_pages(self, entity_type, modified_since=modified_since, window=window):
+            yield from records
+
+    def push_record(self, entity_type, payload):
+        """Create or update one record and return the provider's representation."""
+        raise NotImplementedError
+
+    def push_batch(self, entity_type, payloads):
+        """
+        Push up to ``max_batch_size`` records and return one
+        ``BatchItemResult`` per payload, in order.
+
+        Providers without a batch endpoint fall back to one call per record.
+        """
+        results = []
+        for payload in payloads:
+            try:
+                results.append(BatchItemResult(ok=True, remote=self.push_record(entity_type, payload)))
+            except ProviderError as exc:
+                if exc.status_code is None or exc.status_code >= 500:
+                    raise
+                results.append(BatchItemResult(ok=False, error=str(exc)))
+        return results
+
+
+# ======================================================================
+# Registry
+# ======================================================================
+
+PROVIDERS = {}
+
+
+def register_provider(cls):
+    """Class decorator registering an adapter under its ``name``."""
+    PROVIDERS[cls.name] = cls
+    return cls
+
+
+def get_adapter(connection):
+    """Return an adapter instance for ``connection.provider``."""
+    cls = PROVIDERS.get((connection.provider or '').strip().lower())
+    if cls is None:
+        raise UnknownProviderError(f'Unknown accounting provider {connection.provider!r}')
+    return cls(connection)
@@ -0,0 +1,63 @@
+"""QuickBooks Online accounting API adapter."""
+from .base import BatchItemResult, ProviderAdapter, register_provider
+
+
+@register_provider
+class QuickBooksAdapter(ProviderAdapter):
+    name = 'quickbooks'
+    base_url = 'https://quickbooks.api.intuit.com/v3/company'
+    token_url = 'https://oauth.platform.intuit.com/oauth2/v1/tokens/bearer'
+    page_size = 1000
+    max_batch_size = 30
+    # 500 requests/minute per realm.
+    rate_limits = [(500, 60)]
+    entity_endpoints = {
+        'invoices': 'Invoice',
+        'payments': 'Payment',
+        'customers': 'Customer',
+    }
+    remote_id_field = 'Id'
+    remote_version_field = 'SyncToken'
+
+    @property
+    def realm_id(self):
+        return self.connection.tenant_id
+
+    def apply_remote_id(self, entity_type, payload, remote_id, remote_version=''):
+        # QuickBooks updates need the current SyncToken; sparse keeps unsent fields.
+        return {**payload, 'Id': remote_id, 'SyncToken': remote_version or '0', 'sparse': True}
+
+    def fetch_page(self, entity_type, page=1, modified_since=None):
+        entity = self.get_endpoint(entity_type)
+        query = f'select * from {entity}'
+        if modified_since:
+            query += f" where MetaData.LastUpdatedTime > '{modified_since.isoformat()}'"
+        query += f' startposition {(page - 1) * self.page_size + 1} maxresults {self.page_size}'
+        data = self.request('GET', f'{self.realm_id}/query', params={'query': query})
+        records = data.get('QueryResponse', {}).get(entity, [])
+        return records, len(records) >= self.page_size
+
+    def push_record(self, entity_type, payload):
+        entity = self.get_endpoint(entity_type)
+        data = self.request('POST', f'{self.realm_id}/{entity.lower()}', json=payload)
+        return data.get(entity, {})
+
+    def push_batch(self, entity_type, payloads):
+        entity = self.get_endpoint(entity_type)
+        items = [
+            {'bId': str(i), 'operation': 'update' if payload.get('Id') else 'create', entity: payload}
+            for i, payload in enumerate(payloads)
+        ]
+        data = self.request('POST', f'{self.realm_id}/batch', json={'BatchItemRequest': items})
+        responses = {r.get('bId'): r for r in data.get('BatchItemResponse', [])}
+        results = []
+        for item in items:
+            response = responses.get(item['bId'], {})
+            fault = response.get('Fault')
+            if fault or entity not in response:
+                errors = (fault or {}).get('Error', [])
+                message = '; '.join(e.get('Message', '') for e in errors) or 'Missing batch response'
+                results.append(BatchItemResult(ok=False, error=message))
+            else:
+                results.append(BatchItemResult(ok=True, remote=response[entity]))
+        return results
@@ -0,0 +1,36 @@
+"""Sage Business Cloud Accounting API adapter."""
+from .base import ProviderAdapter, register_provider
+
+
+@register_provider
+class SageAdapter(ProviderAdapter):
+    name = 'sage'
+    base_url = 'https://api.accounting.sage.com/v3.1'
+    token_url = 'https://oauth.accounting.sage.com/token'
+    page_size = 200
+    rate_limits = [(100, 60)]
+    entity_endpoints = {
+        'invoices': 'sales_invoices',
+        'payments': 'contact_payments',
+        'customers': 'contacts',
+    }
+    entity_keys = {
+        'invoices': 'sales_invoice',
+        'payments': 'contact_payment',
+        'customers': 'contact',
+    }
+
+    def fetch_page(self, entity_type, page=1, modified_since=None):
+        endpoint = self.get_endpoint(entity_type)
+        params = {'page': page, 'items_per_page': self.page_size}
+        if modified_since:
+            params['updated_or_created_since'] = modified_since.isoformat()
+        data = self.request('GET', endpoint, params=params)
+        return data.get('$items', []), bool(data.get('$next'))
+
+    def push_record(self, entity_type, payload):
+        endpoint = self.get_endpoint(entity_type)
+        body = {self.entity_keys[entity_type]: payload}
+        if payload.get('id'):
+            return self.request('PUT', f'{endpoint}/{payload["id"]}', json=body)
+        return self.request('POST', endpoint, json=body)
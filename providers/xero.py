@@ -0,0 +1,61 @@
+"""Xero accounting API adapter."""
+from django.utils.http import http_date
+
+from .base import BatchItemResult, ProviderAdapter, register_provider
+
+
+@register_provider
+class XeroAdapter(ProviderAdapter):
+    name = 'xero'
+    base_url = 'https://api.xero.com/api.xro/2.0'
+    token_url = 'https://identity.xero.com/connect/token'
+    page_size = 100
+    max_batch_size = 50
+    # 60 calls/minute and 5,000 calls/day per tenant.
+    rate_limits = [(60, 60), (5000, 86400)]
+    entity_endpoints = {
+        'invoices': 'Invoices',
+        'payments': 'Payments',
+        'customers': 'Contacts',
+    }
+    remote_id_fields = {
+        'invoices': 'InvoiceID',
+        'payments': 'PaymentID',
+        'customers': 'ContactID',
+    }
+    remote_version_field = 'UpdatedDateUTC'
+
+    def get_headers(self):
+        headers = super().get_headers()
+        headers['xero-tenant-id'] = self.connection.tenant_id
+        return headers
+
+    def get_remote_id_field(self, entity_type):
+        return self.remote_id_fields.get(entity_type, self.remote_id_field)
+
+    def fetch_page(self, entity_type, page=1, modified_since=None):
+        endpoint = self.get_endpoint(entity_type)
+        headers = {}
+        if modified_since:
+            headers['If-Modified-Since'] = http_date(modified_since.timestamp())
+        data = self.request('GET', endpoint, params={'page': page}, headers=headers)
+        records = data.get(endpoint, [])
+        return records, len(records) >= self.page_size
+
+    def push_record(self, entity_type, payload):
+        endpoint = self.get_endpoint(entity_type)
+        data = self.request('POST', endpoint, json={endpoint: [payload]})
+        return (data.get(endpoint) or [{}])[0]
+
+    def push_batch(self, entity_type, payloads):
+        endpoint = self.get_endpoint(entity_type)
+        data = self.request('POST', endpoint, params={'summarizeErrors': 'false'}, json={endpoint: list(payloads)})
+        results = []
+        for item in data.get(endpoint, []):
+            errors = item.get('ValidationErrors') or []
+            if item.get('HasErrors') or errors:
+                message = '; '.join(e.get('Message', '') for e in errors) or 'Validation error'
+                results.append(BatchItemResult(ok=False, remote=item, error=message))
+            else:
+                results.append(BatchItemResult(ok=True, remote=item))
+        return results
@@ -0,0 +1,179 @@
+"""
+Pull sync: accounting provider → Hub records.
+
+Target modules (invoicing, customers, ...) register a pull target per entity
+type: the model to write, its unique key and a transform turning one
+provider record into an unsaved model instance. The pull handler streams
+provider pages through ``adapter.iter_records``, transforms them in chunks
+of ``PULL_CHUNK_SIZE`` and upserts each chunk with one
+``bulk_create(update_conflicts=True)``, so memory is bounded by the chunk
+size however many records the provider returns. Records the transform
+rejects are stored for retry with the provider payload, and a
+``retry_failed_only`` log transforms just those again without fetching.
+"""
+from dataclasses import dataclass
+from itertools import islice
+from typing import Any, Callable, Tuple
+
+from django.core.exceptions import ValidationError
+
+from .batching import MAX_ERROR_MESSAGES
+from .cursors import get_cursor
+from .engine import SyncError, SyncResult, register_sync_handler
+from .progress import get_progress
+from .providers import get_adapter
+from .retry import clear_failures, has_failures, iter_failures, record_failures
+from .tracing import span
+
+PULL_CHUNK_SIZE = 1000
+# Raised by transforms for records they cannot map: counted as failed, the pull goes on.
+TRANSFORM_ERRORS = (KeyError, TypeError, ValueError, ValidationError)
+
+# entity_type -> PullTarget
+PULL_TARGETS = {}
+
+
+@dataclass
+class PullTarget:
+    model: Any
+    # callable(connection, remote) -> unsaved model instance, or None to skip the record
+    transform: Callable
+    # Must match a unique constraint on ``model``.
+    unique_fields: Tuple[str, ...]
+    update_fields: Tuple[str, ...]
+
+    def get_key(self, obj):
+        return tuple(obj.serializable_value(field) for field in self.unique_fields)
+
+
+def register_pull_target(entity_type, model, unique_fields, update_fields):
+    """Register the transform that maps provider records of ``entity_type`` onto ``model``."""
+    def decorator(func):
+        PULL_TARGETS[entity_type] = PullTarget(model, func, tuple(unique_fields), tuple(update_fields))
+        return func
+    return decorator
+
+
+def iter_chunks(iterable, size):
+    """Yield lists of at most ``size`` items without materializing ``iterable``."""
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def upsert_chunk(target, objs):
+    """Insert or update ``objs`` in one statement and return the number of rows written."""
+    # A row may appear twice when the provider's pages shift during the pull;
+    # one upsert cannot touch the same key twice, so the last copy wins.
+    rows = {target.get_key(obj): obj for obj in objs}
+    target.model.objects.bulk_create(
+        list(rows.values()),
+        update_conflicts=True,
+        unique_fields=list(target.unique_fields),
+        update_fields=list(target.update_fields),
+    )
+    return len(rows)
+
+
+class ChunkedPuller:
+    """
+    Streams provider records into pull targets chunk by chunk.
+
+    Call ``pull()`` per entity type and ``close()`` to get the ``SyncResult``.
+    Every written chunk is reported to the log's ``ProgressReporter``.
+    """
+
+    def __init__(self, log, adapter, chunk_size=PULL_CHUNK_SIZE):
+        self.log = log
+        self.adapter = adapter
+        self.chunk_size = max(1, chunk_size)
+        self.result = SyncResult(failures_tracked=True)
+        self.errors = []
+        self.chunks_written = 0
+        # Skip the per-chunk DELETE while the connection has nothing to clear.
+        self.clear_failures = has_failures(log.connection, 'pull')
+
+    def pull(self, entity_type, modified_since=None):
+        records = self.adapter.iter_records(entity_type, modified_since=modified_since)
+        self._write(entity_type, records)
+
+    def pull_failed(self, entity_type):
+        """Transform the stored payloads of records that failed before."""
+        self._write(entity_type, (f.payload for f in iter_failures(self.log.connection, 'pull', entity_type)))
+
+    def close(self):
+        get_progress(self.log).close()
+        if self.errors:
+            self.result.error_message = '\n'.join(self.errors)
+        return self.result
+
+    # -- Internals -----------------------------------------------------
+
+    def _write(self, entity_type, records):
+        target = PULL_TARGETS[entity_type]
+        for chunk in iter_chunks(records, self.chunk_size):
+            with span('transform', count=len(chunk)):
+                objs, done_keys = self._transform(target, entity_type, chunk)
+            with span('db_write', count=len(objs)):
+                if objs:
+                    upsert_chunk(target, objs)
+                    self.chunks_written += 1
+                if self.clear_failures:
+                    clear_failures(self.log.connection, 'pull', entity_type, done_keys)
+            self.result.records_synced += len(objs)
+            get_progress(self.log).advance(done=len(chunk), synced=len(objs))
+
+    def _transform(self, target, entity_type, chunk):
+        objs, done_keys, failures = [], [], []
+        for remote in chunk:
+            key = self.adapter.get_remote_id(entity_type, remote)
+            try:
+                obj = target.transform(self.log.connection, remote)
+            except TRANSFORM_ERRORS as exc:
+                self.result.records_failed += 1
+                error = str(exc) or exc.__class__.__name__
+                if len(self.errors) < MAX_ERROR_MESSAGES and error not in self.errors:
+                    self.errors.append(error)
+                if key:
+                    failures.append((key, remote, '', error))
+                else:
+                    # Nothing to store it under: the watermark has to stay put.
+                    self.result.failures_tracked = False
+                continue
+            done_keys.append(key)
+            if obj is None:
+                self.result.records_skipped += 1
+            else:
+                objs.append(obj)
+        if failures:
+            record_failures(self.log.connection, 'pull', entity_type, failures)
+            self.clear_failures = True
+        return objs, done_keys
+
+
+def get_pull_entity_types(log):
+    if log.entity_type == 'all':
+        return list(PULL_TARGETS)
+    if log.entity_type not in PULL_TARGETS:
+        raise SyncError(f'No pull target registered for entity type {log.entity_type!r}')
+    return [log.entity_type]
+
+
+@register_sync_handler('pull')
+def run_pull(log):
+    adapter = get_adapter(log.connection)
+    puller = ChunkedPuller(log, adapter)
+    entity_types = get_pull_entity_types(log)
+    get_progress(log).set_phase('pulling')
+    for entity_type in entity_types:
+        if log.retry_failed_only:
+            puller.pull_failed(entity_type)
+        else:
+            cursor = get_cursor(log.connection, entity_type, 'pull')
+            puller.pull(entity_type, modified_since=cursor.watermark)
+    result = puller.close()
+    result.entity_types = tuple(entity_types)
+    return result
@@ -0,0 +1,166 @@
+"""
+Push sync: Hub records → accounting provider.
+
+Source modules (invoicing, expenses, ...) register a push source per
+entity type. A source is a callable ``(connection, modified_since)`` that
+yields ``OutgoingRecord`` items; the push handler streams them through the
+batching stage. Rejected records are stored for retry with the payload
+that was sent, and a ``retry_failed_only`` log pushes just those.
+
+Entity types whose model is tracked by the outbox (``outbox.track_model``)
+can also register a loader, ``(connection, local_ids)`` -> iterable of
+``OutgoingRecord``. Once a connection has completed its first push, it
+then pushes the records in its outbox instead of scanning the source.
+Writes that bypassed the outbox are caught by a rescan of the source every
+``ACCOUNTING_SYNC_OUTBOX_RESCAN_INTERVAL`` seconds (default one day; 0
+disables it), reading only records modified since the previous rescan.
+Records that did not change are dropped by the content-hash filter, so a
+rescan only sends what the outbox missed.
+"""
+from dataclasses import dataclass
+from typing import Any
+
+from django.conf import settings
+
+from .batching import BatchPusher
+from .cursors import advance_cursor, get_cursor
+from .engine import SyncError, register_sync_handler
+from .mapping import filter_changed, save_mappings
+from .outbox import discard_changes, iter_outbox_chunks
+from .progress import get_progress
+from .providers import get_adapter
+from .retry import clear_failures, has_failures, iter_failures, record_failures
+from .tracing import span
+
+# entity_type -> callable(connection, modified_since) -> iterable[OutgoingRecord]
+PUSH_SOURCES = {}
+# entity_type -> callable(connection, local_ids) -> iterable[OutgoingRecord]
+PUSH_LOADERS = {}
+# Cursor direction holding the start of the last source scan of outbox-driven entity types.
+RESCAN_DIRECTION = 'push_scan'
+DEFAULT_RESCAN_INTERVAL = 86400
+
+
+def register_push_source(entity_type):
+    """Register the callable that produces outgoing records for ``entity_type``."""
+    def decorator(func):
+        PUSH_SOURCES[entity_type] = func
+        return func
+    return decorator
+
+
+def register_push_loader(entity_type):
+    """Register the callable that loads outgoing records of ``entity_type`` by local id."""
+    def decorator(func):
+        PUSH_LOADERS[entity_type] = func
+        return func
+    return decorator
+
+
+@dataclass
+class OutgoingRecord:
+    entity_type: str
+    local_id: str
+    payload: Any
+    content_hash: str = ''
+
+
+class MappedBatchPusher(BatchPusher):
+    """BatchPusher that records provider ids and payload hashes, and failed records, per batch."""
+
+    def __init__(self, log, adapter, **kwargs):
+        super().__init__(log, adapter, **kwargs)
+        self.result.failures_tracked = True
+        # Skip the per-batch DELETE while the connection has nothing to clear.
+        self.clear_failures = has_failures(log.connection, 'push')
+
+    def on_batch_pushed(self, pushed):
+        with span('db_write', count=len(pushed)):
+            save_mappings(self.log.connection, self.adapter, pushed)
+            if self.clear_failures:
+                entity_type = pushed[0][0].entity_type
+                clear_failures(self.log.connection, 'push', entity_type, [record.local_id for record, _ in pushed])
+
+    def on_batch_failed(self, failed):
+        entity_type = failed[0][0].entity_type
+        with span('db_write', count=len(failed)):
+            record_failures(self.log.connection, 'push', entity_type, [
+                (record.local_id, record.payload, record.content_hash, error) for record, error in failed
+            ])
+        self.clear_failures = True
+
+
+def get_push_entity_types(log):
+    if log.entity_type == 'all':
+        return list(PUSH_SOURCES)
+    if log.entity_type not in PUSH_SOURCES:
+        raise SyncError(f'No push source registered for entity type {log.entity_type!r}')
+    return [log.entity_type]
+
+
+def iter_failed_records(connection, entity_type):
+    """Stored push failures as ``OutgoingRecord`` items, with the payload and hash that were sent."""
+    for failure in iter_failures(connection, 'push', entity_type):
+        if failure.payload is not None:
+            yield OutgoingRecord(entity_type, failure.record_key, failure.payload, failure.content_hash)
+
+
+def push_outbox(connection, adapter, pusher, entity_type, stats):
+    """Push the records in the connection's outbox, chunk by chunk, in change order."""
+    loader = PUSH_LOADERS[entity_type]
+    for chunk in iter_outbox_chunks(connection, entity_type):
+        local_ids = [local_id for local_id, operation in chunk if operation == 'upsert']
+        # Providers keep deleted records (they are voided there, not removed).
+        stats['skipped'] = stats.get('skipped', 0) + len(chunk) - len(local_ids)
+        if local_ids:
+            for record in filter_changed(connection, adapter, loader(connection, local_ids), stats=stats):
+                pusher.add(record)
+        # The chunk is acknowledged when the next one is read: send it first.
+        pusher.flush(entity_type)
+
+
+def rescan_due(scan_cursor, now):
+    """Whether an outbox-driven entity type needs its periodic source rescan."""
+    interval = getattr(settings, 'ACCOUNTING_SYNC_OUTBOX_RESCAN_INTERVAL', DEFAULT_RESCAN_INTERVAL)
+    if not interval:
+        return False
+    return scan_cursor.watermark is None or (now - scan_cursor.watermark).total_seconds() >= interval
+
+
+@register_sync_handler('push')
+def run_push(log):
+    adapter = get_adapter(log.connection)
+    pusher = MappedBatchPusher(log, adapter)
+    entity_types = get_push_entity_types(log)
+    get_progress(log).set_phase('pushing')
+    stats = {}
+    scanned, rescanned = [], []
+    for entity_type in entity_types:
+        if log.retry_failed_only:
+            records = iter_failed_records(log.connection, entity_type)
+        else:
+            cursor = get_cursor(log.connection, entity_type, 'push')
+            since = cursor.watermark
+            if cursor.watermark is not None and entity_type in PUSH_LOADERS:
+                push_outbox(log.connection, adapter, pusher, entity_type, stats)
+                scan_cursor = get_cursor(log.connection, entity_type, RESCAN_DIRECTION)
+                if not rescan_due(scan_cursor, log.started_at):
+                    continue
+                since = scan_cursor.watermark
+                rescanned.append(entity_type)
+            else:
+                scanned.append(entity_type)
+            source = PUSH_SOURCES[entity_type](log.connection, since)
+            records = filter_changed(log.connection, adapter, source, stats=stats)
+        for record in records:
+            pusher.add(record)
+    result = pusher.close()
+    for entity_type in scanned + rescanned:
+        if entity_type not in PUSH_LOADERS:
+            continue
+        if entity_type in scanned:
+            discard_changes(log.connection, entity_type, before=log.started_at)
+        advance_cursor(get_cursor(log.connection, entity_type, RESCAN_DIRECTION), watermark=log.started_at)
+    result.records_skipped = stats.get('skipped', 0)
+    result.entity_types = tuple(entity_types)
+    return result
@@ -0,0 +1,138 @@
+"""
+Provider rate limiting.
+
+Each provider tenant (Xero tenant, QuickBooks realm, or the connection when
+no tenant is known) gets one token bucket per limit window, stored in
+``RateLimitBucket`` so every worker process draws from the same budget.
+Buckets are updated with a compare-and-swap on ``version``.
+
+Callers never sleep for long: when the next token is further away than
+``ACCOUNTING_SYNC_MAX_INLINE_WAIT`` seconds, ``RateLimited`` is raised with
+the time the work can resume, and the engine re-queues the log for then.
+"""
+import time
+from datetime import timedelta
+from email.utils import parsedate_to_datetime
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import RateLimitBucket
+
+MAX_INLINE_WAIT = 1.0
+CAS_ATTEMPTS = 5
+
+
+class RateLimited(Exception):
+    """Raised when work must be rescheduled until ``retry_at``."""
+
+    def __init__(self, retry_at, key=''):
+        super().__init__(f'Rate limited{f" on {key}" if key else ""} until {retry_at.isoformat()}')
+        self.retry_at = retry_at
+        self.key = key
+
+
+class _Contention(Exception):
+    pass
+
+
+def parse_retry_after(value, default=60):
+    """Return the number of seconds a ``Retry-After`` header asks us to wait."""
+    if not value:
+        return default
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, (parsedate_to_datetime(value) - timezone.now()).total_seconds())
+    except (TypeError, ValueError):
+        return default
+
+
+class RateLimiter:
+    """
+    Token buckets for one provider tenant.
+
+    ``limits`` is a list of ``(capacity, period_seconds)`` pairs, e.g.
+    Xero's ``[(60, 60), (5000, 86400)]``. A call needs a token from every
+    bucket.
+    """
+
+    def __init__(self, key, limits):
+        self.key = key
+        self.limits = {f'{key}:{period}': (capacity, period) for capacity, period in limits}
+
+    def _ensure_buckets(self, now):
+        existing = set(RateLimitBucket.objects.filter(key__in=self.limits).values_list('key', flat=True))
+        for bucket_key, (capacity, _) in self.limits.items():
+            if bucket_key in existing:
+                continue
+            try:
+                with transaction.atomic():
+                    RateLimitBucket.objects.create(key=bucket_key, tokens=capacity, refilled_at=now)
+            except IntegrityError:
+                pass
+
+    def reserve(self, tokens=1):
+        """Take ``tokens`` from every bucket and return 0, or return the seconds to wait."""
+        if not self.limits:
+            return 0
+        for _ in range(CAS_ATTEMPTS):
+            now = timezone.now()
+            try:
+                with transaction.atomic():
+                    return self._reserve(now, tokens)
+            except _Contention:
+                continue
+            except RateLimitBucket.DoesNotExist:
+                self._ensure_buckets(now)
+        return 0.05
+
+    def _reserve(self, now, tokens):
+        buckets = list(RateLimitBucket.objects.select_for_update().filter(key__in=self.limits).order_by('key'))
+        if len(buckets) < len(self.limits):
+            raise RateLimitBucket.DoesNotExist
+        waits, refilled = [], []
+        for bucket in buckets:
+            capacity, period = self.limits[bucket.key]
+            rate = capacity / period
+            elapsed = max(0.0, (now - bucket.refilled_at).total_seconds())
+            available = min(capacity, bucket.tokens + elapsed * rate)
+            if bucket.blocked_until and bucket.blocked_until > now:
+                waits.append((bucket.blocked_until - now).total_seconds())
+            elif available < tokens:
+                waits.append((tokens - available) / rate)
+            refilled.append((bucket, available))
+        if waits:
+            return max(waits)
+        for bucket, available in refilled:
+            updated = RateLimitBucket.objects.filter(pk=bucket.pk, version=bucket.version).update(
+                tokens=available - tokens, refilled_at=now, version=F('version') + 1,
+            )
+            if not updated:
+                raise _Contention
+        return 0
+
+    def acquire(self, tokens=1):
+        """Take a token, waiting inline only for short gaps; otherwise raise ``RateLimited``."""
+        max_inline_wait = getattr(settings, 'ACCOUNTING_SYNC_MAX_INLINE_WAIT', MAX_INLINE_WAIT)
+        while True:
+            wait = self.reserve(tokens)
+            if not wait:
+                return
+            if wait > max_inline_wait:
+                raise RateLimited(timezone.now() + timedelta(seconds=wait), key=self.key)
+            time.sleep(wait)
+
+    def block(self, seconds):
+        """Stop every worker from calling this tenant for ``seconds`` (e.g. after a 429)."""
+        now = timezone.now()
+        until = now + timedelta(seconds=seconds)
+        self._ensure_buckets(now)
+        RateLimitBucket.objects.filter(key__in=self.limits).exclude(blocked_until__gt=until).update(
+            blocked_until=until, tokens=0, refilled_at=until, version=F('version') + 1,
+        )
+        return until
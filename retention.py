@@ -0,0 +1,108 @@
+"""
+Sync log retention.
+
+Finished logs older than a hub's retention period are rolled up into
+``SyncLogDailySummary`` rows (per day, connection, entity type and
+direction) and then hard-deleted. Purging runs in batches of
+``PURGE_BATCH_SIZE``; each batch is rolled up and deleted in one short
+transaction, so no long locks are held and an interrupted run never
+counts a log twice.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import SyncLog, SyncLogDailySummary, SyncRetentionPolicy
+from .stats import upsert_counters
+
+DEFAULT_RETENTION_DAYS = 90
+PURGE_BATCH_SIZE = 1000
+PURGEABLE_STATUSES = ('success', 'partial', 'error')
+
+
+def default_retention_days():
+    return getattr(settings, 'ACCOUNTING_SYNC_LOG_RETENTION_DAYS', DEFAULT_RETENTION_DAYS)
+
+
+def get_retention_days(hub_id):
+    days = SyncRetentionPolicy.objects.filter(hub_id=hub_id).values_list('retention_days', flat=True).first()
+    return days if days is not None else default_retention_days()
+
+
+def set_retention_days(hub_id, days):
+    SyncRetentionPolicy.objects.update_or_create(hub_id=hub_id, defaults={'retention_days': days})
+
+
+def purgeable_logs(hub_id, cutoff):
+    """Logs of ``hub_id`` created before ``cutoff`` that are finished or soft-deleted."""
+    return SyncLog.all_objects.filter(hub_id=hub_id, created_at__lt=cutoff).filter(
+        Q(status__in=PURGEABLE_STATUSES) | Q(is_deleted=True)
+    )
+
+
+def rollup_logs(logs):
+    """Add ``logs`` to the daily summaries; soft-deleted logs are not counted."""
+    rows = (
+        logs.filter(is_deleted=False).order_by()
+        .annotate(day=TruncDate('created_at'))
+        .values('hub_id', 'connection_id', 'day', 'entity_type', 'direction')
+        .annotate(
+            logs=Count('id'),
+            success=Count('id', filter=Q(status='success')),
+            partial=Count('id', filter=Q(status='partial')),
+            error=Count('id', filter=Q(status='error')),
+            records=Sum('records_synced'),
+        )
+    )
+    for row in rows:
+        upsert_counters(
+            SyncLogDailySummary,
+            {
+                'connection_id': row['connection_id'], 'day': row['day'],
+                'entity_type': row['entity_type'], 'direction': row['direction'],
+            },
+            {'hub_id': row['hub_id']},
+            {
+                'logs_count': row['logs'],
+                'success_count': row['success'],
+                'partial_count': row['partial'],
+                'error_count': row['error'],
+                'records_synced': row['records'] or 0,
+            },
+        )
+
+
+def purge_hub(hub_id, now=None, batch_size=PURGE_BATCH_SIZE, max_batches=None):
+    """Roll up and delete ``hub_id``'s expired logs; return the number deleted."""
+    cutoff = (now or timezone.now()) - timedelta(days=get_retention_days(hub_id))
+    purged = batches = 0
+    while max_batches is None or batches < max_batches:
+        with transaction.atomic():
+            ids = list(
+                purgeable_logs(hub_id, cutoff).select_for_update(skip_locked=True)
+                .order_by('created_at').values_list('id', flat=True)[:batch_size]
+            )
+            if not ids:
+                break
+            batch = SyncLog.all_objects.filter(id__in=ids)
+            rollup_logs(batch)
+            batch.delete()
+        purged += len(ids)
+        batches += 1
+    return purged
+
+
+def purge_expired_logs(hub_id=None, now=None, batch_size=PURGE_BATCH_SIZE, max_batches=None):
+    """Purge every hub (or just ``hub_id``); return ``{hub_id: deleted}``."""
+    if hub_id:
+        hub_ids = [hub_id]
+    else:
+        hub_ids = SyncLog.all_objects.order_by().values_list('hub_id', flat=True).distinct()
+    return {
+        hub: purge_hub(hub, now=now, batch_size=batch_size, max_batches=max_batches)
+        for hub in list(hub_ids)
+    }
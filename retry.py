@@ -0,0 +1,140 @@
+"""
+Automatic retries for failed syncs.
+
+When a log finishes as ``error`` or ``partial``, ``schedule_retry`` queues a
+new pending log (``attempt`` + 1, linked through ``retry_of``) that is not
+claimed before an exponentially growing, jittered delay. Logs whose error
+cannot be fixed by retrying, or that used up ``ACCOUNTING_SYNC_RETRY_MAX_ATTEMPTS``,
+are flagged ``dead_letter`` instead.
+
+Handlers record the individual records that failed in ``SyncRecordFailure``
+together with their payload. A retry of such a run sets
+``retry_failed_only`` and only re-sends those records, instead of syncing
+everything again.
+"""
+import random
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import F
+from django.utils import timezone
+
+from .models import SyncLog, SyncRecordFailure
+
+DEFAULT_MAX_ATTEMPTS = 5
+DEFAULT_BASE_DELAY = 60
+DEFAULT_MAX_DELAY = 3600
+RETRY_STATUSES = ('error', 'partial')
+FAILURE_CHUNK_SIZE = 500
+
+
+def max_attempts():
+    return getattr(settings, 'ACCOUNTING_SYNC_RETRY_MAX_ATTEMPTS', DEFAULT_MAX_ATTEMPTS)
+
+
+def backoff_delay(attempt, rand=random.random):
+    """
+    Seconds to wait before retrying after failed attempt number ``attempt``.
+
+    The delay doubles per attempt up to ``ACCOUNTING_SYNC_RETRY_MAX_DELAY``
+    and is jittered over its upper half, so logs that failed together (e.g.
+    during a provider outage) do not all come back at the same moment.
+    """
+    base = getattr(settings, 'ACCOUNTING_SYNC_RETRY_BASE_DELAY', DEFAULT_BASE_DELAY)
+    cap = getattr(settings, 'ACCOUNTING_SYNC_RETRY_MAX_DELAY', DEFAULT_MAX_DELAY)
+    delay = min(cap, base * 2 ** max(0, attempt - 1))
+    return delay / 2 + rand() * delay / 2
+
+
+def schedule_retry(log, result, now=None):
+    """Queue the next attempt of a failed ``log``, or dead-letter it; return the new log or None."""
+    if log.status not in RETRY_STATUSES:
+        return None
+    if not result.retryable or log.attempt >= max_attempts():
+        log.dead_letter = True
+        log.save(update_fields=['dead_letter', 'updated_at'])
+        return None
+    now = now or timezone.now()
+    return SyncLog.objects.create(
+        hub_id=log.hub_id,
+        connection=log.connection,
+        direction=log.direction,
+        entity_type=log.entity_type,
+        status='pending',
+        attempt=log.attempt + 1,
+        retry_of=log,
+        # A failed-only retry that errors keeps that mode: its cursor already
+        # moved past the stored records, so a full sync would never send them.
+        retry_failed_only=log.retry_failed_only or result.failures_tracked,
+        next_attempt_at=now + timedelta(seconds=backoff_delay(log.attempt)),
+    )
+
+
+# ======================================================================
+# Per-record failures
+# ======================================================================
+
+def has_failures(connection, direction):
+    return SyncRecordFailure.objects.filter(connection=connection, direction=direction).exists()
+
+
+def record_failures(connection, direction, entity_type, failures):
+    """
+    Store ``[(record_key, payload, content_hash, error), ...]`` that failed to sync.
+
+    A record failing again keeps its row: the payload and error are
+    replaced and ``attempts`` grows by one.
+    """
+    rows = {
+        str(key): SyncRecordFailure(
+            hub_id=connection.hub_id, connection=connection, direction=direction, entity_type=entity_type,
+            record_key=str(key), payload=payload, content_hash=content_hash or '', error_message=error or '',
+        )
+        for key, payload, content_hash, error in failures
+    }
+    if not rows:
+        return 0
+    qs = SyncRecordFailure.objects.filter(connection=connection, direction=direction, entity_type=entity_type)
+    existing = list(qs.filter(record_key__in=list(rows)).values_list('record_key', flat=True))
+    SyncRecordFailure.objects.bulk_create(
+        list(rows.values()),
+        update_conflicts=True,
+        unique_fields=['connection', 'direction', 'entity_type', 'record_key'],
+        update_fields=['payload', 'content_hash', 'error_message', 'updated_at'],
+    )
+    if existing:
+        qs.filter(record_key__in=existing).update(attempts=F('attempts') + 1)
+    return len(rows)
+
+
+def clear_failures(connection, direction, entity_type, record_keys):
+    """Forget failures of records that have now synced."""
+    if not record_keys:
+        return 0
+    deleted, _ = SyncRecordFailure.objects.filter(
+        connection=connection, direction=direction, entity_type=entity_type,
+        record_key__in=[str(k) for k in record_keys],
+    ).delete()
+    return deleted
+
+
+def iter_failures(connection, direction, entity_type, chunk_size=FAILURE_CHUNK_SIZE):
+    """
+    Yield the stored failures of ``entity_type`` in the order they first failed.
+
+    Rows are read in keyset chunks rather than through one open cursor,
+    because the retry deletes rows from the same table as records succeed.
+    """
+    qs = (
+        SyncRecordFailure.objects
+        .filter(connection=connection, direction=direction, entity_type=entity_type)
+        .order_by('id')
+        .only('id', 'record_key', 'payload', 'content_hash')
+    )
+    last_id = 0
+    while True:
+        chunk = list(qs.filter(id__gt=last_id)[:chunk_size])
+        if not chunk:
+            return
+        yield from chunk
+        last_id = chunk[-1].id
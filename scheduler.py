@@ -0,0 +1,108 @@
+"""
+Periodic syncs for connections with ``sync_enabled``.
+
+Every enabled, connected connection syncs once per
+``ACCOUNTING_SYNC_SCHEDULE_INTERVAL`` seconds (default one hour) at a fixed
+offset inside that interval, derived from a hash of its hub and connection
+ids. Thousands of connections are therefore spread evenly over the hour
+instead of all firing at :00, and a connection keeps its slot across runs.
+
+``schedule_due_syncs`` is meant to run every minute. It queues at most
+``limit`` syncs per run, taking connections round-robin across hubs (each
+hub's most overdue connection first, then each hub's second, ...), so one
+hub with thousands of due connections cannot starve the others. Pending
+logs are coalesced: a connection that already has a pending log for the
+same direction gets no second one.
+"""
+import zlib
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.db.models import F, Window
+from django.db.models.functions import RowNumber
+from django.utils import timezone
+
+from . import bulk
+from .models import AccountingConnection
+
+DEFAULT_INTERVAL = 3600
+DEFAULT_BATCH_SIZE = 500
+DEFAULT_DIRECTIONS = ('push', 'pull')
+
+
+def schedule_interval():
+    return int(getattr(settings, 'ACCOUNTING_SYNC_SCHEDULE_INTERVAL', DEFAULT_INTERVAL))
+
+
+def schedule_directions():
+    return tuple(getattr(settings, 'ACCOUNTING_SYNC_SCHEDULE_DIRECTIONS', DEFAULT_DIRECTIONS))
+
+
+def schedule_offset(hub_id, connection_id, interval):
+    """Seconds into each interval at which the connection syncs; stable across runs and processes."""
+    return zlib.crc32(f'{hub_id}:{connection_id}'.encode()) % interval
+
+
+def next_slot(offset, interval, after):
+    """The first time after ``after`` that is ``offset`` seconds into an interval."""
+    now = after.timestamp()
+    slot = now - now % interval + offset
+    if slot <= now:
+        slot += interval
+    return datetime.fromtimestamp(slot, tz=dt_timezone.utc)
+
+
+def enabled_connections():
+    return AccountingConnection.objects.filter(sync_enabled=True, status='connected', is_deleted=False)
+
+
+def _set_next_sync(rows, interval, after):
+    objs = [
+        AccountingConnection(id=pk, next_sync_at=next_slot(schedule_offset(hub_id, pk, interval), interval, after))
+        for pk, hub_id in rows
+    ]
+    AccountingConnection.objects.bulk_update(objs, ['next_sync_at'], batch_size=bulk.BULK_CREATE_BATCH_SIZE)
+    return objs
+
+
+def assign_slots(now=None, interval=None, limit=DEFAULT_BATCH_SIZE):
+    """Give enabled connections that have no ``next_sync_at`` yet their next slot."""
+    now = now or timezone.now()
+    interval = interval or schedule_interval()
+    rows = list(enabled_connections().filter(next_sync_at__isnull=True).values_list('id', 'hub_id')[:limit])
+    return len(_set_next_sync(rows, interval, now))
+
+
+def due_connections(now, limit):
+    """``(id, hub_id)`` of up to ``limit`` due connections, round-robin across hubs."""
+    return list(
+        enabled_connections()
+        .filter(next_sync_at__lte=now)
+        .annotate(hub_rank=Window(
+            RowNumber(), partition_by=[F('hub_id')], order_by=[F('next_sync_at').asc(), F('id').asc()],
+        ))
+        .order_by('hub_rank', 'next_sync_at', 'id')
+        .values_list('id', 'hub_id')[:limit]
+    )
+
+
+def schedule_due_syncs(now=None, interval=None, limit=None, directions=None):
+    """
+    Queue one sync per direction for every due connection and move them to their next slot.
+
+    Returns the created logs.
+    """
+    now = now or timezone.now()
+    interval = interval or schedule_interval()
+    limit = limit or getattr(settings, 'ACCOUNTING_SYNC_SCHEDULE_BATCH_SIZE', DEFAULT_BATCH_SIZE)
+    assign_slots(now, interval, limit)
+    due = due_connections(now, limit)
+    if not due:
+        return []
+    connections = AccountingConnection.objects.filter(id__in=[pk for pk, _ in due])
+    created = []
+    for direction in directions or schedule_directions():
+        created += bulk.trigger_syncs(connections, direction=direction)
+    # Coalesced connections move on as well: their pending log covers this slot.
+    _set_next_sync(due, interval, now)
+    return created
@@ -0,0 +1,136 @@
+"""
+Full-text search over sync logs.
+
+The ``q`` box of the sync log list matches words (prefix-wise, so it works
+while typing) in ``error_message``, ``entity_type``, ``status`` and
+``direction`` through a database index instead of four ``icontains`` scans:
+
+* PostgreSQL: a GIN index on a ``to_tsvector('simple', ...)`` expression.
+  PostgreSQL maintains it on every write, including ``.update()``.
+* SQLite: an FTS5 table filled by triggers on the log table.
+
+Other backends fall back to ``icontains``. The index is created by
+migration 0010; ``ensure_search_index`` runs after every ``migrate`` to
+reinstall it when missing, e.g. when a SQLite table rebuild dropped the
+triggers.
+"""
+import re
+
+from django.db import connection as db_connection
+from django.db.models import BooleanField, Q
+from django.db.models.expressions import RawSQL
+
+from .models import SyncLog
+
+LOG_TABLE = SyncLog._meta.db_table
+FTS_TABLE = f'{LOG_TABLE}_fts'
+PG_INDEX = 'acsync_log_search'
+SEARCH_COLUMNS = ('error_message', 'entity_type', 'status', 'direction')
+
+# Must match the indexed expression exactly for PostgreSQL to use the index.
+PG_DOCUMENT = (
+    "to_tsvector('simple'::regconfig, "
+    "coalesce({t}error_message, '') || ' ' || coalesce({t}entity_type, '') || ' ' || "
+    "coalesce({t}status, '') || ' ' || coalesce({t}direction, ''))"
+)
+SQLITE_DOCUMENT = (
+    "coalesce({t}error_message, '') || ' ' || coalesce({t}entity_type, '') || ' ' || "
+    "coalesce({t}status, '') || ' ' || coalesce({t}direction, '')"
+)
+SQLITE_TRIGGERS = {
+    f'{FTS_TABLE}_ai': (
+        f'AFTER INSERT ON {LOG_TABLE} BEGIN '
+        f'INSERT INTO {FTS_TABLE} (log_id, body) VALUES (new.id, {SQLITE_DOCUMENT.format(t="new.")}); END'
+    ),
+    f'{FTS_TABLE}_au': (
+        f'AFTER UPDATE OF {", ".join(SEARCH_COLUMNS)} ON {LOG_TABLE} BEGIN '
+        f'DELETE FROM {FTS_TABLE} WHERE log_id = old.id; '
+        f'INSERT INTO {FTS_TABLE} (log_id, body) VALUES (new.id, {SQLITE_DOCUMENT.format(t="new.")}); END'
+    ),
+    f'{FTS_TABLE}_ad': (
+        f'AFTER DELETE ON {LOG_TABLE} BEGIN '
+        f'DELETE FROM {FTS_TABLE} WHERE log_id = old.id; END'
+    ),
+}
+
+
+def search_terms(query):
+    """Split ``query`` into the word tokens both index tokenizers produce."""
+    return re.findall(r'[^\W_]+', query.lower())
+
+
+def _sqlite_rebuild(cursor):
+    cursor.execute(f'DELETE FROM {FTS_TABLE}')
+    cursor.execute(
+        f'INSERT INTO {FTS_TABLE} (log_id, body) '
+        f'SELECT id, {SQLITE_DOCUMENT.format(t="")} FROM {LOG_TABLE}'
+    )
+
+
+def install_search_index(connection, concurrently=False):
+    """Create the search index for ``connection``'s backend (idempotent)."""
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute(
+                f'CREATE INDEX {"CONCURRENTLY " if concurrently else ""}IF NOT EXISTS {PG_INDEX} '
+                f'ON {LOG_TABLE} USING gin ({PG_DOCUMENT.format(t="")})'
+            )
+        elif connection.vendor == 'sqlite':
+            cursor.execute(f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(log_id UNINDEXED, body, prefix='2 3')")
+            for name, body in SQLITE_TRIGGERS.items():
+                cursor.execute(f'CREATE TRIGGER IF NOT EXISTS {name} {body}')
+            _sqlite_rebuild(cursor)
+
+
+def remove_search_index(connection):
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute(f'DROP INDEX IF EXISTS {PG_INDEX}')
+        elif connection.vendor == 'sqlite':
+            for name in SQLITE_TRIGGERS:
+                cursor.execute(f'DROP TRIGGER IF EXISTS {name}')
+            cursor.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
+
+
+def ensure_search_index(connection):
+    """Install the index if it is missing, e.g. after a SQLite table rebuild dropped the triggers."""
+    if LOG_TABLE not in connection.introspection.table_names():
+        return
+    if connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT name FROM sqlite_master WHERE type IN ('table', 'trigger') AND name LIKE %s",
+                [f'{FTS_TABLE}%'],
+            )
+            existing = {row[0] for row in cursor.fetchall()}
+        if FTS_TABLE in existing and set(SQLITE_TRIGGERS) <= existing:
+            return
+    install_search_index(connection)
+
+
+def search_sync_logs(queryset, query):
+    """Filter ``queryset`` to logs matching every word of ``query`` (as a prefix)."""
+    terms = search_terms(query)
+    if not terms:
+        return queryset
+    vendor = db_connection.vendor
+    if vendor == 'postgresql':
+        match = RawSQL(
+            f"{PG_DOCUMENT.format(t=f'{LOG_TABLE}.')} @@ to_tsquery('simple'::regconfig, %s)",
+            [' & '.join(f'{term}:*' for term in terms)],
+            output_field=BooleanField(),
+        )
+        return queryset.filter(match)
+    if vendor == 'sqlite':
+        match = RawSQL(
+            f'{LOG_TABLE}.id IN (SELECT log_id FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s)',
+            [' '.join(f'"{term}"*' for term in terms)],
+            output_field=BooleanField(),
+        )
+        return queryset.filter(match)
+    for term in terms:
+        queryset = queryset.filter(
+            Q(direction__icontains=term) | Q(entity_type__icontains=term)
+            | Q(status__icontains=term) | Q(error_message__icontains=term)
+        )
+    return queryset
@@ -0,0 +1,45 @@
+"""Signal handlers for the Accounting Sync module."""
+from django.db import connections
+from django.db.models.signals import post_delete, post_init, post_save, pre_save
+from django.dispatch import receiver
+
+from . import fragments, search, stats
+from .models import AccountingConnection, SyncLog
+
+
+@receiver(post_init, sender=SyncLog)
+def remember_sync_log_state(sender, instance, **kwargs):
+    instance._stats_state = stats.log_state(instance)
+
+
+@receiver(pre_save, sender=SyncLog)
+def load_sync_log_state(sender, instance, **kwargs):
+    if instance._state.adding or getattr(instance, '_stats_state', None) is not None:
+        return
+    # Instances loaded with deferred fields: read the previous state once.
+    previous = SyncLog.all_objects.filter(pk=instance.pk).values_list(*stats.STATE_FIELDS).first()
+    instance._stats_state = tuple(previous) if previous else None
+
+
+@receiver(post_save, sender=SyncLog)
+def update_sync_stats(sender, instance, created, **kwargs):
+    old_state = None if created else instance._stats_state
+    new_state = stats.log_state(instance)
+    if new_state is None:
+        new_state = tuple(SyncLog.all_objects.filter(pk=instance.pk).values_list(*stats.STATE_FIELDS).first())
+    stats.apply_log_change(instance, old_state, new_state)
+    instance._stats_state = new_state
+
+
+@receiver(post_save, sender=SyncLog)
+@receiver(post_save, sender=AccountingConnection)
+@receiver(post_delete, sender=AccountingConnection)
+def invalidate_fragments(sender, instance, **kwargs):
+    # Log purges roll logs into daily summaries and leave the dashboard totals
+    # unchanged, so SyncLog deletes need no bump; set-based writes bump in ``bulk``.
+    fragments.bump_version(instance.hub_id)
+
+
+def ensure_search_index(sender, using='default', **kwargs):
+    """post_migrate: reinstall the full-text index if a migration dropped it."""
+    search.ensure_search_index(connections[using])
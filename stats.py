@@ -0,0 +1,266 @@
+"""
+Incrementally maintained sync statistics.
+
+Every ``SyncLog`` write applies the difference between the log's previous
+and new state to ``ConnectionSyncStats`` (running totals per connection) and,
+when a log finishes, to ``HourlySyncStats`` (per hub and hour). The dashboard
+reads these small tables instead of counting the log table, so its cost does
+not grow with the number of logs.
+"""
+from datetime import timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Max, Q, Sum
+from django.db.models.functions import Substr, TruncDate
+from django.utils import timezone
+
+from .models import AccountingConnection, ConnectionSyncStats, HourlySyncStats, SyncLog, SyncLogDailySummary
+
+STATUS_COUNTERS = {
+    'success': 'success_count',
+    'partial': 'partial_count',
+    'error': 'error_count',
+}
+TERMINAL_STATUSES = tuple(STATUS_COUNTERS)
+STATE_FIELDS = ('status', 'records_synced', 'is_deleted')
+
+
+def log_state(log):
+    """Return the stats-relevant state of ``log``, or None if any field is deferred."""
+    values = log.__dict__
+    if any(f not in values for f in STATE_FIELDS):
+        return None
+    return tuple(values[f] for f in STATE_FIELDS)
+
+
+def _contribution(state):
+    if state is None or state[2]:
+        return {}
+    status, records_synced, _ = state
+    counters = {'total_logs': 1, 'records_synced': records_synced or 0}
+    if status in STATUS_COUNTERS:
+        counters[STATUS_COUNTERS[status]] = 1
+    return counters
+
+
+def upsert_counters(model, lookup, defaults, increments, extra=None):
+    """Add ``increments`` to the row matching ``lookup``, creating it if needed."""
+    updates = {k: F(k) + v for k, v in increments.items()}
+    updates.update(extra or {})
+    if not updates:
+        return
+    if model.objects.filter(**lookup).update(**updates):
+        return
+    try:
+        with transaction.atomic():
+            model.objects.create(**lookup, **defaults, **increments, **(extra or {}))
+    except IntegrityError:
+        model.objects.filter(**lookup).update(**updates)
+
+
+def apply_log_change(log, old_state, new_state, now=None):
+    """Apply the stats delta of ``log`` moving from ``old_state`` to ``new_state``."""
+    now = now or timezone.now()
+    old, new = _contribution(old_state), _contribution(new_state)
+    increments = {k: new.get(k, 0) - old.get(k, 0) for k in set(old) | set(new)}
+    increments = {k: v for k, v in increments.items() if v}
+
+    old_status = old_state[0] if old_state else None
+    new_status = new_state[0] if new_state and not new_state[2] else None
+    extra = {}
+    if new_status != old_status:
+        if new_status == 'error':
+            extra.update(last_error_at=now, last_error_message=(log.error_message or '')[:500])
+        elif new_status == 'success':
+            extra['last_success_at'] = now
+    upsert_counters(
+        ConnectionSyncStats, {'connection_id': log.connection_id}, {'hub_id': log.hub_id},
+        increments, extra,
+    )
+
+    if new_status in TERMINAL_STATUSES and old_status not in TERMINAL_STATUSES:
+        hour = (log.finished_at or now).replace(minute=0, second=0, microsecond=0)
+        upsert_counters(HourlySyncStats, {'hub_id': log.hub_id, 'hour': hour}, {}, {
+            'logs_finished': 1,
+            'error_count': 1 if new_status == 'error' else 0,
+            'records_synced': new_state[1] or 0,
+        })
+
+
+def remove_logs(qs):
+    """Subtract the logs in ``qs`` from the totals before a set-based soft delete."""
+    rows = qs.filter(is_deleted=False).order_by().values('connection_id', 'status').annotate(
+        n=Count('id'), records=Sum('records_synced'),
+    )
+    per_connection = {}
+    for row in rows:
+        totals = per_connection.setdefault(row['connection_id'], {'total_logs': 0, 'records_synced': 0})
+        totals['total_logs'] -= row['n']
+        totals['records_synced'] -= row['records'] or 0
+        field = STATUS_COUNTERS.get(row['status'])
+        if field:
+            totals[field] = totals.get(field, 0) - row['n']
+    for connection_id, increments in per_connection.items():
+        ConnectionSyncStats.objects.filter(connection_id=connection_id).update(
+            **{k: F(k) + v for k, v in increments.items()}
+        )
+
+
+def add_logs(logs):
+    """Count logs inserted with ``bulk_create`` (which sends no signals) in the totals."""
+    per_connection = {}
+    for log in logs:
+        key = (log.connection_id, log.hub_id)
+        per_connection[key] = per_connection.get(key, 0) + 1
+    for (connection_id, hub_id), count in per_connection.items():
+        upsert_counters(ConnectionSyncStats, {'connection_id': connection_id}, {'hub_id': hub_id}, {'total_logs': count})
+
+
+def rebuild_stats(hub_id=None):
+    """Recompute connection totals from the log table and purged-log summaries (repair / backfill)."""
+    logs = SyncLog.objects.filter(is_deleted=False)
+    summaries = SyncLogDailySummary.objects.all()
+    connections = AccountingConnection.objects.all()
+    if hub_id:
+        logs = logs.filter(hub_id=hub_id)
+        summaries = summaries.filter(hub_id=hub_id)
+        connections = connections.filter(hub_id=hub_id)
+    aggregates = {
+        row['connection_id']: row
+        for row in logs.order_by().values('connection_id').annotate(
+            total_logs=Count('id'),
+            success_count=Count('id', filter=Q(status='success')),
+            partial_count=Count('id', filter=Q(status='partial')),
+            error_count=Count('id', filter=Q(status='error')),
+            records_synced=Sum('records_synced'),
+        )
+    }
+    purged = {
+        row['connection_id']: row
+        for row in summaries.order_by().values('connection_id').annotate(
+            logs=Sum('logs_count'),
+            success=Sum('success_count'),
+            partial=Sum('partial_count'),
+            error=Sum('error_count'),
+            records=Sum('records_synced'),
+        )
+    }
+    for connection in connections.only('id', 'hub_id'):
+        row = aggregates.get(connection.id, {})
+        old = purged.get(connection.id, {})
+        ConnectionSyncStats.objects.update_or_create(
+            connection_id=connection.id,
+            defaults={
+                'hub_id': connection.hub_id,
+                'total_logs': row.get('total_logs', 0) + (old.get('logs') or 0),
+                'success_count': row.get('success_count', 0) + (old.get('success') or 0),
+                'partial_count': row.get('partial_count', 0) + (old.get('partial') or 0),
+                'error_count': row.get('error_count', 0) + (old.get('error') or 0),
+                'records_synced': (row.get('records_synced') or 0) + (old.get('records') or 0),
+            },
+        )
+
+
+def get_dashboard_stats(hub_id, now=None):
+    """Summary cards for the dashboard, read from the stats tables only."""
+    now = now or timezone.now()
+    totals = ConnectionSyncStats.objects.filter(
+        hub_id=hub_id, connection__is_deleted=False,
+    ).aggregate(
+        total_logs=Sum('total_logs'),
+        success_count=Sum('success_count'),
+        partial_count=Sum('partial_count'),
+        error_count=Sum('error_count'),
+        records_synced=Sum('records_synced'),
+    )
+    finished = sum((totals[k] or 0) for k in ('success_count', 'partial_count', 'error_count'))
+    last_day = HourlySyncStats.objects.filter(hub_id=hub_id, hour__gte=now - timedelta(hours=24)).aggregate(
+        records_synced=Sum('records_synced'), error_count=Sum('error_count'), logs_finished=Sum('logs_finished'),
+    )
+    last_error = (
+        ConnectionSyncStats.objects.filter(hub_id=hub_id, connection__is_deleted=False, last_error_at__isnull=False)
+        .select_related('connection').defer('connection__access_token', 'connection__refresh_token')
+        .order_by('-last_error_at').first()
+    )
+    return {
+        'total_sync_logs': totals['total_logs'] or 0,
+        'total_records_synced': totals['records_synced'] or 0,
+        'success_rate': round(100 * (totals['success_count'] or 0) / finished, 1) if finished else None,
+        'records_per_hour': round((last_day['records_synced'] or 0) / 24, 1),
+        'syncs_last_24h': last_day['logs_finished'] or 0,
+        'errors_last_24h': last_day['error_count'] or 0,
+        'last_error': last_error,
+    }
+
+
+def get_sync_health(hub_id, since, connection_id=None, limit=10, message_chars=120):
+    """
+    Sync health since ``since``, aggregated in the database.
+
+    Returns per-connection outcome counts and success rate, the most frequent
+    error messages (grouped by their first ``message_chars`` characters),
+    hub-wide daily throughput from ``HourlySyncStats`` and the queue depth.
+    """
+    logs = SyncLog.objects.filter(hub_id=hub_id, is_deleted=False, created_at__gte=since)
+    if connection_id:
+        logs = logs.filter(connection_id=connection_id)
+    logs = logs.order_by()
+
+    connections = []
+    for row in logs.values('connection_id', 'connection__name', 'connection__provider').annotate(
+        total=Count('id'),
+        success=Count('id', filter=Q(status='success')),
+        partial=Count('id', filter=Q(status='partial')),
+        error=Count('id', filter=Q(status='error')),
+        records=Sum('records_synced'),
+        last_error_at=Max('created_at', filter=Q(status='error')),
+    ).order_by('-error', '-total')[:limit]:
+        finished = row['success'] + row['partial'] + row['error']
+        connections.append({
+            'connection_id': str(row['connection_id']),
+            'name': row['connection__name'],
+            'provider': row['connection__provider'],
+            'syncs': row['total'],
+            'success': row['success'],
+            'partial': row['partial'],
+            'error': row['error'],
+            'success_rate': round(100 * row['success'] / finished, 1) if finished else None,
+            'records_synced': row['records'] or 0,
+            'last_error_at': row['last_error_at'].isoformat() if row['last_error_at'] else None,
+        })
+
+    clusters = [
+        {
+            'message': row['message'],
+            'entity_type': row['entity_type'],
+            'direction': row['direction'],
+            'count': row['count'],
+            'connections': row['connections'],
+            'last_seen_at': row['last_seen_at'].isoformat(),
+        }
+        for row in logs.filter(status='error').annotate(message=Substr('error_message', 1, message_chars))
+        .values('message', 'entity_type', 'direction').annotate(
+            count=Count('id'),
+            connections=Count('connection_id', distinct=True),
+            last_seen_at=Max('created_at'),
+        ).order_by('-count')[:limit]
+    ]
+
+    throughput = [
+        {'day': row['day'].isoformat(), 'syncs': row['syncs'], 'errors': row['errors'], 'records_synced': row['records']}
+        for row in HourlySyncStats.objects.filter(hub_id=hub_id, hour__gte=since).order_by()
+        .annotate(day=TruncDate('hour')).values('day').annotate(
+            syncs=Sum('logs_finished'), errors=Sum('error_count'), records=Sum('records_synced'),
+        ).order_by('day')
+    ]
+
+    queue = SyncLog.objects.filter(hub_id=hub_id, is_deleted=False, status__in=('pending', 'running')).order_by()
+    if connection_id:
+        queue = queue.filter(connection_id=connection_id)
+    queue_depth = dict(queue.values_list('status').annotate(n=Count('id')))
+    return {
+        'connections': connections,
+        'error_clusters': clusters,
+        'throughput': throughput,
+        'queue': {'pending': queue_depth.get('pending', 0), 'running': queue_depth.get('running', 0)},
+    }
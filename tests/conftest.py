@@ -91,3 +91,42 @@ def sync_log(db, hub_id):
         error_message='Test description',
     )
 
+
+@pytest.fixture
+def connected_connection(db, hub_id):
+    """Create a connected AccountingConnection with sync enabled."""
+    return AccountingConnection.objects.create(
+        hub_id=hub_id,
+        provider='xero',
+        name='Xero Demo',
+        status='connected',
+        access_token='access',
+        refresh_token='refresh',
+        sync_enabled=True,
+    )
+
+
+@pytest.fixture
+def pending_sync_log(db, hub_id, connected_connection):
+    """Create a pending SyncLog waiting for a worker."""
+    return SyncLog.objects.create(
+        hub_id=hub_id,
+        connection=connected_connection,
+        direction='push',
+        entity_type='invoices',
+        status='pending',
+    )
+
+
+@pytest.fixture
+def fake_provider(settings):
+    """Run a local fake provider and point every adapter at it."""
+    from accounting_sync.providers import PROVIDERS, close_sessions
+    from accounting_sync.tests.fake_provider import FakeProvider
+
+    server = FakeProvider().start()
+    settings.ACCOUNTING_SYNC_PROVIDER_URLS = {name: server.url for name in PROVIDERS}
+    settings.ACCOUNTING_SYNC_TOKEN_URLS = {name: f'{server.url}/token' for name in PROVIDERS}
+    yield server
+    close_sessions()
+    server.stop()
@@ -0,0 +1,98 @@
+"""Local fake accounting provider for adapter tests."""
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, parse_qsl, urlsplit
+
+
+class FakeProvider:
+    """
+    Keep-alive HTTP server answering from a route table.
+
+    ``routes`` maps ``(method, path)`` to a callable
+    ``(query, body) -> (status, payload, headers)``. Every request is recorded,
+    and ``connections`` counts distinct client sockets so tests can assert
+    that adapters reuse pooled connections.
+    """
+
+    def __init__(self):
+        self.routes = {}
+        self.requests = []
+        self.client_addresses = set()
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), self._make_handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        host, port = self._server.server_address
+        return f'http://{host}:{port}'
+
+    @property
+    def connections(self):
+        return len(self.client_addresses)
+
+    def route(self, method, path, handler=None, status=200, payload=None, headers=None):
+        """Register a route; without ``handler`` it always returns ``payload``."""
+        if handler is None:
+            def handler(query, body):
+                return status, payload or {}, headers or {}
+        self.routes[(method, path)] = handler
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _make_handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, format, *args):
+                pass
+
+            def _dispatch(self, method):
+                parts = urlsplit(self.path)
+                length = int(self.headers.get('Content-Length') or 0)
+                raw = self.rfile.read(length) if length else b''
+                if not raw:
+                    body = None
+                elif self.headers.get('Content-Type', '').startswith('application/x-www-form-urlencoded'):
+                    body = dict(parse_qsl(raw.decode()))
+                else:
+                    body = json.loads(raw)
+                query = {k: v[0] for k, v in parse_qs(parts.query).items()}
+                with fake._lock:
+                    fake.client_addresses.add(self.client_address)
+                    fake.requests.append({'method': method, 'path': parts.path, 'query': query,
+                                          'body': body, 'headers': dict(self.headers)})
+                handler = fake.routes.get((method, parts.path))
+                if handler is None:
+                    status, payload, headers = 404, {'error': 'not found'}, {}
+                else:
+                    status, payload, headers = handler(query, body)
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                for key, value in headers.items():
+                    self.send_header(key, str(value))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                self._dispatch('GET')
+
+            def do_POST(self):
+                self._dispatch('POST')
+
+            def do_PUT(self):
+                self._dispatch('PUT')
+
+        return Handler
@@ -0,0 +1,74 @@
+"""Tests for the accounting_sync AI tools."""
+import uuid
+from types import SimpleNamespace
+
+import pytest
+
+from accounting_sync.ai_tools import (
+    GetSyncHealth, ListSyncLogs, ToggleAccountingSync, TriggerAccountingSync, _int_arg,
+)
+from accounting_sync.models import AccountingConnection, SyncLog
+
+
+def tool_request(hub_id):
+    return SimpleNamespace(session={'hub_id': hub_id})
+
+
+class TestIntArgs:
+    """_int_arg tests."""
+
+    def test_falls_back_to_default(self):
+        """Test non-numeric values use the default instead of raising."""
+        assert _int_arg({'limit': 'ten'}, 'limit', 20, 1, 50) == 20
+        assert _int_arg({'limit': ['5']}, 'limit', 20, 1, 50) == 20
+        assert _int_arg({}, 'limit', 20, 1, 50) == 20
+
+    def test_clamped(self):
+        """Test numeric values are clamped to the allowed range."""
+        assert _int_arg({'days': '500'}, 'days', 7, 1, 90) == 90
+        assert _int_arg({'days': -3}, 'days', 7, 1, 90) == 1
+
+
+@pytest.mark.django_db
+class TestHubScoping:
+    """The read tools only see the session hub's rows."""
+
+    @pytest.fixture
+    def other_hub_log(self):
+        other = AccountingConnection.objects.create(
+            hub_id=uuid.uuid4(), provider='xero', name='Elsewhere', status='connected',
+        )
+        return SyncLog.objects.create(hub_id=other.hub_id, connection=other, entity_type='invoices',
+                                      status='error', error_message='boom')
+
+    def test_list_sync_logs(self, hub_id, connected_connection, other_hub_log):
+        """Test list_sync_logs ignores another hub's logs."""
+        own = SyncLog.objects.create(hub_id=hub_id, connection=connected_connection, entity_type='invoices')
+        result = ListSyncLogs().execute({'limit': 'all'}, tool_request(hub_id))
+        assert [log['id'] for log in result['logs']] == [str(own.id)]
+
+    def test_get_sync_health(self, hub_id, connected_connection, other_hub_log):
+        """Test get_sync_health ignores another hub's and deleted logs."""
+        SyncLog.objects.create(hub_id=hub_id, connection=connected_connection, entity_type='invoices')
+        SyncLog.objects.create(hub_id=hub_id, connection=connected_connection, entity_type='invoices',
+                               status='error', error_message='gone', is_deleted=True)
+        result = GetSyncHealth().execute({'days': 'week'}, tool_request(hub_id))
+        assert result['days'] == 7
+        assert [row['name'] for row in result['connections']] == ['Xero Demo']
+        assert result['connections'][0]['syncs'] == 1
+        assert result['error_clusters'] == []
+
+
+@pytest.mark.django_db
+class TestConnectionIds:
+    """Tools given a malformed connection_id."""
+
+    @pytest.mark.parametrize('tool, args', [
+        (ListSyncLogs, {'connection_id': 'Xero Demo'}),
+        (GetSyncHealth, {'connection_id': '42'}),
+        (ToggleAccountingSync, {'connection_id': 'not-a-uuid', 'enabled': True}),
+        (TriggerAccountingSync, {'connection_id': 'not-a-uuid'}),
+    ])
+    def test_not_found(self, hub_id, connected_connection, tool, args):
+        """Test a non-UUID id is reported as not found instead of raising."""
+        assert tool().execute(args, tool_request(hub_id)) == {"error": "Connection not found"}
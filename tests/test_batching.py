@@ -0,0 +1,74 @@
+"""Tests for accounting_sync batched push."""
+import pytest
+
+from accounting_sync import push
+from accounting_sync.batching import AdaptiveBatchSizer
+from accounting_sync.engine import claim_pending_logs, run_log
+from accounting_sync.push import OutgoingRecord
+
+
+def xero_batch(query, body):
+    """Fake Xero multi-record POST that rejects records flagged as bad."""
+    items = []
+    for record in body['Invoices']:
+        if record.get('bad'):
+            items.append({**record, 'HasErrors': True, 'ValidationErrors': [{'Message': 'Invalid'}]})
+        else:
+            items.append({**record, 'InvoiceID': record['ref']})
+    return 200, {'Invoices': items}, {}
+
+
+@pytest.fixture
+def invoice_source(monkeypatch):
+    """Register an invoices push source yielding 120 records."""
+    records = [OutgoingRecord('invoices', str(i), {'ref': str(i)}) for i in range(120)]
+    monkeypatch.setitem(push.PUSH_SOURCES, 'invoices', lambda connection, since: iter(records))
+    return records
+
+
+class TestAdaptiveBatchSizer:
+    """AdaptiveBatchSizer tests."""
+
+    def test_grows_when_fast(self):
+        """Test fast clean batches grow the size up to the maximum."""
+        sizer = AdaptiveBatchSizer(initial=10, maximum=50, target_latency=1.0)
+        for _ in range(20):
+            sizer.record(0.1, 10)
+        assert sizer.size == 50
+
+    def test_halves_when_slow(self):
+        """Test slow batches halve the size."""
+        sizer = AdaptiveBatchSizer(initial=40, maximum=50, target_latency=1.0)
+        sizer.record(5.0, 40)
+        assert sizer.size == 20
+
+    def test_halves_on_errors(self):
+        """Test error-heavy batches halve the size, never below the minimum."""
+        sizer = AdaptiveBatchSizer(initial=2, minimum=1, maximum=50)
+        sizer.record(0.1, 2, failed=2)
+        sizer.record(0.1, 1, failed=1)
+        assert sizer.size == 1
+
+
+@pytest.mark.django_db
+class TestBatchedPush:
+    """Push handler tests against the fake provider."""
+
+    def test_push_uses_batches(self, fake_provider, pending_sync_log, invoice_source):
+        """Test 120 invoices are pushed in far fewer requests."""
+        fake_provider.route('POST', '/Invoices', handler=xero_batch)
+        run_log(claim_pending_logs('worker-1', 1)[0])
+        pending_sync_log.refresh_from_db()
+        assert pending_sync_log.status == 'success'
+        assert pending_sync_log.records_synced == 120
+        assert len(fake_provider.requests) < 12
+
+    def test_rejected_records_make_partial(self, fake_provider, pending_sync_log, invoice_source):
+        """Test per-record validation errors produce a partial sync."""
+        invoice_source[5].payload['bad'] = True
+        fake_provider.route('POST', '/Invoices', handler=xero_batch)
+        run_log(claim_pending_logs('worker-1', 1)[0])
+        pending_sync_log.refresh_from_db()
+        assert pending_sync_log.status == 'partial'
+        assert pending_sync_log.records_synced == 119
+        assert 'Invalid' in pending_sync_log.error_message
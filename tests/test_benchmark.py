@@ -0,0 +1,85 @@
+"""Tests for accounting_sync synthetic data and view benchmarks."""
+import json
+from datetime import timedelta
+from io import StringIO
+
+import pytest
+from django.core.management import CommandError, call_command
+from django.db.models import Sum
+from django.utils import timezone
+
+from accounting_sync import benchmark
+from accounting_sync.models import AccountingConnection, ConnectionSyncStats, HourlySyncStats, SyncLog
+
+
+class TestPercentile:
+    """percentile tests."""
+
+    def test_nearest_rank(self):
+        """Test percentiles pick a sample by nearest rank."""
+        samples = list(range(1, 101))
+        assert benchmark.percentile(samples, 50) == 50
+        assert benchmark.percentile(samples, 99) == 99
+        assert benchmark.percentile([7.0], 95) == 7.0
+
+
+@pytest.mark.django_db
+class TestSeedData:
+    """seed_data tests."""
+
+    def test_volumes_and_stats(self):
+        """Test the requested volumes are created and the stats tables match them."""
+        result = benchmark.seed_data(hubs=3, connections=7, logs=500, days=10, batch_size=64, seed=1)
+        assert (len(result.hub_ids), result.connections, result.logs) == (3, 7, 500)
+        assert AccountingConnection.objects.filter(hub_id__in=result.hub_ids, sync_enabled=False).count() == 7
+        assert SyncLog.objects.filter(hub_id__in=result.hub_ids).count() == 500
+        assert not SyncLog.objects.exclude(status__in=benchmark.SEED_STATUSES).exists()
+        assert ConnectionSyncStats.objects.aggregate(total=Sum('total_logs'))['total'] == 500
+        assert HourlySyncStats.objects.aggregate(total=Sum('logs_finished'))['total'] == 500
+
+    def test_timestamps_spread(self):
+        """Test bulk-inserted logs keep their generated creation times."""
+        benchmark.seed_data(hubs=1, connections=1, logs=200, days=10, seed=2)
+        oldest = SyncLog.objects.order_by('created_at').values_list('created_at', flat=True).first()
+        assert oldest < timezone.now() - timedelta(days=2)
+        assert SyncLog._meta.get_field('created_at').auto_now_add is True
+
+
+@pytest.mark.django_db
+class TestRunBenchmarks:
+    """run_benchmarks tests."""
+
+    def test_reports_every_case(self, store_config):
+        """Test every view is rendered and measured."""
+        result = benchmark.seed_data(hubs=2, connections=4, logs=200, seed=3)
+        hub_id = benchmark.busiest_hub()
+        assert hub_id in result.hub_ids
+        results = benchmark.run_benchmarks(hub_id, runs=3)
+        assert [r.name for r in results] == [name for name, _, _ in benchmark.BENCHMARK_CASES]
+        for r in results:
+            assert r.status_code == 200, r.name
+            assert len(r.samples_ms) == 3
+            assert r.p50_ms <= r.p95_ms <= r.max_ms
+            assert r.queries > 0
+
+    def test_commands(self, store_config):
+        """Test the seed command feeds the benchmark command's JSON report."""
+        call_command('accounting_sync_seed', hubs=1, connections=2, logs=100, stdout=StringIO())
+        out = StringIO()
+        call_command('accounting_sync_benchmark', runs=1, cases=['sync_logs_list'], json=True, stdout=out)
+        report = json.loads(out.getvalue())
+        assert [r['name'] for r in report['results']] == ['sync_logs_list']
+
+    def test_runs_clamped(self, store_config):
+        """Test a zero run count still takes one sample instead of failing the percentiles."""
+        benchmark.seed_data(hubs=1, connections=2, logs=50, seed=4)
+        out = StringIO()
+        call_command('accounting_sync_benchmark', runs=0, cases=['sync_logs_list'], json=True, stdout=out)
+        report = json.loads(out.getvalue())
+        assert report['runs'] == 1
+        assert len(report['results'][0]['samples_ms']) == 1
+
+    def test_runs_must_be_integer(self):
+        """Test a non-integer run count is rejected before anything is measured."""
+        with pytest.raises(CommandError):
+            call_command('accounting_sync_benchmark', '--runs', 'many', stdout=StringIO())
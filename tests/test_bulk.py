@@ -0,0 +1,144 @@
+"""Tests for accounting_sync bulk actions."""
+import uuid
+
+import pytest
+from django.urls import reverse
+
+from accounting_sync import bulk, push
+from accounting_sync.engine import claim_pending_logs, run_log
+from accounting_sync.models import AccountingConnection, ConnectionSyncStats, SyncLog, SyncRecordFailure
+from accounting_sync.retry import record_failures
+
+
+@pytest.fixture
+def connections(hub_id):
+    """Three connected Xero connections and one disconnected QuickBooks one."""
+    rows = [
+        AccountingConnection.objects.create(hub_id=hub_id, provider='xero', name=f'Xero {i}', status='connected')
+        for i in range(3)
+    ]
+    rows.append(AccountingConnection.objects.create(
+        hub_id=hub_id, provider='quickbooks', name='QuickBooks', status='disconnected',
+    ))
+    return rows
+
+
+@pytest.mark.django_db
+class TestBulkOperations:
+    """bulk module tests."""
+
+    def test_set_sync_enabled(self, hub_id, connections):
+        """Test sync is toggled with one update."""
+        qs = AccountingConnection.objects.filter(hub_id=hub_id)
+        assert bulk.set_sync_enabled(qs, True) == 4
+        assert bulk.set_sync_enabled(qs, True) == 0
+        assert not qs.filter(sync_enabled=False).exists()
+
+    def test_trigger_skips_disconnected_and_active(self, hub_id, connections):
+        """Test triggers only queue connected connections without an active log."""
+        SyncLog.objects.create(hub_id=hub_id, connection=connections[0], entity_type='all', status='pending')
+        created = bulk.trigger_syncs(AccountingConnection.objects.filter(hub_id=hub_id))
+        assert {log.connection_id for log in created} == {connections[1].pk, connections[2].pk}
+        assert SyncLog.objects.filter(status='pending').count() == 3
+
+    def test_trigger_queues_behind_running(self, hub_id, connections):
+        """Test a running log does not absorb a trigger, since it has already read its source."""
+        SyncLog.objects.create(hub_id=hub_id, connection=connections[0], entity_type='all', status='running')
+        created = bulk.trigger_syncs(AccountingConnection.objects.filter(pk=connections[0].pk))
+        assert [log.status for log in created] == ['pending']
+        assert bulk.trigger_syncs(AccountingConnection.objects.filter(pk=connections[0].pk)) == []
+
+    def test_concurrent_trigger_skipped(self, hub_id, connections, monkeypatch):
+        """Test a pending log queued by a concurrent request wins over the coalescing lookup."""
+        SyncLog.objects.create(hub_id=hub_id, connection=connections[0], entity_type='all', status='pending')
+        monkeypatch.setattr(bulk, '_pending_keys', lambda connection_ids: set())
+        created = bulk.trigger_syncs(AccountingConnection.objects.filter(hub_id=hub_id))
+        assert {log.connection_id for log in created} == {connections[1].pk, connections[2].pk}
+        assert SyncLog.objects.filter(connection=connections[0], status='pending').count() == 1
+        assert ConnectionSyncStats.objects.get(connection=connections[0]).total_logs == 1
+
+    def test_trigger_updates_stats(self, hub_id, connections):
+        """Test bulk-created logs are counted in the connection totals."""
+        bulk.trigger_syncs(AccountingConnection.objects.filter(pk=connections[1].pk))
+        assert ConnectionSyncStats.objects.get(connection=connections[1]).total_logs == 1
+
+    def test_retry_failed_dedupes(self, hub_id, connections):
+        """Test one retry is queued per failed (connection, direction, entity type)."""
+        for _ in range(3):
+            SyncLog.objects.create(hub_id=hub_id, connection=connections[0], entity_type='invoices', status='error')
+        SyncLog.objects.create(hub_id=hub_id, connection=connections[1], entity_type='invoices', status='success')
+        SyncLog.objects.create(hub_id=hub_id, connection=connections[3], entity_type='invoices', status='error')
+        created = bulk.retry_failed_logs(SyncLog.objects.filter(hub_id=hub_id))
+        assert [(log.connection_id, log.entity_type, log.status) for log in created] == [
+            (connections[0].pk, 'invoices', 'pending'),
+        ]
+        assert bulk.retry_failed_logs(SyncLog.objects.filter(hub_id=hub_id)) == []
+
+    def test_retry_includes_dead_lettered_partial(self, hub_id, connections):
+        """Test partial logs are retried once automatic retries gave up on them."""
+        SyncLog.objects.create(hub_id=hub_id, connection=connections[0], entity_type='invoices', status='partial')
+        SyncLog.objects.create(hub_id=hub_id, connection=connections[1], entity_type='invoices', status='partial',
+                               dead_letter=True)
+        created = bulk.retry_failed_logs(SyncLog.objects.filter(hub_id=hub_id))
+        assert [(log.connection_id, log.retry_failed_only) for log in created] == [(connections[1].pk, False)]
+
+    def test_retry_resends_stored_failures(self, hub_id, connected_connection, fake_provider, monkeypatch):
+        """Test a log with stored record failures is retried as a failed-only run that consumes them."""
+        connection = connected_connection
+        SyncLog.objects.create(hub_id=hub_id, connection=connection, entity_type='invoices', status='partial',
+                               dead_letter=True)
+        record_failures(connection, 'push', 'invoices', [('7', {'ref': '7'}, '', 'Invalid')])
+        monkeypatch.setitem(push.PUSH_SOURCES, 'invoices', lambda c, since: iter(()))
+        fake_provider.route('POST', '/Invoices', handler=lambda query, body: (
+            200, {'Invoices': [{**r, 'InvoiceID': f'X-{r["ref"]}'} for r in body['Invoices']]}, {},
+        ))
+
+        [log] = bulk.retry_failed_logs(SyncLog.objects.filter(hub_id=hub_id))
+        assert (log.connection_id, log.retry_failed_only) == (connection.pk, True)
+        assert bulk.retry_failed_logs(SyncLog.objects.filter(hub_id=hub_id)) == []
+        run_log(claim_pending_logs('worker-1', 1)[0])
+
+        log.refresh_from_db()
+        assert (log.status, log.records_synced) == ('success', 1)
+        assert [r['body']['Invoices'] for r in fake_provider.requests] == [[{'ref': '7'}]]
+        assert not SyncRecordFailure.objects.exists()
+
+
+@pytest.mark.django_db
+class TestBulkActionViews:
+    """Bulk action view tests."""
+
+    def test_connections_scope_filter(self, auth_client, hub_id, connections):
+        """Test scope=filter applies the action to every row matching q."""
+        url = reverse('accounting_sync:accounting_connections_bulk_action')
+        response = auth_client.post(url, {'scope': 'filter', 'q': 'xero', 'action': 'enable_sync'})
+        assert response.status_code == 200
+        enabled = set(AccountingConnection.objects.filter(sync_enabled=True).values_list('name', flat=True))
+        assert enabled == {'Xero 0', 'Xero 1', 'Xero 2'}
+
+    def test_connections_trigger_ids(self, auth_client, hub_id, connections):
+        """Test triggering the posted ids."""
+        url = reverse('accounting_sync:accounting_connections_bulk_action')
+        auth_client.post(url, {'ids': f'{connections[0].pk},{connections[3].pk}', 'action': 'trigger'})
+        assert list(SyncLog.objects.values_list('connection_id', flat=True)) == [connections[0].pk]
+
+    def test_logs_retry_scope_filter(self, auth_client, hub_id, connections):
+        """Test retrying every failed log matching the search."""
+        SyncLog.objects.create(hub_id=hub_id, connection=connections[0], entity_type='invoices',
+                               status='error', error_message='Rate limited')
+        SyncLog.objects.create(hub_id=hub_id, connection=connections[1], entity_type='payments',
+                               status='error', error_message='Validation failed')
+        url = reverse('accounting_sync:sync_logs_bulk_action')
+        auth_client.post(url, {'scope': 'filter', 'q': 'rate', 'action': 'retry'})
+        pending = SyncLog.objects.filter(status='pending')
+        assert list(pending.values_list('connection_id', 'entity_type')) == [(connections[0].pk, 'invoices')]
+
+    def test_other_hub_untouched(self, auth_client, connections):
+        """Test filter selections never leave the session's hub."""
+        other = AccountingConnection.objects.create(
+            hub_id=uuid.uuid4(), provider='xero', name='Xero elsewhere', status='connected', sync_enabled=True,
+        )
+        url = reverse('accounting_sync:accounting_connections_bulk_action')
+        auth_client.post(url, {'scope': 'filter', 'q': 'xero', 'action': 'disable_sync'})
+        other.refresh_from_db()
+        assert other.sync_enabled is True
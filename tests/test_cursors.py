@@ -0,0 +1,48 @@
+"""Tests for accounting_sync incremental sync cursors."""
+from datetime import timedelta
+
+import pytest
+from django.utils import timezone
+
+from accounting_sync import engine
+from accounting_sync.cursors import advance_cursor, get_cursor, reset_cursors
+from accounting_sync.engine import SyncResult, claim_pending_logs, run_log
+
+
+@pytest.mark.django_db
+class TestSyncCursor:
+    """SyncCursor service tests."""
+
+    def test_cursor_per_entity(self, connected_connection):
+        """Test entity types and directions get independent cursors."""
+        invoices = get_cursor(connected_connection, 'invoices', 'push')
+        payments = get_cursor(connected_connection, 'payments', 'push')
+        pulled = get_cursor(connected_connection, 'invoices', 'pull')
+        assert len({invoices.pk, payments.pk, pulled.pk}) == 3
+        assert get_cursor(connected_connection, 'invoices', 'push').pk == invoices.pk
+
+    def test_advance_is_monotonic(self, connected_connection):
+        """Test the watermark never moves backwards."""
+        cursor = get_cursor(connected_connection, 'invoices', 'push')
+        now = timezone.now()
+        advance_cursor(cursor, watermark=now)
+        advance_cursor(get_cursor(connected_connection, 'invoices', 'push'), watermark=now - timedelta(hours=1))
+        assert get_cursor(connected_connection, 'invoices', 'push').watermark == now
+
+    def test_reset(self, connected_connection):
+        """Test reset clears watermarks for a full re-sync."""
+        cursor = get_cursor(connected_connection, 'invoices', 'push')
+        advance_cursor(cursor, watermark=timezone.now(), change_token='abc')
+        reset_cursors(connected_connection, entity_type='invoices')
+        cursor.refresh_from_db()
+        assert cursor.watermark is None
+        assert cursor.change_token == ''
+
+    def test_engine_advances_only_synced_entity(self, pending_sync_log, monkeypatch):
+        """Test a successful invoices sync leaves other entities untouched."""
+        monkeypatch.setitem(engine.SYNC_HANDLERS, 'push', lambda log: SyncResult(records_synced=1))
+        run_log(claim_pending_logs('worker-1', 1)[0])
+        pending_sync_log.refresh_from_db()
+        connection = pending_sync_log.connection
+        assert get_cursor(connection, 'invoices', 'push').watermark == pending_sync_log.started_at
+        assert get_cursor(connection, 'payments', 'push').watermark is None
@@ -0,0 +1,134 @@
+"""Tests for the accounting_sync sync engine."""
+from datetime import timedelta
+
+import pytest
+from django.utils import timezone
+
+from accounting_sync import engine, metrics, push
+from accounting_sync.engine import SyncResult, SyncWorker, claim_pending_logs, run_log
+from accounting_sync.models import SyncLog
+
+
+@pytest.fixture
+def push_handler(monkeypatch):
+    """Register a push handler that reports a fixed result."""
+    calls = []
+
+    def handler(log):
+        calls.append(log.pk)
+        return SyncResult(records_synced=3)
+
+    monkeypatch.setitem(engine.SYNC_HANDLERS, 'push', handler)
+    return calls
+
+
+@pytest.mark.django_db
+class TestClaimPendingLogs:
+    """claim_pending_logs tests."""
+
+    def test_claims_pending_log(self, pending_sync_log):
+        """Test a pending log is moved to running."""
+        claimed = claim_pending_logs('worker-1', 5)
+        assert [log.pk for log in claimed] == [pending_sync_log.pk]
+        pending_sync_log.refresh_from_db()
+        assert pending_sync_log.status == 'running'
+        assert pending_sync_log.claimed_by == 'worker-1'
+        assert pending_sync_log.started_at is not None
+
+    def test_claimed_log_not_claimed_twice(self, pending_sync_log):
+        """Test a second worker sees nothing to claim."""
+        claim_pending_logs('worker-1', 5)
+        assert claim_pending_logs('worker-2', 5) == []
+
+    def test_one_log_per_connection(self, hub_id, pending_sync_log, connected_connection):
+        """Test two pending logs of one connection are not claimed together."""
+        SyncLog.objects.create(hub_id=hub_id, connection=connected_connection, entity_type='payments', status='pending')
+        assert len(claim_pending_logs('worker-1', 5)) == 1
+        assert claim_pending_logs('worker-2', 5) == []
+
+    def test_expired_lease_frees_connection(self, hub_id, pending_sync_log, connected_connection, settings):
+        """Test a log left running by a dead worker is failed and its connection claimed again."""
+        settings.ACCOUNTING_SYNC_CLAIM_TIMEOUT = 60
+        claim_pending_logs('worker-1', 1)
+        # worker-1 dies: no heartbeat for longer than the timeout.
+        SyncLog.objects.filter(pk=pending_sync_log.pk).update(heartbeat_at=timezone.now() - timedelta(seconds=120))
+        other = SyncLog.objects.create(hub_id=hub_id, connection=connected_connection, entity_type='payments',
+                                       status='pending')
+        assert [log.pk for log in claim_pending_logs('worker-2', 5)] == [other.pk]
+        pending_sync_log.refresh_from_db()
+        assert (pending_sync_log.status, pending_sync_log.error_message) == ('error', engine.LEASE_EXPIRED_MESSAGE)
+        assert SyncLog.objects.filter(retry_of=pending_sync_log, status='pending').exists()
+
+    def test_heartbeat_keeps_lease(self, pending_sync_log, settings):
+        """Test a heartbeating worker keeps its log."""
+        settings.ACCOUNTING_SYNC_CLAIM_TIMEOUT = 60
+        claim_pending_logs('worker-1', 1)
+        SyncLog.objects.filter(pk=pending_sync_log.pk).update(heartbeat_at=timezone.now() - timedelta(seconds=120))
+        engine.heartbeat([pending_sync_log.pk], 'worker-1')
+        assert engine.reap_expired_logs() == []
+
+
+@pytest.mark.django_db
+class TestRunLog:
+    """run_log tests."""
+
+    def test_success(self, pending_sync_log, push_handler):
+        """Test a successful handler finishes the log."""
+        log = claim_pending_logs('worker-1', 1)[0]
+        run_log(log)
+        pending_sync_log.refresh_from_db()
+        assert pending_sync_log.status == 'success'
+        assert pending_sync_log.records_synced == 3
+        assert pending_sync_log.finished_at is not None
+        pending_sync_log.connection.refresh_from_db()
+        assert pending_sync_log.connection.last_sync_at is not None
+
+    def test_handler_exception_marks_error(self, pending_sync_log, monkeypatch):
+        """Test handler errors are captured on the log."""
+        def handler(log):
+            raise RuntimeError('provider down')
+
+        monkeypatch.setitem(engine.SYNC_HANDLERS, 'push', handler)
+        run_log(claim_pending_logs('worker-1', 1)[0])
+        pending_sync_log.refresh_from_db()
+        assert pending_sync_log.status == 'error'
+        assert pending_sync_log.error_message == 'provider down'
+
+    def test_finish_failure_leaves_running(self, pending_sync_log, push_handler, monkeypatch):
+        """Test a log whose finishing step raises is still moved out of running."""
+        def broken(log):
+            raise RuntimeError('metrics table locked')
+
+        monkeypatch.setattr(metrics, 'observe_sync', broken)
+        run_log(claim_pending_logs('worker-1', 1)[0])
+        pending_sync_log.refresh_from_db()
+        assert pending_sync_log.status == 'error'
+        assert 'metrics table locked' in pending_sync_log.error_message
+
+    def test_unknown_provider_dead_letters(self, pending_sync_log, monkeypatch):
+        """Test a sync for a removed provider is dead-lettered at once instead of retried."""
+        monkeypatch.setitem(engine.SYNC_HANDLERS, 'push', push.run_push)
+        pending_sync_log.connection.provider = 'freshbooks'
+        pending_sync_log.connection.save()
+        run_log(claim_pending_logs('worker-1', 1)[0])
+        pending_sync_log.refresh_from_db()
+        assert (pending_sync_log.status, pending_sync_log.dead_letter) == ('error', True)
+        assert not pending_sync_log.retries.exists()
+
+    def test_partial(self, pending_sync_log, monkeypatch):
+        """Test mixed results produce a partial status."""
+        monkeypatch.setitem(engine.SYNC_HANDLERS, 'push', lambda log: SyncResult(records_synced=2, records_failed=1))
+        run_log(claim_pending_logs('worker-1', 1)[0])
+        pending_sync_log.refresh_from_db()
+        assert pending_sync_log.status == 'partial'
+
+
+@pytest.mark.django_db(transaction=True)
+class TestSyncWorker:
+    """SyncWorker tests."""
+
+    def test_run_once(self, pending_sync_log, push_handler):
+        """Test a worker drains the queue."""
+        assert SyncWorker(concurrency=2, worker_id='w').run_once() == 1
+        assert push_handler == [pending_sync_log.pk]
+        assert SyncWorker(concurrency=2, worker_id='w').run_once() == 0
@@ -0,0 +1,82 @@
+"""Tests for accounting_sync streaming exports."""
+import csv
+import io
+
+import pytest
+from django.http import StreamingHttpResponse
+from django.urls import reverse
+
+from accounting_sync import export
+from accounting_sync.models import SyncLog
+
+
+@pytest.fixture
+def export_logs(hub_id, connected_connection):
+    SyncLog.objects.bulk_create([
+        SyncLog(hub_id=hub_id, connection=connected_connection, direction='push', entity_type='invoices',
+                status='error', records_synced=i, error_message=f'Failure {i}')
+        for i in range(25)
+    ])
+
+
+def read_csv(response):
+    return list(csv.reader(io.StringIO(b''.join(response.streaming_content).decode())))
+
+
+@pytest.mark.django_db
+class TestSyncLogExport:
+    """Sync log export tests."""
+
+    def test_csv_streams_all_rows(self, auth_client, export_logs, monkeypatch):
+        """Test the CSV export streams every row in chunks with the connection name joined."""
+        monkeypatch.setattr(export, 'EXPORT_CHUNK_SIZE', 10)
+        url = reverse('accounting_sync:sync_logs_list')
+        response = auth_client.get(url, {'export': 'csv'})
+        assert isinstance(response, StreamingHttpResponse)
+        assert response['Content-Disposition'] == 'attachment; filename="sync_logs.csv"'
+        rows = read_csv(response)
+        assert rows[0][0] == 'AccountingConnection'
+        assert len(rows) == 26
+        assert {row[0] for row in rows[1:]} == {'Xero Demo'}
+
+    def test_csv_respects_filters(self, auth_client, export_logs):
+        """Test the export uses the list's search and sort."""
+        url = reverse('accounting_sync:sync_logs_list')
+        response = auth_client.get(url, {'export': 'csv', 'sort': 'records_synced', 'dir': 'asc', 'q': 'failure'})
+        rows = read_csv(response)
+        assert [int(row[2]) for row in rows[1:]] == list(range(25))
+
+    def test_excel_export(self, auth_client, export_logs):
+        """Test the Excel export is a streamed workbook with every row."""
+        openpyxl = pytest.importorskip('openpyxl')
+        url = reverse('accounting_sync:sync_logs_list')
+        response = auth_client.get(url, {'export': 'excel'})
+        assert response.streaming
+        workbook = openpyxl.load_workbook(io.BytesIO(b''.join(response.streaming_content)))
+        assert workbook.active.max_row == 26
+
+
+@pytest.mark.django_db
+class TestConnectionExport:
+    """Connection export tests."""
+
+    def test_csv(self, auth_client, connected_connection):
+        """Test the connection CSV export."""
+        url = reverse('accounting_sync:accounting_connections_list')
+        rows = read_csv(auth_client.get(url, {'export': 'csv'}))
+        assert rows[0][:2] == ['Name', 'Status']
+        assert rows[1][:2] == [connected_connection.name, 'connected']
+
+    def test_tokens_not_exported(self, auth_client, connected_connection):
+        """Test CSV and Excel exports only say whether the tokens are set."""
+        url = reverse('accounting_sync:accounting_connections_list')
+        rows = read_csv(auth_client.get(url, {'export': 'csv'}))
+        assert rows[0][-2:] == ['Access Token Set', 'Refresh Token Set']
+        cells = {cell for row in rows for cell in row}
+        assert not cells & {connected_connection.access_token, connected_connection.refresh_token}
+
+        openpyxl = pytest.importorskip('openpyxl')
+        response = auth_client.get(url, {'export': 'excel'})
+        workbook = openpyxl.load_workbook(io.BytesIO(b''.join(response.streaming_content)))
+        values = {cell for row in workbook.active.iter_rows(values_only=True) for cell in row}
+        assert not values & {connected_connection.access_token, connected_connection.refresh_token}
@@ -0,0 +1,115 @@
+"""Tests for the accounting_sync versioned fragment cache."""
+import uuid
+
+import pytest
+from django.db import connection as db_connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from accounting_sync import bulk, fragments
+from accounting_sync.fragments import FragmentCache, get_version
+from accounting_sync.models import AccountingConnection, SyncLog
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clean_cache():
+    fragments.fragment_cache.clear()
+    yield fragments.fragment_cache
+    fragments.fragment_cache.clear()
+
+
+def get(client, url, **params):
+    with CaptureQueriesContext(db_connection) as ctx:
+        response = client.get(url, params, HTTP_HX_REQUEST='true', HTTP_HX_TARGET='datatable-body')
+    assert response.status_code == 200
+    return response, len(ctx.captured_queries)
+
+
+class TestFragmentCache:
+    """FragmentCache tests."""
+
+    def test_evicts_least_recently_used(self):
+        """Test the entry not read for longest is evicted first."""
+        cache = FragmentCache(max_entries=2)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.get('a')
+        cache.set('c', 3)
+        assert (cache.get('a'), cache.get('b'), cache.get('c')) == (1, None, 3)
+
+    def test_expires(self):
+        """Test entries older than the TTL are misses."""
+        clock = FakeClock()
+        cache = FragmentCache(ttl=10, clock=clock)
+        cache.set('a', 1)
+        clock.now = 11
+        assert cache.get('a') is None
+        assert len(cache) == 0
+
+
+@pytest.mark.django_db
+class TestVersion:
+    """Hub version counter tests."""
+
+    def test_bumped_on_writes(self, hub_id, connected_connection):
+        """Test connection and log saves and set-based writes bump the hub's version."""
+        version = get_version(hub_id)
+        SyncLog.objects.create(hub_id=hub_id, connection=connected_connection, direction='push',
+                               entity_type='invoices', status='success')
+        assert get_version(hub_id) == version + 1
+        bulk.set_sync_enabled(AccountingConnection.objects.filter(hub_id=hub_id), False)
+        assert get_version(hub_id) == version + 2
+        bulk.trigger_syncs(AccountingConnection.objects.filter(hub_id=hub_id))
+        assert get_version(hub_id) == version + 3
+
+    def test_other_hubs_untouched(self, hub_id, connected_connection):
+        """Test a write only invalidates its own hub."""
+        other = AccountingConnection.objects.create(hub_id=uuid.uuid4(), provider='xero', name='Other')
+        before = get_version(hub_id)
+        other.save()
+        assert get_version(hub_id) == before
+
+
+@pytest.mark.django_db
+class TestCachedViews:
+    """Cached fragment view tests."""
+
+    def test_connection_list_hit_and_invalidation(self, auth_client, hub_id, connected_connection, clean_cache):
+        """Test a repeated request is served from the cache until a connection changes."""
+        url = reverse('accounting_sync:accounting_connections_list')
+        first, misses = get(auth_client, url)
+        second, hits = get(auth_client, url)
+        assert second.content == first.content
+        assert hits < misses
+        assert clean_cache.hits == 1
+
+        connected_connection.name = 'Renamed Xero'
+        connected_connection.save()
+        third, _ = get(auth_client, url)
+        assert b'Renamed Xero' in third.content
+
+    def test_params_are_part_of_the_key(self, auth_client, connected_connection, clean_cache):
+        """Test different sorts and searches are cached separately."""
+        url = reverse('accounting_sync:accounting_connections_list')
+        get(auth_client, url)
+        response, _ = get(auth_client, url, q='nothing-matches')
+        assert b'Xero Demo' not in response.content
+        assert clean_cache.hits == 0
+
+    def test_dashboard_hit(self, auth_client, connected_connection, clean_cache):
+        """Test a dashboard reload is a cache hit."""
+        url = reverse('accounting_sync:dashboard')
+        auth_client.get(url, HTTP_HX_REQUEST='true')
+        with CaptureQueriesContext(db_connection) as ctx:
+            response = auth_client.get(url, HTTP_HX_REQUEST='true')
+        assert response.status_code == 200
+        assert clean_cache.hits == 1
+        assert not any('accounting_sync_connectionsyncstats' in q['sql'] for q in ctx.captured_queries)
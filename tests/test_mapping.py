@@ -0,0 +1,74 @@
+"""Tests for accounting_sync external ID mappings."""
+import pytest
+
+from accounting_sync import push
+from accounting_sync.engine import claim_pending_logs, run_log
+from accounting_sync.mapping import content_hash
+from accounting_sync.models import ExternalIdMapping, SyncLog
+from accounting_sync.push import OutgoingRecord
+
+
+def xero_invoices(query, body):
+    """Fake Xero POST assigning InvoiceID = ref for new records."""
+    items = [{**r, 'InvoiceID': r.get('InvoiceID') or f"remote-{r['ref']}"} for r in body['Invoices']]
+    return 200, {'Invoices': items}, {}
+
+
+@pytest.fixture
+def invoices(monkeypatch):
+    """Register an invoices source backed by a mutable dict."""
+    data = {str(i): {'ref': str(i), 'total': '10.00'} for i in range(5)}
+    monkeypatch.setitem(push.PUSH_SOURCES, 'invoices', lambda connection, since: [
+        OutgoingRecord('invoices', local_id, dict(payload)) for local_id, payload in data.items()
+    ])
+    return data
+
+
+def sync_again(log):
+    """Queue and run another push of the same connection and entity."""
+    new_log = SyncLog.objects.create(hub_id=log.hub_id, connection=log.connection, entity_type='invoices', status='pending')
+    run_log(claim_pending_logs('worker-1', 1)[0])
+    new_log.refresh_from_db()
+    return new_log
+
+
+class TestContentHash:
+    """content_hash tests."""
+
+    def test_key_order_independent(self):
+        """Test the hash ignores dict key order."""
+        assert content_hash({'a': 1, 'b': 2}) == content_hash({'b': 2, 'a': 1})
+        assert content_hash({'a': 1}) != content_hash({'a': 2})
+
+
+@pytest.mark.django_db
+class TestMappedPush:
+    """Push with external ID mappings."""
+
+    def test_first_push_records_mappings(self, fake_provider, pending_sync_log, invoices):
+        """Test pushed records get a mapping with remote id and hash."""
+        fake_provider.route('POST', '/Invoices', handler=xero_invoices)
+        run_log(claim_pending_logs('worker-1', 1)[0])
+        mapping = ExternalIdMapping.objects.get(local_id='3')
+        assert mapping.remote_id == 'remote-3'
+        assert mapping.content_hash == content_hash(invoices['3'])
+
+    def test_unchanged_records_skipped(self, fake_provider, pending_sync_log, invoices):
+        """Test a second sync with no changes sends nothing."""
+        fake_provider.route('POST', '/Invoices', handler=xero_invoices)
+        run_log(claim_pending_logs('worker-1', 1)[0])
+        sent = len(fake_provider.requests)
+        log = sync_again(pending_sync_log)
+        assert log.status == 'success'
+        assert len(fake_provider.requests) == sent
+
+    def test_changed_record_is_targeted_update(self, fake_provider, pending_sync_log, invoices):
+        """Test only the changed record is sent, addressed by its remote id."""
+        fake_provider.route('POST', '/Invoices', handler=xero_invoices)
+        run_log(claim_pending_logs('worker-1', 1)[0])
+        invoices['2']['total'] = '99.00'
+        log = sync_again(pending_sync_log)
+        assert log.records_synced == 1
+        assert fake_provider.requests[-1]['body']['Invoices'] == [
+            {'ref': '2', 'total': '99.00', 'InvoiceID': 'remote-2'}
+        ]
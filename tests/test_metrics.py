@@ -0,0 +1,122 @@
+"""Tests for accounting_sync phase timings and the metrics endpoint."""
+import pytest
+from django.urls import reverse
+
+from accounting_sync import bulk, engine, metrics, push, tracing
+from accounting_sync.engine import SyncResult, claim_pending_logs, run_log
+from accounting_sync.models import SyncDurationStats, SyncLog
+from accounting_sync.push import OutgoingRecord
+
+
+def xero_batch(query, body):
+    return 200, {'Invoices': [{**record, 'InvoiceID': f'X-{record["ref"]}'} for record in body['Invoices']]}, {}
+
+
+class TestSpans:
+    """span / SpanRecorder tests."""
+
+    def test_noop_without_recorder(self):
+        """Test spans outside a sync record nothing and still run the block."""
+        with tracing.span('fetch') as timed:
+            timed.add(3)
+        assert timed.count == 3
+
+    def test_totals_per_phase(self):
+        """Test spans of one name are summed with their call and record counts."""
+        log = SyncLog()
+        with tracing.record_spans(log):
+            for _ in range(3):
+                with tracing.span('fetch', count=10):
+                    pass
+            with tracing.span('db_write') as timed:
+                timed.add(7)
+        timings = tracing.get_timings(log)
+        assert (timings['fetch']['calls'], timings['fetch']['count']) == (3, 30)
+        assert timings['db_write']['count'] == 7
+        assert timings['fetch']['ms'] >= 0
+
+    def test_buckets(self):
+        """Test durations land in the smallest bucket that holds them."""
+        assert metrics.bucket_for(0.05) == '0.1'
+        assert metrics.bucket_for(3) == '5'
+        assert metrics.bucket_for(10 ** 6) == '+Inf'
+
+
+@pytest.mark.django_db
+class TestSyncTimings:
+    """Engine timing tests."""
+
+    def test_push_records_phases(self, fake_provider, pending_sync_log, monkeypatch):
+        """Test a push stores its phase spans on the log and feeds the histograms."""
+        records = [OutgoingRecord('invoices', str(i), {'ref': str(i)}) for i in range(25)]
+        monkeypatch.setitem(push.PUSH_SOURCES, 'invoices', lambda connection, since: iter(records))
+        fake_provider.route('POST', '/Invoices', handler=xero_batch)
+        run_log(claim_pending_logs('worker-1', 1)[0])
+
+        pending_sync_log.refresh_from_db()
+        timings = pending_sync_log.timings
+        assert {'transform', 'push', 'db_write'} <= set(timings)
+        assert timings['transform']['count'] == 25
+        assert timings['push']['count'] == 25
+        phases = set(SyncDurationStats.objects.filter(provider='xero').values_list('phase', flat=True))
+        assert {'total', 'transform', 'push', 'db_write'} <= phases
+
+    def test_failed_sync_keeps_spans(self, pending_sync_log, monkeypatch):
+        """Test spans recorded before an error are still stored."""
+        def handler(log):
+            with tracing.span('fetch', count=1):
+                pass
+            raise RuntimeError('boom')
+
+        monkeypatch.setitem(engine.SYNC_HANDLERS, 'push', handler)
+        run_log(claim_pending_logs('worker-1', 1)[0])
+        pending_sync_log.refresh_from_db()
+        assert pending_sync_log.status == 'error'
+        assert pending_sync_log.timings['fetch']['calls'] == 1
+
+
+@pytest.mark.django_db
+class TestMetricsEndpoint:
+    """Prometheus endpoint tests."""
+
+    def test_disabled_without_token(self, client):
+        """Test the endpoint does not exist unless a token is configured."""
+        assert client.get(reverse('accounting_sync:metrics')).status_code == 404
+
+    def test_requires_token(self, client, settings):
+        """Test scrapers must send the configured bearer token."""
+        settings.ACCOUNTING_SYNC_METRICS_TOKEN = 'secret'
+        response = client.get(reverse('accounting_sync:metrics'), HTTP_AUTHORIZATION='Bearer wrong')
+        assert response.status_code == 401
+
+    def test_exposition(self, client, settings, pending_sync_log, monkeypatch):
+        """Test throughput, queue depth and histograms are exposed per provider."""
+        settings.ACCOUNTING_SYNC_METRICS_TOKEN = 'secret'
+        SyncLog.objects.create(
+            hub_id=pending_sync_log.hub_id, connection=pending_sync_log.connection,
+            direction='pull', entity_type='invoices', status='pending',
+        )
+        monkeypatch.setitem(engine.SYNC_HANDLERS, 'push', lambda log: SyncResult(records_synced=4))
+        run_log(claim_pending_logs('worker-1', 1)[0])
+
+        response = client.get(reverse('accounting_sync:metrics'), HTTP_AUTHORIZATION='Bearer secret')
+        assert response.status_code == 200
+        assert response['Content-Type'].startswith('text/plain; version=0.0.4')
+        lines = response.content.decode().splitlines()
+        assert 'accounting_sync_logs_finished_total{provider="xero",status="success"} 1' in lines
+        assert 'accounting_sync_records_synced_total{provider="xero"} 4' in lines
+        assert 'accounting_sync_queue_depth{provider="xero",status="pending"} 1' in lines
+        assert 'accounting_sync_duration_seconds_bucket{provider="xero",le="+Inf"} 1' in lines
+        assert 'accounting_sync_duration_seconds_count{provider="xero"} 1' in lines
+
+    def test_counters_survive_deleted_logs(self, client, settings, pending_sync_log, monkeypatch):
+        """Test deleting finished logs never makes a counter go down."""
+        settings.ACCOUNTING_SYNC_METRICS_TOKEN = 'secret'
+        monkeypatch.setitem(engine.SYNC_HANDLERS, 'push', lambda log: SyncResult(records_synced=4))
+        run_log(claim_pending_logs('worker-1', 1)[0])
+        bulk.delete_logs(SyncLog.objects.all())
+
+        response = client.get(reverse('accounting_sync:metrics'), HTTP_AUTHORIZATION='Bearer secret')
+        lines = response.content.decode().splitlines()
+        assert 'accounting_sync_logs_finished_total{provider="xero",status="success"} 1' in lines
+        assert 'accounting_sync_records_synced_total{provider="xero"} 4' in lines
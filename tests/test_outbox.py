@@ -0,0 +1,158 @@
+"""Tests for the accounting_sync change outbox."""
+from datetime import date, timedelta
+
+import pytest
+from django.db import transaction
+from django.utils import timezone
+
+from accounting_sync import outbox, push
+from accounting_sync.cursors import advance_cursor, get_cursor
+from accounting_sync.engine import claim_pending_logs, run_log
+from accounting_sync.models import AccountingConnection, SyncLogDailySummary, SyncOutbox
+from accounting_sync.push import OutgoingRecord
+
+
+def xero_batch(query, body):
+    return 200, {'Invoices': [{**record, 'InvoiceID': f'X-{record["ref"]}'} for record in body['Invoices']]}, {}
+
+
+def as_record(row):
+    return OutgoingRecord('invoices', str(row.pk), {'ref': str(row.pk), 'logs': row.logs_count})
+
+
+@pytest.fixture
+def tracked(hub_id, connected_connection):
+    """Track SyncLogDailySummary rows as the 'invoices' source model."""
+    outbox.track_model(SyncLogDailySummary, 'invoices')
+    yield
+    outbox.untrack_model('invoices')
+
+
+@pytest.fixture
+def make_row(hub_id, connected_connection):
+    def make(days_ago=0, logs=1):
+        return SyncLogDailySummary.objects.create(
+            hub_id=hub_id, day=date.today() - timedelta(days=days_ago), connection=connected_connection,
+            entity_type='invoices', direction='push', logs_count=logs,
+        )
+    return make
+
+
+@pytest.fixture
+def loader(monkeypatch):
+    """Register a push source and loader over SyncLogDailySummary, recording loader calls."""
+    calls = []
+
+    def load(connection, local_ids):
+        calls.append(sorted(local_ids))
+        return [as_record(row) for row in SyncLogDailySummary.objects.filter(pk__in=local_ids)]
+
+    def source(connection, since):
+        calls.append('scan')
+        return [as_record(row) for row in SyncLogDailySummary.objects.all()]
+
+    monkeypatch.setitem(push.PUSH_LOADERS, 'invoices', load)
+    monkeypatch.setitem(push.PUSH_SOURCES, 'invoices', source)
+    return calls
+
+
+@pytest.mark.django_db
+class TestRecordChanges:
+    """Outbox population tests."""
+
+    def test_one_row_per_connection(self, hub_id, tracked, make_row):
+        """Test a save marks the record dirty for every connected connection of its hub."""
+        AccountingConnection.objects.create(hub_id=hub_id, provider='sage', name='Sage', status='connected')
+        AccountingConnection.objects.create(hub_id=hub_id, provider='sage', name='Off', status='disconnected')
+        AccountingConnection.objects.create(hub_id=hub_id, provider='sage', name='Gone', status='connected',
+                                            is_deleted=True)
+        row = make_row()
+        assert SyncOutbox.objects.filter(local_id=str(row.pk), operation='upsert').count() == 2
+
+    def test_record_changes_for_set_based_writes(self, tracked, make_row):
+        """Test record_changes queues records written without signals."""
+        rows = [make_row(i) for i in range(3)]
+        SyncOutbox.objects.all().delete()
+        SyncLogDailySummary.objects.update(logs_count=9)
+        assert not SyncOutbox.objects.exists()
+        assert outbox.record_changes('invoices', SyncLogDailySummary.objects.all()) == 3
+        assert set(SyncOutbox.objects.values_list('local_id', flat=True)) == {str(r.pk) for r in rows}
+
+    def test_repeated_edits_coalesce(self, tracked, make_row):
+        """Test many saves of one record leave one row that moves to the back."""
+        row = make_row()
+        first = SyncOutbox.objects.get()
+        for i in range(5):
+            row.logs_count = i
+            row.save()
+        again = SyncOutbox.objects.get()
+        assert again.pk == first.pk
+        assert again.updated_at >= first.updated_at
+
+    def test_delete(self, tracked, make_row):
+        """Test deleting a record queues a delete."""
+        row = make_row()
+        row_id = str(row.pk)
+        row.delete()
+        assert SyncOutbox.objects.get(local_id=row_id).operation == 'delete'
+
+    def test_rolled_back_change_not_queued(self, tracked, make_row):
+        """Test the outbox row shares the source change's transaction."""
+        with pytest.raises(RuntimeError):
+            with transaction.atomic():
+                make_row()
+                raise RuntimeError
+        assert not SyncOutbox.objects.exists()
+
+
+@pytest.mark.django_db
+class TestPushFromOutbox:
+    """Outbox-driven push tests."""
+
+    def test_first_push_scans_and_clears_outbox(self, fake_provider, pending_sync_log, tracked, make_row, loader):
+        """Test a connection's first push reads the source and drops the covered outbox rows."""
+        make_row(1)
+        make_row(2)
+        SyncOutbox.objects.update(updated_at=timezone.now() - timedelta(minutes=1))
+        fake_provider.route('POST', '/Invoices', handler=xero_batch)
+        run_log(claim_pending_logs('worker-1', 1)[0])
+        assert loader == ['scan']
+        assert not SyncOutbox.objects.exists()
+
+    def test_delta_push_drains_only_dirty_records(self, fake_provider, pending_sync_log, tracked, make_row, loader):
+        """Test later pushes load only the records in the outbox."""
+        rows = [make_row(i) for i in range(5)]
+        connection = pending_sync_log.connection
+        advance_cursor(get_cursor(connection, 'invoices', 'push'), watermark=timezone.now())
+        advance_cursor(get_cursor(connection, 'invoices', push.RESCAN_DIRECTION), watermark=timezone.now())
+        SyncOutbox.objects.exclude(local_id__in=[str(rows[1].pk), str(rows[3].pk)]).delete()
+        fake_provider.route('POST', '/Invoices', handler=xero_batch)
+        run_log(claim_pending_logs('worker-1', 1)[0])
+        pending_sync_log.refresh_from_db()
+        assert (pending_sync_log.status, pending_sync_log.records_synced) == ('success', 2)
+        assert loader == [sorted([str(rows[1].pk), str(rows[3].pk)])]
+        assert not SyncOutbox.objects.exists()
+
+    def test_change_during_drain_stays_queued(self, connected_connection, tracked, make_row):
+        """Test a record edited after its chunk was read is not acknowledged."""
+        row = make_row()
+        chunks = outbox.iter_outbox_chunks(connected_connection, 'invoices')
+        assert next(chunks) == [(str(row.pk), 'upsert')]
+        SyncOutbox.objects.update(updated_at=timezone.now() + timedelta(seconds=1))
+        assert list(chunks) == []
+        assert SyncOutbox.objects.count() == 1
+
+    def test_periodic_rescan_catches_missed_writes(self, fake_provider, pending_sync_log, tracked, make_row, loader):
+        """Test a due rescan reads the source since the last scan, next to the outbox drain."""
+        make_row()
+        connection = pending_sync_log.connection
+        last_scan = timezone.now() - timedelta(days=2)
+        advance_cursor(get_cursor(connection, 'invoices', 'push'), watermark=timezone.now())
+        advance_cursor(get_cursor(connection, 'invoices', push.RESCAN_DIRECTION), watermark=last_scan)
+        SyncOutbox.objects.all().delete()
+        fake_provider.route('POST', '/Invoices', handler=xero_batch)
+        run_log(claim_pending_logs('worker-1', 1)[0])
+        pending_sync_log.refresh_from_db()
+        assert loader == ['scan']
+        assert pending_sync_log.records_synced == 1
+        assert get_cursor(connection, 'invoices', push.RESCAN_DIRECTION).watermark > last_scan
@@ -0,0 +1,88 @@
+"""Tests for accounting_sync pull page prefetching."""
+import threading
+import time
+
+import pytest
+
+from accounting_sync.prefetch import get_prefetch_window, iter_pages
+from accounting_sync.providers import get_adapter
+from accounting_sync.providers.xero import XeroAdapter
+from accounting_sync.ratelimit import RateLimited
+
+
+class SlowPages:
+    """Fake Xero GET /Invoices handler with latency that records peak concurrency."""
+
+    def __init__(self, pages, page_size=10, latency=0.05):
+        self.pages = pages
+        self.page_size = page_size
+        self.latency = latency
+        self.active = 0
+        self.peak = 0
+        self.lock = threading.Lock()
+
+    def __call__(self, query, body):
+        with self.lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        time.sleep(self.latency)
+        with self.lock:
+            self.active -= 1
+        page = int(query.get('page', 1))
+        count = self.page_size if page <= self.pages else 0
+        return 200, {'Invoices': [{'InvoiceID': f'{page}-{i}'} for i in range(count)]}, {}
+
+
+@pytest.fixture
+def small_pages(monkeypatch):
+    monkeypatch.setattr(XeroAdapter, 'page_size', 10)
+
+
+class TestPrefetchWindow:
+    """get_prefetch_window tests."""
+
+    def test_setting(self, settings):
+        """Test the per-provider override and the floor of one page."""
+        adapter = XeroAdapter(None)
+        assert get_prefetch_window(adapter) == XeroAdapter.prefetch_window
+        settings.ACCOUNTING_SYNC_PULL_PREFETCH = {'xero': 0}
+        assert get_prefetch_window(adapter) == 1
+
+
+@pytest.mark.django_db(transaction=True)
+class TestIterPages:
+    """iter_pages tests against the fake provider."""
+
+    def test_pages_in_order_with_bounded_concurrency(self, fake_provider, connected_connection, small_pages):
+        """Test pages arrive in order while at most ``window`` requests run at once."""
+        handler = SlowPages(pages=12)
+        fake_provider.route('GET', '/Invoices', handler=handler)
+        pages = list(iter_pages(get_adapter(connected_connection), 'invoices', window=4))
+        assert [page[0]['InvoiceID'] for page in pages] == [f'{n}-0' for n in range(1, 13)]
+        assert 1 < handler.peak <= 4
+        # Requests past the last page are bounded by the window.
+        assert len(fake_provider.requests) <= 12 + 3
+
+    def test_window_overlaps_requests(self, fake_provider, connected_connection, small_pages):
+        """Test a window of one fetches sequentially while a window of four overlaps page latency."""
+        adapter = get_adapter(connected_connection)
+        sequential = SlowPages(pages=8)
+        fake_provider.route('GET', '/Invoices', handler=sequential)
+        list(adapter.iter_records('invoices', window=1))
+        assert sequential.peak == 1
+
+        prefetched = SlowPages(pages=8)
+        fake_provider.route('GET', '/Invoices', handler=prefetched)
+        list(adapter.iter_records('invoices', window=4))
+        assert 1 < prefetched.peak <= 4
+
+    def test_rate_limit_stops_pull(self, fake_provider, connected_connection, small_pages):
+        """Test a 429 on a prefetched page surfaces as RateLimited."""
+        def handler(query, body):
+            if query.get('page') == '3':
+                return 429, {}, {'Retry-After': '120'}
+            return 200, {'Invoices': [{'InvoiceID': str(i)} for i in range(10)]}, {}
+
+        fake_provider.route('GET', '/Invoices', handler=handler)
+        with pytest.raises(RateLimited):
+            list(iter_pages(get_adapter(connected_connection), 'invoices', window=4))
@@ -0,0 +1,107 @@
+"""Tests for accounting_sync live progress."""
+import json
+
+import pytest
+from django.urls import reverse
+
+from accounting_sync.engine import SyncResult, claim_pending_logs, finish_log
+from accounting_sync.models import SyncLog
+from accounting_sync.progress import HubSnapshots, ProgressReporter, progress_events
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def parse_events(messages):
+    return [json.loads(m.split('data: ', 1)[1]) for m in messages if m.startswith('event: progress')]
+
+
+@pytest.mark.django_db
+class TestProgressReporter:
+    """ProgressReporter tests."""
+
+    def test_throttles_writes(self, pending_sync_log):
+        """Test many advances within the interval cost one write."""
+        clock = FakeClock()
+        reporter = ProgressReporter(pending_sync_log, interval=1.0, clock=clock)
+        for _ in range(100):
+            reporter.advance(done=10, synced=9)
+        assert reporter.writes == 1
+        clock.now = 1.5
+        reporter.advance(done=10, synced=10)
+        assert reporter.writes == 2
+        pending_sync_log.refresh_from_db()
+        assert (pending_sync_log.progress_done, pending_sync_log.records_synced) == (1010, 910)
+
+    def test_close_flushes_pending_counts(self, pending_sync_log):
+        """Test close writes counts held back by the throttle."""
+        reporter = ProgressReporter(pending_sync_log, interval=60.0, clock=FakeClock())
+        reporter.set_phase('pushing', total=50)
+        reporter.advance(done=5)
+        reporter.close()
+        pending_sync_log.refresh_from_db()
+        assert (pending_sync_log.phase, pending_sync_log.progress_done, pending_sync_log.progress_total) == ('pushing', 5, 50)
+
+    def test_claim_and_finish_set_phase(self, pending_sync_log):
+        """Test the engine marks claimed logs starting and finished logs done."""
+        [log] = claim_pending_logs('worker-1', 1)
+        assert log.phase == 'starting'
+        finish_log(log, SyncResult(records_synced=3, records_failed=1))
+        log.refresh_from_db()
+        assert (log.phase, log.progress_done) == ('done', 4)
+
+
+@pytest.mark.django_db
+class TestProgressEvents:
+    """progress_events tests."""
+
+    def test_emits_changes_and_final_state(self, hub_id, pending_sync_log):
+        """Test events are sent only for changes, including the finished state."""
+        clock = FakeClock()
+        ticks = []
+
+        def sleep(seconds):
+            clock.now += seconds
+            ticks.append(clock.now)
+            if len(ticks) == 2:
+                SyncLog.objects.filter(pk=pending_sync_log.pk).update(status='success', phase='done', records_synced=7)
+
+        snapshots = HubSnapshots(ttl=1.0, clock=clock)
+        messages = list(progress_events(
+            hub_id, interval=1.0, lifetime=4.0, clock=clock, sleep=sleep, snapshots=snapshots,
+        ))
+        assert messages[0] == 'retry: 1000\n\n'
+        events = parse_events(messages)
+        assert [e['status'] for e in events] == ['pending', 'success']
+        assert events[-1]['records_synced'] == 7
+
+    def test_streams_share_one_query_per_tick(self, hub_id, pending_sync_log):
+        """Test every stream of a hub reads one snapshot per tick, including the final states."""
+        clock = FakeClock()
+        snapshots = HubSnapshots(ttl=1.0, clock=clock)
+        streams = [
+            progress_events(hub_id, interval=1.0, clock=clock, sleep=lambda seconds: None, snapshots=snapshots)
+            for _ in range(3)
+        ]
+        assert [next(stream) for stream in streams] == ['retry: 1000\n\n'] * 3
+        events = parse_events([next(stream) for stream in streams])
+        assert [e['status'] for e in events] == ['pending'] * 3
+        assert snapshots.refreshes == 1
+
+        clock.now = 1.0
+        SyncLog.objects.filter(pk=pending_sync_log.pk).update(status='success', phase='done')
+        events = parse_events([next(stream) for stream in streams])
+        assert [e['status'] for e in events] == ['success'] * 3
+        assert snapshots.refreshes == 2
+
+    def test_endpoint(self, auth_client, pending_sync_log, monkeypatch):
+        """Test the SSE endpoint streams text/event-stream."""
+        monkeypatch.setattr('accounting_sync.views.progress_events', lambda hub_id: iter(['retry: 2000\n\n']))
+        response = auth_client.get(reverse('accounting_sync:sync_progress_stream'))
+        assert response['Content-Type'] == 'text/event-stream'
+        assert b''.join(response.streaming_content) == b'retry: 2000\n\n'
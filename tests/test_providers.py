@@ -0,0 +1,62 @@
+"""Tests for accounting_sync provider adapters."""
+import pytest
+
+from accounting_sync.engine import is_retryable
+from accounting_sync.providers import PROVIDERS, ProviderError, UnknownProviderError, get_adapter, get_session
+
+
+@pytest.mark.django_db
+class TestRegistry:
+    """Provider registry tests."""
+
+    def test_builtin_providers(self):
+        """Test built-in adapters are registered."""
+        assert {'xero', 'quickbooks', 'sage'} <= set(PROVIDERS)
+
+    def test_get_adapter(self, connected_connection):
+        """Test adapter lookup by connection provider."""
+        assert get_adapter(connected_connection).name == 'xero'
+
+    def test_unknown_provider(self, accounting_connection):
+        """Test unknown providers raise a ProviderError the engine does not retry."""
+        with pytest.raises(UnknownProviderError) as exc:
+            get_adapter(accounting_connection)
+        assert isinstance(exc.value, ProviderError)
+        assert is_retryable(exc.value) is False
+
+
+class TestSessions:
+    """Pooled session tests."""
+
+    def test_session_shared_per_host(self):
+        """Test sessions are shared by host, not by path."""
+        assert get_session('https://api.xero.com/a') is get_session('https://api.xero.com/b')
+        assert get_session('https://api.xero.com/a') is not get_session('https://api.sage.com/a')
+
+
+@pytest.mark.django_db
+class TestXeroAdapter:
+    """XeroAdapter tests against the fake provider."""
+
+    def test_fetch_page(self, fake_provider, connected_connection):
+        """Test a page is fetched and parsed."""
+        fake_provider.route('GET', '/Invoices', payload={'Invoices': [{'InvoiceID': '1'}]})
+        records, has_more = get_adapter(connected_connection).fetch_page('invoices')
+        assert records == [{'InvoiceID': '1'}]
+        assert has_more is False
+
+    def test_connection_reused(self, fake_provider, connected_connection):
+        """Test repeated calls reuse one keep-alive socket."""
+        fake_provider.route('GET', '/Invoices', payload={'Invoices': []})
+        adapter = get_adapter(connected_connection)
+        for _ in range(10):
+            adapter.fetch_page('invoices')
+        assert len(fake_provider.requests) == 10
+        assert fake_provider.connections == 1
+
+    def test_http_error(self, fake_provider, connected_connection):
+        """Test HTTP errors raise ProviderError with the status code."""
+        fake_provider.route('POST', '/Invoices', status=400, payload={'Message': 'bad'})
+        with pytest.raises(ProviderError) as exc:
+            get_adapter(connected_connection).push_record('invoices', {})
+        assert exc.value.status_code == 400
@@ -0,0 +1,140 @@
+"""Tests for accounting_sync streaming pull."""
+import pytest
+
+from accounting_sync import pull
+from accounting_sync.engine import claim_pending_logs, run_log
+from accounting_sync.models import ExternalIdMapping, SyncCursor, SyncLog, SyncRecordFailure
+from accounting_sync.providers import get_adapter
+from accounting_sync.providers.xero import XeroAdapter
+from accounting_sync.pull import ChunkedPuller, iter_chunks
+
+
+def invoice_pages(count, page_size=10):
+    """Fake Xero GET /Invoices serving ``count`` invoices ``page_size`` at a time."""
+    def handler(query, body):
+        page = int(query.get('page', 1))
+        start = (page - 1) * page_size
+        items = [{'InvoiceID': f'inv-{i}', 'UpdatedDateUTC': 'v1'} for i in range(start, min(start + page_size, count))]
+        return 200, {'Invoices': items}, {}
+    return handler
+
+
+@pytest.fixture
+def invoice_target(monkeypatch, settings):
+    """Pull invoices into ExternalIdMapping rows keyed by the Xero id."""
+    def transform(connection, remote):
+        if remote['InvoiceID'] == 'inv-bad':
+            raise ValueError('Invoice has no contact')
+        return ExternalIdMapping(
+            hub_id=connection.hub_id, connection=connection, entity_type='invoices',
+            local_id=remote['InvoiceID'], remote_id=remote['InvoiceID'], remote_version=remote['UpdatedDateUTC'],
+        )
+
+    target = pull.PullTarget(
+        ExternalIdMapping, transform, ('connection', 'entity_type', 'local_id'), ('remote_version', 'updated_at'),
+    )
+    monkeypatch.setitem(pull.PULL_TARGETS, 'invoices', target)
+    monkeypatch.setattr(XeroAdapter, 'page_size', 10)
+    # Sequential fetches keep every query on the test's transaction.
+    settings.ACCOUNTING_SYNC_PULL_PREFETCH = {'xero': 1}
+    return target
+
+
+@pytest.fixture
+def pending_pull_log(hub_id, connected_connection):
+    return SyncLog.objects.create(
+        hub_id=hub_id, connection=connected_connection, direction='pull', entity_type='invoices', status='pending',
+    )
+
+
+class TestIterChunks:
+    """iter_chunks tests."""
+
+    def test_does_not_consume_ahead(self):
+        """Test the source is read one chunk at a time."""
+        consumed = []
+
+        def source():
+            for i in range(25):
+                consumed.append(i)
+                yield i
+
+        chunks = iter_chunks(source(), 10)
+        assert next(chunks) == list(range(10))
+        assert len(consumed) == 10
+        assert [len(c) for c in chunks] == [10, 5]
+
+
+@pytest.mark.django_db
+class TestChunkedPull:
+    """Pull pipeline tests against the fake provider."""
+
+    def test_pages_are_fetched_lazily(self, fake_provider, connected_connection, invoice_target):
+        """Test iter_records fetches the next page only when the current one is used up."""
+        fake_provider.route('GET', '/Invoices', handler=invoice_pages(35))
+        records = get_adapter(connected_connection).iter_records('invoices')
+        next(records)
+        assert len(fake_provider.requests) == 1
+        assert len(list(records)) == 34
+        assert len(fake_provider.requests) == 4
+
+    def test_chunked_upserts(self, fake_provider, pending_pull_log, invoice_target):
+        """Test records are written in chunk-sized upserts and re-pulls update in place."""
+        fake_provider.route('GET', '/Invoices', handler=invoice_pages(35))
+        puller = ChunkedPuller(pending_pull_log, get_adapter(pending_pull_log.connection), chunk_size=15)
+        puller.pull('invoices')
+        assert puller.chunks_written == 3
+        assert ExternalIdMapping.objects.count() == 35
+        ExternalIdMapping.objects.update(remote_version='old')
+        ChunkedPuller(pending_pull_log, get_adapter(pending_pull_log.connection), chunk_size=15).pull('invoices')
+        assert ExternalIdMapping.objects.count() == 35
+        assert not ExternalIdMapping.objects.filter(remote_version='old').exists()
+
+    def test_duplicate_keys_in_chunk(self, pending_pull_log, invoice_target):
+        """Test a key repeated inside one chunk is written once."""
+        adapter = get_adapter(pending_pull_log.connection)
+        adapter.iter_records = lambda entity_type, modified_since=None: iter([
+            {'InvoiceID': 'inv-1', 'UpdatedDateUTC': 'v1'},
+            {'InvoiceID': 'inv-1', 'UpdatedDateUTC': 'v2'},
+        ])
+        ChunkedPuller(pending_pull_log, adapter).pull('invoices')
+        assert ExternalIdMapping.objects.get().remote_version == 'v2'
+
+    def test_run_pull(self, fake_provider, pending_pull_log, invoice_target):
+        """Test the pull handler stores records and keeps rejected ones for a failed-only retry."""
+        def handler(query, body):
+            return 200, {'Invoices': [
+                {'InvoiceID': 'inv-1', 'UpdatedDateUTC': 'v1'},
+                {'InvoiceID': 'inv-bad', 'UpdatedDateUTC': 'v1'},
+            ]}, {}
+
+        fake_provider.route('GET', '/Invoices', handler=handler)
+        run_log(claim_pending_logs('worker-1', 1)[0])
+        pending_pull_log.refresh_from_db()
+        assert (pending_pull_log.status, pending_pull_log.records_synced) == ('partial', 1)
+        assert pending_pull_log.error_message == 'Invoice has no contact'
+        failure = SyncRecordFailure.objects.get(direction='pull')
+        assert (failure.record_key, failure.payload['InvoiceID']) == ('inv-bad', 'inv-bad')
+        assert pending_pull_log.retries.get().retry_failed_only is True
+
+    def test_failed_only_retry(self, fake_provider, pending_pull_log, invoice_target):
+        """Test a failed-only retry re-transforms stored payloads without calling the provider."""
+        SyncRecordFailure.objects.create(
+            hub_id=pending_pull_log.hub_id, connection=pending_pull_log.connection, direction='pull',
+            entity_type='invoices', record_key='inv-7', payload={'InvoiceID': 'inv-7', 'UpdatedDateUTC': 'v1'},
+        )
+        SyncLog.objects.filter(pk=pending_pull_log.pk).update(retry_failed_only=True)
+        run_log(claim_pending_logs('worker-1', 1)[0])
+        assert fake_provider.requests == []
+        assert ExternalIdMapping.objects.get().local_id == 'inv-7'
+        assert not SyncRecordFailure.objects.exists()
+        assert not SyncCursor.objects.filter(direction='pull', watermark__isnull=False).exists()
+
+    def test_success_advances_cursor(self, fake_provider, pending_pull_log, invoice_target):
+        """Test a clean pull moves the pull watermark."""
+        fake_provider.route('GET', '/Invoices', handler=invoice_pages(5))
+        run_log(claim_pending_logs('worker-1', 1)[0])
+        pending_pull_log.refresh_from_db()
+        assert (pending_pull_log.status, pending_pull_log.records_synced) == ('success', 5)
+        cursor = SyncCursor.objects.get(entity_type='invoices', direction='pull')
+        assert cursor.watermark == pending_pull_log.started_at
@@ -0,0 +1,74 @@
+"""
+Query budgets for accounting_sync list views.
+
+Every view is rendered with a small and a large data set. The query count
+must not grow with the number of rows (no N+1) and must stay within the
+view's budget, which includes the fixed session/auth/config overhead.
+"""
+import re
+
+import pytest
+from django.db import connection as db_connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from accounting_sync.models import AccountingConnection, SyncLog
+
+# (url name, query params, max queries)
+VIEW_QUERY_BUDGETS = [
+    ('accounting_sync:dashboard', {}, 20),
+    ('accounting_sync:accounting_connections_list', {'per_page': 96}, 15),
+    ('accounting_sync:accounting_connections_list', {'export': 'csv'}, 15),
+    ('accounting_sync:sync_logs_list', {'per_page': 96}, 15),
+    ('accounting_sync:sync_logs_list', {'per_page': 96, 'sort': 'status'}, 15),
+    ('accounting_sync:sync_logs_list', {'per_page': 96, 'sort': 'connection'}, 15),
+    ('accounting_sync:sync_logs_list', {'export': 'csv'}, 15),
+]
+
+
+def seed(hub_id, connections, logs_per_connection):
+    for i in range(connections):
+        connection = AccountingConnection.objects.create(
+            hub_id=hub_id, provider='xero', name=f'Connection {i}', status='connected',
+            access_token='a' * 2000, refresh_token='r' * 2000,
+        )
+        SyncLog.objects.bulk_create([
+            SyncLog(hub_id=hub_id, connection=connection, direction='push', entity_type='invoices', status='success')
+            for _ in range(logs_per_connection)
+        ])
+
+
+def count_queries(client, url, params):
+    with CaptureQueriesContext(db_connection) as ctx:
+        response = client.get(url, params, HTTP_HX_REQUEST='true')
+        if hasattr(response, 'streaming_content'):
+            b''.join(response.streaming_content)
+    assert response.status_code == 200
+    return len(ctx.captured_queries), ctx
+
+
+@pytest.mark.django_db
+class TestQueryBudgets:
+    """Per-view query budget tests."""
+
+    @pytest.mark.parametrize('url_name,params,budget', VIEW_QUERY_BUDGETS)
+    def test_query_count_is_bounded(self, auth_client, hub_id, url_name, params, budget):
+        """Test the query count is independent of row count and within budget."""
+        url = reverse(url_name)
+        seed(hub_id, connections=1, logs_per_connection=1)
+        small, _ = count_queries(auth_client, url, params)
+        seed(hub_id, connections=20, logs_per_connection=5)
+        large, ctx = count_queries(auth_client, url, params)
+        queries = '\n'.join(q['sql'] for q in ctx.captured_queries)
+        assert large == small, f'{url_name} grew from {small} to {large} queries:\n{queries}'
+        assert large <= budget, f'{url_name} ran {large} queries (budget {budget}):\n{queries}'
+
+    def test_connection_list_defers_tokens(self, auth_client, hub_id):
+        """Test the connection list never selects the token columns."""
+        seed(hub_id, connections=3, logs_per_connection=0)
+        url = reverse('accounting_sync:accounting_connections_list')
+        _, ctx = count_queries(auth_client, url, {})
+        selects = [q['sql'] for q in ctx.captured_queries if 'accounting_sync_accountingconnection' in q['sql']]
+        assert selects
+        # Tokens may appear in the CASE that flags them as set, never as selected columns.
+        assert not any(re.search(r'"(access|refresh)_token"(,| FROM)', sql) for sql in selects)
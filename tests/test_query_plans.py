@@ -0,0 +1,98 @@
+"""
+Query-plan regression tests for accounting_sync access paths.
+
+Each test runs EXPLAIN for a query the views, AI tools or worker issue and
+fails if the planner falls back to a full table scan (or, for ordered
+queries, an explicit sort) — i.e. if an index in ``SyncLog.Meta.indexes``
+is dropped or a query stops matching one.
+"""
+import re
+
+import pytest
+from django.db import connection as db_connection
+from django.db.models import Q
+from django.utils import timezone
+
+from accounting_sync.models import AccountingConnection, SyncLog
+from accounting_sync.views import _sync_logs_queryset
+
+LOG_TABLE = SyncLog._meta.db_table
+CONNECTION_TABLE = AccountingConnection._meta.db_table
+
+
+def explain(qs):
+    """Return the plan text for ``qs``; seq scans are disabled on PostgreSQL so tiny tables still use indexes."""
+    if db_connection.vendor == 'postgresql':
+        with db_connection.cursor() as cursor:
+            cursor.execute('SET LOCAL enable_seqscan = off')
+    return qs.explain()
+
+
+def assert_indexed(qs, table=LOG_TABLE, ordered=False):
+    plan = explain(qs)
+    if db_connection.vendor == 'postgresql':
+        assert f'Seq Scan on {table}' not in plan, plan
+        if ordered:
+            assert not re.search(r'^\s*(->\s*)?Sort\b', plan, re.M), plan
+    elif db_connection.vendor == 'sqlite':
+        assert not re.search(rf'\bSCAN {table}\b(?! USING)', plan), plan
+        if ordered:
+            assert 'TEMP B-TREE FOR ORDER BY' not in plan, plan
+    return plan
+
+
+@pytest.mark.django_db
+class TestSyncLogQueryPlans:
+    """Index coverage for SyncLog queries."""
+
+    def test_list_keyset_page(self, hub_id):
+        """Test the default list page walks the (hub, created_at, id) index."""
+        qs = SyncLog.objects.filter(hub_id=hub_id, is_deleted=False).order_by('-created_at', '-id')
+        assert_indexed(qs[:13], ordered=True)
+
+    def test_list_keyset_next_page(self, hub_id):
+        """Test a cursor page uses the same index range scan."""
+        now = timezone.now()
+        qs = (
+            SyncLog.objects.filter(hub_id=hub_id, is_deleted=False)
+            .filter(Q(created_at__lt=now) | Q(created_at=now, id__lt='00000000-0000-0000-0000-000000000000'))
+            .order_by('-created_at', '-id')
+        )
+        assert_indexed(qs[:13])
+
+    def test_list_status_filter_and_sort(self, hub_id):
+        """Test filtering and sorting the list by status."""
+        qs = SyncLog.objects.filter(hub_id=hub_id, is_deleted=False, status='error').order_by('status')
+        assert_indexed(qs[:25])
+
+    def test_list_connection_filter(self, hub_id, connected_connection):
+        """Test the list rows of one connection in the view's default (newest first) order."""
+        qs = _sync_logs_queryset(hub_id).filter(connection=connected_connection)
+        assert_indexed(qs.order_by('-created_at', '-id')[:13])
+
+    def test_ai_tool_connection_status(self, connected_connection):
+        """Test the AI tool's (connection, status) lookup is index-ordered."""
+        qs = SyncLog.objects.filter(connection_id=connected_connection.pk, status='error').order_by('-created_at')
+        assert_indexed(qs[:20], ordered=True)
+
+    def test_worker_claim_candidates(self):
+        """Test the worker's pending-queue scan."""
+        now = timezone.now()
+        busy = SyncLog.objects.filter(status='running', is_deleted=False).values('connection_id')
+        qs = (
+            SyncLog.objects.filter(status='pending', is_deleted=False)
+            .filter(Q(next_attempt_at__isnull=True) | Q(next_attempt_at__lte=now))
+            .exclude(connection_id__in=busy)
+            .order_by('created_at')
+        )
+        assert_indexed(qs.values_list('id', 'connection_id')[:40])
+
+
+@pytest.mark.django_db
+class TestConnectionQueryPlans:
+    """Index coverage for AccountingConnection queries."""
+
+    def test_list_by_name(self, hub_id):
+        """Test the connection list sorted by name."""
+        qs = AccountingConnection.objects.filter(hub_id=hub_id, is_deleted=False).order_by('name')
+        assert_indexed(qs[:10], table=CONNECTION_TABLE, ordered=True)
@@ -0,0 +1,98 @@
+"""Tests for accounting_sync provider rate limiting."""
+from datetime import timedelta
+
+import pytest
+from django.utils import timezone
+
+from accounting_sync import engine, push
+from accounting_sync.engine import SyncResult, claim_pending_logs, run_log
+from accounting_sync.models import ConnectionSyncStats
+from accounting_sync.progress import get_progress
+from accounting_sync.providers import get_adapter
+from accounting_sync.push import OutgoingRecord
+from accounting_sync.ratelimit import RateLimited, RateLimiter, parse_retry_after
+
+
+@pytest.mark.django_db
+class TestRateLimiter:
+    """RateLimiter tests."""
+
+    def test_takes_tokens_until_empty(self):
+        """Test a bucket allows its capacity, then asks to wait."""
+        limiter = RateLimiter('xero:t1', [(3, 60)])
+        assert [limiter.reserve() for _ in range(3)] == [0, 0, 0]
+        assert limiter.reserve() > 0
+
+    def test_buckets_shared_by_key(self):
+        """Test two limiters with the same key share one budget."""
+        RateLimiter('xero:t1', [(1, 60)]).reserve()
+        assert RateLimiter('xero:t1', [(1, 60)]).reserve() > 0
+        assert RateLimiter('xero:t2', [(1, 60)]).reserve() == 0
+
+    def test_acquire_raises_instead_of_sleeping(self, settings):
+        """Test long waits raise RateLimited with a resume time."""
+        settings.ACCOUNTING_SYNC_MAX_INLINE_WAIT = 0.5
+        limiter = RateLimiter('xero:t1', [(1, 3600)])
+        limiter.acquire()
+        with pytest.raises(RateLimited) as exc:
+            limiter.acquire()
+        assert exc.value.retry_at > timezone.now()
+
+    def test_block(self):
+        """Test block() stops every caller until the deadline."""
+        limiter = RateLimiter('xero:t1', [(100, 60)])
+        limiter.block(30)
+        assert 25 < limiter.reserve() <= 30
+
+    def test_parse_retry_after(self):
+        """Test Retry-After in seconds and garbage values."""
+        assert parse_retry_after('12') == 12
+        assert parse_retry_after(None, default=60) == 60
+        assert parse_retry_after('soon', default=5) == 5
+
+
+@pytest.mark.django_db
+class TestRetryAfter:
+    """429 handling against the fake provider."""
+
+    def test_429_blocks_tenant(self, fake_provider, connected_connection):
+        """Test a 429 raises RateLimited and blocks the shared bucket."""
+        fake_provider.route('GET', '/Invoices', status=429, headers={'Retry-After': '120'})
+        adapter = get_adapter(connected_connection)
+        with pytest.raises(RateLimited):
+            adapter.fetch_page('invoices')
+        assert get_adapter(connected_connection).rate_limiter.reserve() > 100
+
+    def test_rate_limited_log_is_deferred(self, fake_provider, pending_sync_log, monkeypatch):
+        """Test a rate-limited sync goes back to pending with a resume time."""
+        monkeypatch.setitem(push.PUSH_SOURCES, 'invoices', lambda c, since: [OutgoingRecord('invoices', '1', {})])
+        fake_provider.route('POST', '/Invoices', status=429, headers={'Retry-After': '60'})
+        run_log(claim_pending_logs('worker-1', 1)[0])
+        pending_sync_log.refresh_from_db()
+        assert pending_sync_log.status == 'pending'
+        assert pending_sync_log.next_attempt_at > timezone.now()
+        assert claim_pending_logs('worker-1', 1) == []
+
+    def test_deferred_log_keeps_synced_count(self, pending_sync_log, monkeypatch):
+        """Test records synced before a deferral are kept and counted once when the log runs again."""
+        seen = []
+
+        def handler(log):
+            reporter = get_progress(log)
+            seen.append(reporter.records_synced)
+            if len(seen) == 1:
+                reporter.advance(done=5, synced=5)
+                raise RateLimited(timezone.now() - timedelta(seconds=1))
+            reporter.advance(done=3, synced=3)
+            return SyncResult(records_synced=3)
+
+        monkeypatch.setitem(engine.SYNC_HANDLERS, 'push', handler)
+        run_log(claim_pending_logs('worker-1', 1)[0])
+        pending_sync_log.refresh_from_db()
+        assert (pending_sync_log.status, pending_sync_log.records_synced) == ('pending', 5)
+        run_log(claim_pending_logs('worker-1', 1)[0])
+
+        pending_sync_log.refresh_from_db()
+        assert seen == [0, 5]
+        assert (pending_sync_log.status, pending_sync_log.records_synced) == ('success', 8)
+        assert ConnectionSyncStats.objects.get(connection=pending_sync_log.connection).records_synced == 8
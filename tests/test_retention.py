@@ -0,0 +1,118 @@
+"""Tests for accounting_sync log retention."""
+import uuid
+from datetime import timedelta
+
+import pytest
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+
+from accounting_sync import retention
+from accounting_sync.models import ConnectionSyncStats, SyncLog, SyncLogDailySummary, SyncRetentionPolicy
+from accounting_sync.stats import rebuild_stats
+
+
+@pytest.fixture
+def make_log(hub_id, connected_connection):
+    def make(days_ago, status='success', records=1, **kwargs):
+        log = SyncLog.objects.create(
+            hub_id=hub_id, connection=connected_connection, direction='push',
+            entity_type=kwargs.pop('entity_type', 'invoices'), status=status, records_synced=records, **kwargs,
+        )
+        SyncLog.all_objects.filter(pk=log.pk).update(created_at=timezone.now() - timedelta(days=days_ago))
+        return log
+    return make
+
+
+@pytest.mark.django_db
+class TestRetentionPolicy:
+    """Retention setting tests."""
+
+    def test_default(self, hub_id, settings):
+        """Test hubs without a policy use the setting."""
+        settings.ACCOUNTING_SYNC_LOG_RETENTION_DAYS = 30
+        assert retention.get_retention_days(hub_id) == 30
+
+    def test_per_hub(self, hub_id):
+        """Test a hub's policy overrides the default."""
+        retention.set_retention_days(hub_id, 7)
+        assert retention.get_retention_days(hub_id) == 7
+        assert retention.get_retention_days(uuid.uuid4()) == retention.DEFAULT_RETENTION_DAYS
+
+
+@pytest.mark.django_db
+class TestPurge:
+    """purge_hub tests."""
+
+    def test_rolls_up_and_deletes_expired(self, hub_id, make_log, connected_connection):
+        """Test expired logs become daily summaries and are deleted."""
+        retention.set_retention_days(hub_id, 30)
+        make_log(40, 'success', records=5)
+        make_log(40, 'error', records=0)
+        make_log(41, 'success', records=2, entity_type='payments')
+        kept = make_log(10, 'success')
+        assert retention.purge_hub(hub_id) == 3
+        assert list(SyncLog.all_objects.values_list('pk', flat=True)) == [kept.pk]
+        summaries = SyncLogDailySummary.objects.filter(connection=connected_connection)
+        invoices = summaries.get(entity_type='invoices')
+        assert (invoices.logs_count, invoices.success_count, invoices.error_count, invoices.records_synced) == (2, 1, 1, 5)
+        assert summaries.get(entity_type='payments').records_synced == 2
+
+    def test_keeps_unfinished_logs(self, hub_id, make_log):
+        """Test pending and running logs are never purged."""
+        retention.set_retention_days(hub_id, 1)
+        make_log(10, 'pending')
+        make_log(10, 'running')
+        assert retention.purge_hub(hub_id) == 0
+        assert SyncLog.all_objects.count() == 2
+
+    def test_soft_deleted_purged_without_rollup(self, hub_id, make_log):
+        """Test soft-deleted logs are deleted but not counted."""
+        retention.set_retention_days(hub_id, 1)
+        make_log(10, 'success', is_deleted=True)
+        assert retention.purge_hub(hub_id) == 1
+        assert not SyncLogDailySummary.objects.exists()
+
+    def test_bounded_batches(self, hub_id, make_log):
+        """Test each run deletes at most batch_size * max_batches logs."""
+        retention.set_retention_days(hub_id, 1)
+        for _ in range(5):
+            make_log(10)
+        assert retention.purge_hub(hub_id, batch_size=2, max_batches=2) == 4
+        assert retention.purge_hub(hub_id, batch_size=2) == 1
+        assert SyncLogDailySummary.objects.get().logs_count == 5
+
+    def test_rebuild_stats_keeps_purged_history(self, hub_id, make_log, connected_connection):
+        """Test rebuilt totals include rolled-up logs."""
+        retention.set_retention_days(hub_id, 30)
+        make_log(40, 'success', records=5)
+        make_log(1, 'error', records=0)
+        retention.purge_hub(hub_id)
+        rebuild_stats(hub_id)
+        stats = ConnectionSyncStats.objects.get(connection=connected_connection)
+        assert (stats.total_logs, stats.success_count, stats.error_count, stats.records_synced) == (2, 1, 1, 5)
+
+    def test_command(self, hub_id, make_log):
+        """Test the purge command covers every hub."""
+        retention.set_retention_days(hub_id, 1)
+        make_log(10)
+        call_command('accounting_sync_purge_logs')
+        assert not SyncLog.all_objects.exists()
+
+
+@pytest.mark.django_db
+class TestRetentionSettingsView:
+    """Settings page retention tests."""
+
+    def test_save(self, auth_client, hub_id):
+        """Test posting the settings form stores the hub's retention."""
+        url = reverse('accounting_sync:settings')
+        response = auth_client.post(url, {'retention_days': '14'}, HTTP_HX_REQUEST='true')
+        assert response.status_code == 200
+        assert SyncRetentionPolicy.objects.get(hub_id=hub_id).retention_days == 14
+
+    def test_rejects_invalid(self, auth_client, hub_id):
+        """Test non-positive values are rejected."""
+        url = reverse('accounting_sync:settings')
+        auth_client.post(url, {'retention_days': '0'}, HTTP_HX_REQUEST='true')
+        assert not SyncRetentionPolicy.objects.filter(hub_id=hub_id).exists()
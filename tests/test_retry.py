@@ -0,0 +1,140 @@
+"""Tests for accounting_sync retries and dead-lettering."""
+import pytest
+from django.utils import timezone
+
+from accounting_sync import engine, push
+from accounting_sync.engine import SyncResult, claim_pending_logs, run_log
+from accounting_sync.models import ExternalIdMapping, SyncCursor, SyncLog, SyncRecordFailure
+from accounting_sync.providers import ProviderError
+from accounting_sync.push import OutgoingRecord
+from accounting_sync.retry import backoff_delay
+
+
+def xero_batch(query, body):
+    """Fake Xero multi-record POST that rejects records flagged as bad."""
+    items = []
+    for record in body['Invoices']:
+        if record.get('bad'):
+            items.append({**record, 'HasErrors': True, 'ValidationErrors': [{'Message': 'Invalid'}]})
+        else:
+            items.append({**record, 'InvoiceID': f'X-{record["ref"]}'})
+    return 200, {'Invoices': items}, {}
+
+
+class TestBackoff:
+    """backoff_delay tests."""
+
+    def test_doubles_with_jitter(self, settings):
+        """Test the delay doubles per attempt and is jittered over its upper half."""
+        settings.ACCOUNTING_SYNC_RETRY_BASE_DELAY = 10
+        assert backoff_delay(1, rand=lambda: 0) == 5
+        assert backoff_delay(1, rand=lambda: 1) == 10
+        assert backoff_delay(3, rand=lambda: 1) == 40
+
+    def test_capped(self, settings):
+        """Test the delay never exceeds the maximum."""
+        settings.ACCOUNTING_SYNC_RETRY_MAX_DELAY = 600
+        assert backoff_delay(20, rand=lambda: 1) == 600
+
+
+@pytest.mark.django_db
+class TestScheduleRetry:
+    """Engine retry scheduling tests."""
+
+    def test_error_queues_next_attempt(self, pending_sync_log, monkeypatch):
+        """Test a transient error queues attempt 2 in the future."""
+        def handler(log):
+            raise ProviderError('Service unavailable', status_code=503)
+
+        monkeypatch.setitem(engine.SYNC_HANDLERS, 'push', handler)
+        run_log(claim_pending_logs('worker-1', 1)[0])
+        retry = SyncLog.objects.get(retry_of=pending_sync_log)
+        assert (retry.status, retry.attempt, retry.retry_failed_only) == ('pending', 2, False)
+        assert retry.next_attempt_at > timezone.now()
+        assert claim_pending_logs('worker-1', 1) == []
+
+    def test_dead_letter_after_max_attempts(self, pending_sync_log, monkeypatch, settings):
+        """Test the last allowed attempt is dead-lettered instead of retried."""
+        settings.ACCOUNTING_SYNC_RETRY_MAX_ATTEMPTS = 3
+        SyncLog.objects.filter(pk=pending_sync_log.pk).update(attempt=3)
+        monkeypatch.setitem(engine.SYNC_HANDLERS, 'push', lambda log: SyncResult(records_failed=1, error_message='x'))
+        run_log(claim_pending_logs('worker-1', 1)[0])
+        pending_sync_log.refresh_from_db()
+        assert pending_sync_log.dead_letter is True
+        assert not pending_sync_log.retries.exists()
+
+    def test_permanent_error_dead_lettered(self, pending_sync_log, monkeypatch):
+        """Test errors no retry can fix are dead-lettered on the first attempt."""
+        def handler(log):
+            raise ProviderError('Forbidden', status_code=403)
+
+        monkeypatch.setitem(engine.SYNC_HANDLERS, 'push', handler)
+        run_log(claim_pending_logs('worker-1', 1)[0])
+        pending_sync_log.refresh_from_db()
+        assert pending_sync_log.dead_letter is True
+        assert SyncLog.objects.count() == 1
+
+    def test_success_not_retried(self, pending_sync_log, monkeypatch):
+        """Test successful logs queue nothing."""
+        monkeypatch.setitem(engine.SYNC_HANDLERS, 'push', lambda log: SyncResult(records_synced=1))
+        run_log(claim_pending_logs('worker-1', 1)[0])
+        assert SyncLog.objects.count() == 1
+
+
+@pytest.mark.django_db
+class TestFailedRecordRetry:
+    """Per-record failure tracking in push."""
+
+    def test_retry_sends_only_failed_records(self, fake_provider, pending_sync_log, monkeypatch):
+        """Test a partial push stores the rejected record and its retry pushes only that one."""
+        records = [OutgoingRecord('invoices', str(i), {'ref': str(i), 'bad': i == 3}) for i in range(10)]
+        monkeypatch.setitem(push.PUSH_SOURCES, 'invoices', lambda connection, since: iter(records))
+        fake_provider.route('POST', '/Invoices', handler=xero_batch)
+        run_log(claim_pending_logs('worker-1', 1)[0])
+
+        failure = SyncRecordFailure.objects.get()
+        assert (failure.record_key, failure.error_message) == ('3', 'Invalid')
+        cursor = SyncCursor.objects.get(entity_type='invoices', direction='push')
+        assert cursor.watermark is not None
+
+        retry = pending_sync_log.retries.get()
+        assert retry.retry_failed_only is True
+        SyncRecordFailure.objects.update(payload={'ref': '3'})
+        SyncLog.objects.filter(pk=retry.pk).update(next_attempt_at=None)
+        fake_provider.requests.clear()
+        run_log(claim_pending_logs('worker-1', 1)[0])
+
+        retry.refresh_from_db()
+        assert (retry.status, retry.records_synced) == ('success', 1)
+        assert [r['body']['Invoices'] for r in fake_provider.requests] == [[{'ref': '3'}]]
+        assert not SyncRecordFailure.objects.exists()
+        assert ExternalIdMapping.objects.get(local_id='3').remote_id == 'X-3'
+
+    def test_failed_only_retry_error_stays_failed_only(self, fake_provider, pending_sync_log, monkeypatch):
+        """Test a failed-only retry that errors is followed by another failed-only retry."""
+        records = [OutgoingRecord('invoices', str(i), {'ref': str(i), 'bad': i == 3}) for i in range(10)]
+        monkeypatch.setitem(push.PUSH_SOURCES, 'invoices', lambda connection, since: iter(records))
+        fake_provider.route('POST', '/Invoices', handler=xero_batch)
+        run_log(claim_pending_logs('worker-1', 1)[0])
+
+        retry = pending_sync_log.retries.get()
+        SyncLog.objects.filter(pk=retry.pk).update(next_attempt_at=None)
+
+        def unavailable(log):
+            raise ProviderError('Service unavailable', status_code=503)
+
+        monkeypatch.setitem(engine.SYNC_HANDLERS, 'push', unavailable)
+        run_log(claim_pending_logs('worker-1', 1)[0])
+        monkeypatch.setitem(engine.SYNC_HANDLERS, 'push', push.run_push)
+
+        successor = retry.retries.get()
+        assert (successor.retry_failed_only, successor.attempt) == (True, 3)
+        SyncRecordFailure.objects.update(payload={'ref': '3'})
+        SyncLog.objects.filter(pk=successor.pk).update(next_attempt_at=None)
+        fake_provider.requests.clear()
+        run_log(claim_pending_logs('worker-1', 1)[0])
+
+        successor.refresh_from_db()
+        assert (successor.status, successor.records_synced) == ('success', 1)
+        assert [r['body']['Invoices'] for r in fake_provider.requests] == [[{'ref': '3'}]]
+        assert not SyncRecordFailure.objects.exists()
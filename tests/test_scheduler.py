@@ -0,0 +1,128 @@
+"""Tests for accounting_sync periodic scheduling."""
+import uuid
+from collections import Counter
+from datetime import timedelta
+
+import pytest
+from django.core.management import call_command
+from django.db import IntegrityError
+from django.utils import timezone
+
+from accounting_sync import bulk, scheduler
+from accounting_sync.bulk import enqueue_sync
+from accounting_sync.models import AccountingConnection, SyncLog
+
+
+def make_connections(hub_id, count, due=True):
+    past = timezone.now() - timedelta(minutes=5)
+    return [
+        AccountingConnection.objects.create(
+            hub_id=hub_id, provider='xero', name=f'Xero {i}', status='connected', sync_enabled=True,
+            next_sync_at=past if due else None,
+        )
+        for i in range(count)
+    ]
+
+
+class TestSlots:
+    """Slot computation tests."""
+
+    def test_offsets_spread_over_interval(self):
+        """Test connections are spread evenly over the hour."""
+        hub_ids = [uuid.uuid4() for _ in range(50)]
+        offsets = [scheduler.schedule_offset(hub_ids[i % 50], uuid.uuid4(), 3600) for i in range(6000)]
+        per_ten_minutes = Counter(offset // 600 for offset in offsets)
+        assert len(per_ten_minutes) == 6
+        assert max(per_ten_minutes.values()) < 1.2 * 1000
+
+    def test_next_slot(self):
+        """Test the next slot is the offset into the current or the next interval."""
+        now = timezone.now().replace(minute=10, second=0, microsecond=0)
+        assert scheduler.next_slot(1200, 3600, now) == now.replace(minute=20)
+        assert scheduler.next_slot(300, 3600, now) == now.replace(minute=5) + timedelta(hours=1)
+
+
+@pytest.mark.django_db
+class TestScheduleDueSyncs:
+    """schedule_due_syncs tests."""
+
+    def test_new_connections_get_a_future_slot(self, hub_id):
+        """Test enabling sync does not make every connection fire at once."""
+        make_connections(hub_id, 3, due=False)
+        assert scheduler.schedule_due_syncs() == []
+        now = timezone.now()
+        for next_sync_at in AccountingConnection.objects.values_list('next_sync_at', flat=True):
+            assert now < next_sync_at <= now + timedelta(hours=1)
+
+    def test_queues_due_connections(self, hub_id):
+        """Test due connections get a push and a pull and move to their next slot."""
+        connections = make_connections(hub_id, 2)
+        created = scheduler.schedule_due_syncs()
+        assert Counter(log.direction for log in created) == {'push': 2, 'pull': 2}
+        assert not AccountingConnection.objects.filter(next_sync_at__lte=timezone.now()).exists()
+        assert scheduler.schedule_due_syncs() == []
+        assert {log.connection_id for log in created} == {c.pk for c in connections}
+
+    def test_skips_disabled_and_disconnected(self, hub_id):
+        """Test only enabled, connected connections are scheduled."""
+        disabled, disconnected = make_connections(hub_id, 2)
+        AccountingConnection.objects.filter(pk=disabled.pk).update(sync_enabled=False)
+        AccountingConnection.objects.filter(pk=disconnected.pk).update(status='error')
+        assert scheduler.schedule_due_syncs() == []
+
+    def test_coalesces_with_pending_log(self, hub_id):
+        """Test a connection with a pending push only gets the missing pull."""
+        [connection] = make_connections(hub_id, 1)
+        SyncLog.objects.create(hub_id=hub_id, connection=connection, direction='push', entity_type='all', status='pending')
+        created = scheduler.schedule_due_syncs()
+        assert [log.direction for log in created] == ['pull']
+        connection.refresh_from_db()
+        assert connection.next_sync_at > timezone.now()
+
+    def test_failed_only_retry_does_not_block(self, hub_id):
+        """Test a pending failed-record retry does not stand in for a scheduled sync."""
+        [connection] = make_connections(hub_id, 1)
+        SyncLog.objects.create(hub_id=hub_id, connection=connection, direction='push', entity_type='all',
+                               status='pending', retry_failed_only=True)
+        created = scheduler.schedule_due_syncs(directions=['push'])
+        assert len(created) == 1
+
+    def test_round_robin_across_hubs(self, hub_id):
+        """Test a hub with many due connections cannot take the whole batch."""
+        make_connections(hub_id, 5)
+        other = make_connections(uuid.uuid4(), 1)
+        created = scheduler.schedule_due_syncs(limit=2, directions=['push'])
+        assert len(created) == 2
+        assert other[0].pk in {log.connection_id for log in created}
+
+    def test_command(self, hub_id):
+        """Test the schedule command queues due syncs."""
+        make_connections(hub_id, 1)
+        call_command('accounting_sync_schedule')
+        assert SyncLog.objects.filter(status='pending').count() == 2
+
+
+@pytest.mark.django_db
+class TestEnqueueSync:
+    """enqueue_sync tests."""
+
+    def test_coalesces_triggers(self, connected_connection):
+        """Test repeated triggers return the one pending log."""
+        first, created = enqueue_sync(connected_connection, 'push', 'invoices')
+        again, created_again = enqueue_sync(connected_connection, 'push', 'invoices')
+        assert (created, created_again) == (True, False)
+        assert again.pk == first.pk
+        assert enqueue_sync(connected_connection, 'pull', 'invoices')[1] is True
+
+    def test_concurrent_trigger_claimed(self, connected_connection, monkeypatch):
+        """Test losing the insert race to a log a worker already claimed returns that log."""
+        winner, _ = enqueue_sync(connected_connection, 'push', 'invoices')
+        SyncLog.objects.filter(pk=winner.pk).update(status='running')
+        # Simulate the race: the lookup ran before the winner was inserted.
+        def conflict(**kwargs):
+            raise IntegrityError('accounting_sync_pending_unique')
+
+        monkeypatch.setattr(bulk, '_pending_logs', lambda: SyncLog.objects.none())
+        monkeypatch.setattr(SyncLog.objects, 'create', conflict)
+        log, created = enqueue_sync(connected_connection, 'push', 'invoices')
+        assert (log.pk, created) == (winner.pk, False)
@@ -0,0 +1,87 @@
+"""Tests for accounting_sync full-text log search."""
+import pytest
+from django.db import connection as db_connection
+from django.urls import reverse
+
+from accounting_sync.models import SyncLog
+from accounting_sync.search import ensure_search_index, search_sync_logs, search_terms
+
+
+@pytest.fixture
+def logs(hub_id, connected_connection):
+    def make(**kwargs):
+        return SyncLog.objects.create(hub_id=hub_id, connection=connected_connection, **kwargs)
+    return {
+        'rate': make(direction='push', entity_type='invoices', status='error', error_message='HTTP 429: rate limited by Xero'),
+        'token': make(direction='pull', entity_type='payments', status='error', error_message='Refresh token rejected'),
+        'ok': make(direction='push', entity_type='contacts', status='success'),
+    }
+
+
+def matches(hub_id, query):
+    return set(search_sync_logs(SyncLog.objects.filter(hub_id=hub_id), query).values_list('pk', flat=True))
+
+
+class TestSearchTerms:
+    """Query tokenization tests."""
+
+    def test_splits_words(self):
+        """Test punctuation and underscores separate words."""
+        assert search_terms('HTTP 429: rate_limited!') == ['http', '429', 'rate', 'limited']
+
+    def test_blank(self):
+        """Test a query without words yields no terms."""
+        assert search_terms(' :: ') == []
+
+
+@pytest.mark.django_db
+class TestSearchSyncLogs:
+    """search_sync_logs tests."""
+
+    def test_matches_error_text(self, hub_id, logs):
+        """Test words in error_message are found."""
+        assert matches(hub_id, 'rate limited') == {logs['rate'].pk}
+
+    def test_prefix_match(self, hub_id, logs):
+        """Test partial words match while typing."""
+        assert matches(hub_id, 'rejec') == {logs['token'].pk}
+
+    def test_matches_other_columns(self, hub_id, logs):
+        """Test entity_type, status and direction are searchable."""
+        assert matches(hub_id, 'contacts') == {logs['ok'].pk}
+        assert matches(hub_id, 'error') == {logs['rate'].pk, logs['token'].pk}
+
+    def test_all_words_required(self, hub_id, logs):
+        """Test every word must match."""
+        assert matches(hub_id, 'rate rejected') == set()
+
+    def test_follows_updates(self, hub_id, logs):
+        """Test set-based updates are reflected in the index."""
+        SyncLog.objects.filter(pk=logs['ok'].pk).update(error_message='Duplicate invoice number')
+        assert matches(hub_id, 'duplicate') == {logs['ok'].pk}
+
+    def test_follows_deletes(self, hub_id, logs):
+        """Test hard-deleted logs drop out of the index."""
+        SyncLog.all_objects.filter(pk=logs['rate'].pk).delete()
+        assert matches(hub_id, 'rate') == set()
+
+    @pytest.mark.skipif(db_connection.vendor != 'sqlite', reason='SQLite triggers only')
+    def test_ensure_reinstalls_triggers(self, hub_id, logs):
+        """Test ensure_search_index restores dropped triggers and resyncs."""
+        with db_connection.cursor() as cursor:
+            cursor.execute('DROP TRIGGER accounting_sync_synclog_fts_au')
+        SyncLog.objects.filter(pk=logs['ok'].pk).update(error_message='Missing account code')
+        ensure_search_index(db_connection)
+        assert matches(hub_id, 'account') == {logs['ok'].pk}
+
+
+@pytest.mark.django_db
+class TestSyncLogListSearch:
+    """Sync log list search tests."""
+
+    def test_q_uses_full_text(self, auth_client, hub_id, logs):
+        """Test the list's q parameter filters by full-text match."""
+        url = reverse('accounting_sync:sync_logs_list')
+        response = auth_client.get(url, {'q': 'xero'}, HTTP_HX_REQUEST='true', HTTP_HX_TARGET='datatable-body')
+        assert response.status_code == 200
+        assert [log.pk for log in response.context['sync_logs']] == [logs['rate'].pk]
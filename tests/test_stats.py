@@ -0,0 +1,97 @@
+"""Tests for accounting_sync incremental statistics."""
+import uuid
+from datetime import timedelta
+
+import pytest
+from django.urls import reverse
+from django.utils import timezone
+
+from accounting_sync.models import ConnectionSyncStats, HourlySyncStats, SyncLog
+from accounting_sync.stats import get_dashboard_stats, get_sync_health, rebuild_stats
+
+
+def make_log(hub_id, connection, status='success', records=10):
+    return SyncLog.objects.create(
+        hub_id=hub_id, connection=connection, entity_type='invoices',
+        status=status, records_synced=records, error_message='boom' if status == 'error' else '',
+    )
+
+
+@pytest.mark.django_db
+class TestConnectionSyncStats:
+    """Incremental stats maintenance tests."""
+
+    def test_create_counts(self, hub_id, connected_connection):
+        """Test created logs are counted by status."""
+        make_log(hub_id, connected_connection, 'success', 10)
+        make_log(hub_id, connected_connection, 'error', 0)
+        row = ConnectionSyncStats.objects.get(connection=connected_connection)
+        assert (row.total_logs, row.success_count, row.error_count, row.records_synced) == (2, 1, 1, 10)
+        assert row.last_error_message == 'boom'
+
+    def test_status_transition(self, hub_id, connected_connection):
+        """Test a pending log finishing moves the counters once."""
+        log = make_log(hub_id, connected_connection, 'pending', 0)
+        log.status = 'success'
+        log.records_synced = 7
+        log.finished_at = timezone.now()
+        log.save()
+        row = ConnectionSyncStats.objects.get(connection=connected_connection)
+        assert (row.total_logs, row.success_count, row.records_synced) == (1, 1, 7)
+        assert HourlySyncStats.objects.get(hub_id=hub_id).records_synced == 7
+
+    def test_soft_delete_and_bulk_delete(self, hub_id, connected_connection, auth_client):
+        """Test single and bulk soft deletes subtract from the totals."""
+        logs = [make_log(hub_id, connected_connection) for _ in range(3)]
+        logs[0].is_deleted = True
+        logs[0].save()
+        url = reverse('accounting_sync:sync_logs_bulk_action')
+        auth_client.post(url, {'ids': str(logs[1].pk), 'action': 'delete'})
+        row = ConnectionSyncStats.objects.get(connection=connected_connection)
+        assert (row.total_logs, row.records_synced) == (1, 10)
+
+    def test_rebuild_matches_incremental(self, hub_id, connected_connection):
+        """Test rebuild_stats reproduces the incremental totals."""
+        make_log(hub_id, connected_connection, 'success', 4)
+        make_log(hub_id, connected_connection, 'partial', 3)
+        before = ConnectionSyncStats.objects.values('total_logs', 'success_count', 'partial_count', 'records_synced').get()
+        ConnectionSyncStats.objects.all().delete()
+        rebuild_stats(hub_id)
+        after = ConnectionSyncStats.objects.values('total_logs', 'success_count', 'partial_count', 'records_synced').get()
+        assert before == after
+
+    def test_dashboard_stats(self, hub_id, connected_connection):
+        """Test dashboard cards are computed from the stats tables."""
+        make_log(hub_id, connected_connection, 'success', 48)
+        make_log(hub_id, connected_connection, 'error', 0)
+        result = get_dashboard_stats(hub_id)
+        assert result['total_sync_logs'] == 2
+        assert result['success_rate'] == 50.0
+        assert result['records_per_hour'] == 2.0
+        assert result['last_error'].connection == connected_connection
+
+
+@pytest.mark.django_db
+class TestSyncHealth:
+    """get_sync_health tests."""
+
+    def test_aggregates(self, hub_id, connected_connection):
+        """Test per-connection rates, error clusters and queue depth."""
+        for status in ('success', 'success', 'error', 'error', 'error', 'pending'):
+            make_log(hub_id, connected_connection, status, 5 if status == 'success' else 0)
+        health = get_sync_health(hub_id, timezone.now() - timedelta(days=1))
+        [row] = health['connections']
+        assert (row['syncs'], row['success'], row['error'], row['records_synced']) == (6, 2, 3, 10)
+        assert row['success_rate'] == 40.0
+        assert health['error_clusters'] == [{
+            'message': 'boom', 'entity_type': 'invoices', 'direction': 'push',
+            'count': 3, 'connections': 1, 'last_seen_at': health['error_clusters'][0]['last_seen_at'],
+        }]
+        assert health['queue'] == {'pending': 1, 'running': 0}
+        assert sum(day['syncs'] for day in health['throughput']) == 5
+
+    def test_hub_scoped(self, hub_id, connected_connection):
+        """Test other hubs are not included."""
+        make_log(hub_id, connected_connection, 'error', 0)
+        health = get_sync_health(uuid.uuid4(), timezone.now() - timedelta(days=1))
+        assert health['connections'] == [] and health['error_clusters'] == []
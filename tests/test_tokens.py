@@ -0,0 +1,94 @@
+"""Tests for accounting_sync OAuth token refresh."""
+import threading
+import time
+from datetime import timedelta
+
+import pytest
+from django.db import connection as db_connection
+from django.utils import timezone
+
+from accounting_sync.models import AccountingConnection
+from accounting_sync.providers import get_adapter
+from accounting_sync.tokens import TokenRefreshError, get_access_token
+
+
+def token_endpoint(calls, delay=0):
+    """Fake OAuth token endpoint issuing numbered tokens."""
+    def handler(query, body):
+        time.sleep(delay)
+        calls.append(body)
+        n = len(calls)
+        return 200, {'access_token': f'access-{n}', 'refresh_token': f'refresh-{n}', 'expires_in': 1800}, {}
+    return handler
+
+
+@pytest.fixture
+def expired_connection(connected_connection):
+    """A connected connection whose access token has expired."""
+    connected_connection.token_expires_at = timezone.now() - timedelta(minutes=5)
+    connected_connection.save()
+    return connected_connection
+
+
+@pytest.mark.django_db
+class TestGetAccessToken:
+    """get_access_token tests."""
+
+    def test_fresh_token_reused(self, fake_provider, connected_connection):
+        """Test a valid token is returned without calling the provider."""
+        connected_connection.token_expires_at = timezone.now() + timedelta(minutes=30)
+        assert get_access_token(get_adapter(connected_connection)) == 'access'
+        assert fake_provider.requests == []
+
+    def test_expired_token_refreshed(self, fake_provider, expired_connection):
+        """Test an expired token is refreshed and persisted with its expiry."""
+        calls = []
+        fake_provider.route('POST', '/token', handler=token_endpoint(calls))
+        assert get_access_token(get_adapter(expired_connection)) == 'access-1'
+        assert calls[0]['grant_type'] == 'refresh_token'
+        expired_connection.refresh_from_db()
+        assert expired_connection.refresh_token == 'refresh-1'
+        assert expired_connection.token_expires_at > timezone.now() + timedelta(minutes=25)
+
+    def test_rejected_refresh_marks_error(self, fake_provider, expired_connection):
+        """Test a rejected refresh token flags the connection for reconnect."""
+        fake_provider.route('POST', '/token', status=400, payload={'error': 'invalid_grant'})
+        with pytest.raises(TokenRefreshError):
+            get_access_token(get_adapter(expired_connection))
+        expired_connection.refresh_from_db()
+        assert expired_connection.status == 'error'
+
+    def test_401_refreshes_and_retries(self, fake_provider, connected_connection):
+        """Test an API 401 triggers one refresh and a retried call."""
+        calls = []
+        fake_provider.route('POST', '/token', handler=token_endpoint(calls))
+        fake_provider.route('GET', '/Invoices', handler=lambda q, b: (
+            (200, {'Invoices': []}, {}) if len(calls) else (401, {}, {})
+        ))
+        assert get_adapter(connected_connection).fetch_page('invoices') == ([], False)
+        assert len(calls) == 1
+
+
+@pytest.mark.django_db(transaction=True)
+class TestSingleFlight:
+    """Concurrent refresh tests."""
+
+    def test_concurrent_callers_share_one_refresh(self, fake_provider, expired_connection):
+        """Test many threads seeing an expired token cause one refresh call."""
+        calls, tokens = [], []
+        fake_provider.route('POST', '/token', handler=token_endpoint(calls, delay=0.2))
+
+        def worker():
+            try:
+                conn = AccountingConnection.objects.get(pk=expired_connection.pk)
+                tokens.append(get_access_token(get_adapter(conn)))
+            finally:
+                db_connection.close()
+
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert len(calls) == 1
+        assert tokens == ['access-1'] * 8
@@ -48,6 +48,12 @@ class TestAccountingConnectionViews:
         response = auth_client.get(url, {'q': 'test'})
         assert response.status_code == 200
 
+    def test_search_ignores_tokens(self, auth_client, accounting_connection):
+        """Test list search never matches on access token values."""
+        url = reverse('accounting_sync:accounting_connections_list')
+        response = auth_client.get(url, {'q': 'description'}, HTTP_HX_REQUEST='true')
+        assert b'Test Name' not in response.content
+
     def test_list_sort(self, auth_client):
         """Test list sorting."""
         url = reverse('accounting_sync:accounting_connections_list')
@@ -0,0 +1,103 @@
+"""
+OAuth access tokens for accounting connections.
+
+``get_access_token`` returns the cached token while it is valid. When it
+has expired, exactly one caller refreshes it: threads of the same worker
+wait on a per-connection lock, and other worker processes wait on the
+connection row lock, then reuse the token the winner stored.
+"""
+import threading
+from collections import defaultdict
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils import timezone
+
+from . import fragments
+from .models import AccountingConnection
+from .tracing import span
+
+# Refresh slightly before the provider's expiry to absorb clock skew and latency.
+EXPIRY_SKEW = timedelta(seconds=60)
+DEFAULT_EXPIRES_IN = 1800
+
+_locks = defaultdict(threading.Lock)
+_locks_lock = threading.Lock()
+
+
+class TokenRefreshError(Exception):
+    """Raised when a connection's tokens cannot be refreshed."""
+
+    def __init__(self, message, rejected=False):
+        super().__init__(message)
+        # True when the provider rejected the refresh token (reconnect needed).
+        self.rejected = rejected
+
+
+def _lock_for(connection_id):
+    with _locks_lock:
+        return _locks[connection_id]
+
+
+def token_is_fresh(connection, now=None):
+    if not connection.access_token:
+        return False
+    if connection.token_expires_at is None:
+        return True
+    return connection.token_expires_at > (now or timezone.now()) + EXPIRY_SKEW
+
+
+def _copy_tokens(target, source):
+    target.access_token = source.access_token
+    target.refresh_token = source.refresh_token
+    target.token_expires_at = source.token_expires_at
+
+
+def get_access_token(adapter):
+    """Return a valid access token for ``adapter.connection``."""
+    connection = adapter.connection
+    if token_is_fresh(connection):
+        return connection.access_token
+    return refresh_access_token(adapter, stale_token=connection.access_token)
+
+
+def refresh_access_token(adapter, stale_token):
+    """
+    Refresh the connection's tokens unless someone already replaced ``stale_token``.
+
+    Concurrent callers for the same connection collapse into a single
+    refresh call; the rest return the token it produced.
+    """
+    connection = adapter.connection
+    with _lock_for(connection.pk):
+        try:
+            with span('token_refresh', count=1):
+                current = _refresh_locked(adapter, stale_token)
+        except TokenRefreshError as exc:
+            if exc.rejected:
+                AccountingConnection.objects.filter(pk=connection.pk).update(status='error', updated_at=timezone.now())
+                fragments.bump_version(connection.hub_id)
+            raise
+    _copy_tokens(connection, current)
+    return current.access_token
+
+
+def _refresh_locked(adapter, stale_token):
+    connection = adapter.connection
+    with transaction.atomic():
+        current = AccountingConnection.objects.select_for_update().get(pk=connection.pk)
+        if current.access_token != stale_token and token_is_fresh(current):
+            return current
+        if not current.refresh_token:
+            raise TokenRefreshError(f'Connection {connection.pk} has no refresh token', rejected=True)
+        try:
+            data = adapter.refresh_tokens(current.refresh_token)
+        except Exception as exc:
+            rejected = getattr(exc, 'status_code', None) in (400, 401)
+            raise TokenRefreshError(f'Token refresh failed: {exc}', rejected=rejected) from exc
+        current.access_token = data['access_token']
+        current.refresh_token = data.get('refresh_token') or current.refresh_token
+        expires_in = int(data.get('expires_in') or DEFAULT_EXPIRES_IN)
+        current.token_expires_at = timezone.now() + timedelta(seconds=expires_in)
+        current.save(update_fields=['access_token', 'refresh_token', 'token_expires_at', 'updated_at'])
+    return current
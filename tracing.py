@@ -0,0 +1,90 @@
+"""
+Per-phase timing spans for running syncs.
+
+``run_log`` opens a ``SpanRecorder`` for the log it executes. Code on the
+sync path wraps its work in ``span(name)``: ``token_refresh``, ``fetch``,
+``transform``, ``push`` and ``db_write``. The recorder sums the wall time,
+the number of spans and the records handled per name. The totals are
+written to ``SyncLog.timings`` when the log finishes. Outside a sync (no
+active recorder) ``span`` costs a context-variable lookup.
+
+Spans are inclusive and may overlap. A token refresh inside a fetch counts
+in both, and prefetched pages are fetched on other threads while the sync
+transforms earlier ones, so the phase totals can exceed the sync's
+duration.
+"""
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+
+PHASES = ('token_refresh', 'fetch', 'transform', 'push', 'db_write')
+
+_recorder = contextvars.ContextVar('accounting_sync_span_recorder', default=None)
+
+
+class SpanRecorder:
+    """Thread-safe totals of the spans recorded for one log."""
+
+    def __init__(self):
+        self.spans = {}
+        self._lock = threading.Lock()
+
+    def add(self, name, seconds, count=0):
+        with self._lock:
+            entry = self.spans.setdefault(name, {'ms': 0.0, 'calls': 0, 'count': 0})
+            entry['ms'] += seconds * 1000
+            entry['calls'] += 1
+            entry['count'] += count
+
+    def as_dict(self):
+        with self._lock:
+            return {name: {**entry, 'ms': round(entry['ms'], 1)} for name, entry in self.spans.items()}
+
+
+class Span:
+    """Handle yielded by ``span``; ``add()`` the records handled inside it."""
+
+    __slots__ = ('count',)
+
+    def __init__(self, count=0):
+        self.count = count
+
+    def add(self, count=1):
+        self.count += count
+
+
+@contextmanager
+def span(name, count=0):
+    """Time the block as phase ``name`` of the running sync, if there is one."""
+    handle = Span(count)
+    recorder = _recorder.get()
+    if recorder is None:
+        yield handle
+        return
+    started = time.perf_counter()
+    try:
+        yield handle
+    finally:
+        recorder.add(name, time.perf_counter() - started, handle.count)
+
+
+@contextmanager
+def record_spans(log):
+    """Collect the spans of everything run inside the block for ``log``."""
+    recorder = log._spans = SpanRecorder()
+    token = _recorder.set(recorder)
+    try:
+        yield recorder
+    finally:
+        _recorder.reset(token)
+
+
+def get_timings(log):
+    recorder = getattr(log, '_spans', None)
+    return recorder.as_dict() if recorder is not None else {}
+
+
+def run_in_context(pool, func, *args):
+    """``pool.submit`` that keeps the caller's recorder, for work fanned out to threads."""
+    return pool.submit(contextvars.copy_context().run, func, *args)
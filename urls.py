@@ -25,6 +25,10 @@ urlpatterns = [
     path('sync_logs/<uuid:pk>/edit/', views.sync_log_edit, name='sync_log_edit'),
     path('sync_logs/<uuid:pk>/delete/', views.sync_log_delete, name='sync_log_delete'),
     path('sync_logs/bulk/', views.sync_logs_bulk_action, name='sync_logs_bulk_action'),
+    path('sync_logs/progress/', views.sync_progress_stream, name='sync_progress_stream'),
+
+    # Metrics
+    path('metrics/', views.metrics_view, name='metrics'),
 
     # Settings
     path('settings/', views.settings_view, name='settings'),
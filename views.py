@@ -1,9 +1,12 @@
 """
 Accounting Sync (Xero/QB) Module Views
 """
+import hmac
+
+from django.conf import settings
 from django.core.paginator import Paginator
-from django.db.models import Q, Count
-from django.http import HttpResponse
+from django.db.models import BooleanField, Case, Count, Q, Value, When
+from django.http import Http404, HttpResponse, StreamingHttpResponse
 from django.urls import reverse
 from django.shortcuts import get_object_or_404, render as django_render
 from django.utils import timezone
@@ -12,12 +15,20 @@ from django.views.decorators.http import require_POST
 
 from apps.accounts.decorators import login_required, permission_required
 from apps.core.htmx import htmx_view
-from apps.core.services import export_to_csv, export_to_excel
 from apps.modules_runtime.navigation import with_module_nav
 
-from .models import AccountingConnection, SyncLog
+from . import bulk, fragments, metrics, retention, stats
+from .export import stream_csv, stream_excel
+from .models import AccountingConnection, ConnectionSyncStats, SyncLog
+from .pagination import KeysetPaginator
+from .progress import progress_events
+from .search import search_sync_logs
 
 PER_PAGE_CHOICES = [12, 24, 48, 96, 0]
+# Large secret columns that list pages never render.
+CONNECTION_TOKEN_FIELDS = ('connection__access_token', 'connection__refresh_token')
+# Keyset pages never load "all" rows; per_page=0 falls back to this size.
+KEYSET_MAX_PER_PAGE = 96
 
 
 # ======================================================================
@@ -29,9 +40,22 @@ PER_PAGE_CHOICES = [12, 24, 48, 96, 0]
 @htmx_view('accounting_sync/pages/index.html', 'accounting_sync/partials/dashboard_content.html')
 def dashboard(request):
     hub_id = request.session.get('hub_id')
+    if request.htmx:
+        return fragments.cached_fragment('dashboard', hub_id, {}, lambda: django_render(
+            request, 'accounting_sync/partials/dashboard_content.html', _dashboard_context(hub_id),
+        ))
+    return _dashboard_context(hub_id)
+
+def _dashboard_context(hub_id):
+    connection_stats = (
+        ConnectionSyncStats.objects.filter(hub_id=hub_id, connection__is_deleted=False)
+        .select_related('connection').defer(*CONNECTION_TOKEN_FIELDS)
+        .order_by('-total_logs')[:10]
+    )
     return {
         'total_accounting_connections': AccountingConnection.objects.filter(hub_id=hub_id, is_deleted=False).count(),
-        'total_sync_logs': SyncLog.objects.filter(hub_id=hub_id, is_deleted=False).count(),
+        'connection_stats': connection_stats,
+        **stats.get_dashboard_stats(hub_id),
     }
 
 
@@ -44,13 +68,36 @@ ACCOUNTING_CONNECTION_SORT_FIELDS = {
     'status': 'status',
     'sync_enabled': 'sync_enabled',
     'provider': 'provider',
-    'access_token': 'access_token',
-    'refresh_token': 'refresh_token',
+    'access_token': 'has_access_token',
+    'refresh_token': 'has_refresh_token',
     'created_at': 'created_at',
 }
 
+def _is_set(field):
+    return Case(When(**{field: ''}, then=Value(False)), default=Value(True), output_field=BooleanField())
+
+def _accounting_connections_queryset(hub_id):
+    """Connection rows for list pages: token columns deferred, only whether they are set."""
+    return (
+        AccountingConnection.objects.filter(hub_id=hub_id, is_deleted=False)
+        .defer('access_token', 'refresh_token')
+        .annotate(has_access_token=_is_set('access_token'), has_refresh_token=_is_set('refresh_token'))
+    )
+
+def _search_accounting_connections(qs, search_query):
+    if search_query:
+        qs = qs.filter(Q(provider__icontains=search_query) | Q(name__icontains=search_query) | Q(status__icontains=search_query))
+    return qs
+
+def _bulk_selection(request, qs, search):
+    """Rows a bulk action applies to: every row matching the posted search, or the posted ids."""
+    if request.POST.get('scope') == 'filter':
+        return search(qs, request.POST.get('q', '').strip())
+    ids = [i.strip() for i in request.POST.get('ids', '').split(',') if i.strip()]
+    return qs.filter(id__in=ids)
+
 def _build_accounting_connections_context(hub_id, per_page=10):
-    qs = AccountingConnection.objects.filter(hub_id=hub_id, is_deleted=False).order_by('name')
+    qs = _accounting_connections_queryset(hub_id).order_by('name')
     paginator = Paginator(qs, per_page if per_page > 0 else max(qs.count(), 1))
     page_obj = paginator.get_page(1)
     return {
@@ -81,10 +128,7 @@ def accounting_connections_list(request):
     if per_page not in PER_PAGE_CHOICES:
         per_page = 12
 
-    qs = AccountingConnection.objects.filter(hub_id=hub_id, is_deleted=False)
-
-    if search_query:
-        qs = qs.filter(Q(provider__icontains=search_query) | Q(name__icontains=search_query) | Q(status__icontains=search_query) | Q(access_token__icontains=search_query))
+    qs = _search_accounting_connections(_accounting_connections_queryset(hub_id), search_query)
 
     order_by = ACCOUNTING_CONNECTION_SORT_FIELDS.get(sort_field, 'name')
     if sort_dir == 'desc':
@@ -93,22 +137,32 @@ def accounting_connections_list(request):
 
     export_format = request.GET.get('export')
     if export_format in ('csv', 'excel'):
-        fields = ['name', 'status', 'sync_enabled', 'provider', 'access_token', 'refresh_token']
-        headers = ['Name', 'Status', 'Sync Enabled', 'Provider', 'Access Token', 'Refresh Token']
+        # Tokens are secrets: exports say whether each is set, never the value.
+        fields = ['name', 'status', 'sync_enabled', 'provider', 'has_access_token', 'has_refresh_token']
+        headers = ['Name', 'Status', 'Sync Enabled', 'Provider', 'Access Token Set', 'Refresh Token Set']
         if export_format == 'csv':
-            return export_to_csv(qs, fields=fields, headers=headers, filename='accounting_connections.csv')
-        return export_to_excel(qs, fields=fields, headers=headers, filename='accounting_connections.xlsx')
+            return stream_csv(qs, fields, headers, 'accounting_connections.csv')
+        return stream_excel(qs, fields, headers, 'accounting_connections.xlsx')
+
+    if request.htmx and request.htmx.target == 'datatable-body':
+        params = {
+            'q': search_query, 'sort': sort_field, 'dir': sort_dir,
+            'page': str(page_number), 'view': current_view, 'per_page': per_page,
+        }
+
+        def render():
+            page_obj = Paginator(qs, per_page if per_page > 0 else max(qs.count(), 1)).get_page(page_number)
+            return django_render(request, 'accounting_sync/partials/accounting_connections_list.html', {
+                'accounting_connections': page_obj, 'page_obj': page_obj,
+                'search_query': search_query, 'sort_field': sort_field,
+                'sort_dir': sort_dir, 'current_view': current_view, 'per_page': per_page,
+            })
+
+        return fragments.cached_fragment('accounting_connections_list', hub_id, params, render)
 
     paginator = Paginator(qs, per_page if per_page > 0 else max(qs.count(), 1))
     page_obj = paginator.get_page(page_number)
 
-    if request.htmx and request.htmx.target == 'datatable-body':
-        return django_render(request, 'accounting_sync/partials/accounting_connections_list.html', {
-            'accounting_connections': page_obj, 'page_obj': page_obj,
-            'search_query': search_query, 'sort_field': sort_field,
-            'sort_dir': sort_dir, 'current_view': current_view, 'per_page': per_page,
-        })
-
     return {
         'accounting_connections': page_obj, 'page_obj': page_obj,
         'search_query': search_query, 'sort_field': sort_field,
@@ -122,6 +176,7 @@ def accounting_connection_add(request):
     if request.method == 'POST':
         provider = request.POST.get('provider', '').strip()
         name = request.POST.get('name', '').strip()
+        tenant_id = request.POST.get('tenant_id', '').strip()
         status = request.POST.get('status', '').strip()
         access_token = request.POST.get('access_token', '').strip()
         refresh_token = request.POST.get('refresh_token', '').strip()
@@ -130,6 +185,7 @@ def accounting_connection_add(request):
         obj = AccountingConnection(hub_id=hub_id)
         obj.provider = provider
         obj.name = name
+        obj.tenant_id = tenant_id
         obj.status = status
         obj.access_token = access_token
         obj.refresh_token = refresh_token
@@ -149,6 +205,7 @@ def accounting_connection_edit(request, pk):
     if request.method == 'POST':
         obj.provider = request.POST.get('provider', '').strip()
         obj.name = request.POST.get('name', '').strip()
+        obj.tenant_id = request.POST.get('tenant_id', '').strip()
         obj.status = request.POST.get('status', '').strip()
         obj.access_token = request.POST.get('access_token', '').strip()
         obj.refresh_token = request.POST.get('refresh_token', '').strip()
@@ -172,11 +229,16 @@ def accounting_connection_delete(request, pk):
 @require_POST
 def accounting_connections_bulk_action(request):
     hub_id = request.session.get('hub_id')
-    ids = [i.strip() for i in request.POST.get('ids', '').split(',') if i.strip()]
     action = request.POST.get('action', '')
-    qs = AccountingConnection.objects.filter(hub_id=hub_id, is_deleted=False, id__in=ids)
+    qs = _bulk_selection(
+        request, AccountingConnection.objects.filter(hub_id=hub_id, is_deleted=False), _search_accounting_connections,
+    )
     if action == 'delete':
-        qs.update(is_deleted=True, deleted_at=timezone.now())
+        bulk.delete_connections(qs)
+    elif action in ('enable_sync', 'disable_sync'):
+        bulk.set_sync_enabled(qs, action == 'enable_sync')
+    elif action == 'trigger':
+        bulk.trigger_syncs(qs)
     return _render_accounting_connections_list(request, hub_id)
 
 
@@ -194,16 +256,38 @@ SYNC_LOG_SORT_FIELDS = {
     'created_at': 'created_at',
 }
 
-def _build_sync_logs_context(hub_id, per_page=10):
-    qs = SyncLog.objects.filter(hub_id=hub_id, is_deleted=False).order_by('connection')
+def _paginate_sync_logs(qs, sort_field, sort_dir, per_page, page_number=1, cursor=None, direction='next'):
+    if sort_field == 'created_at':
+        paginator = KeysetPaginator(qs, per_page or KEYSET_MAX_PER_PAGE, descending=sort_dir == 'desc')
+        return paginator.get_page(cursor, direction)
     paginator = Paginator(qs, per_page if per_page > 0 else max(qs.count(), 1))
-    page_obj = paginator.get_page(1)
+    return paginator.get_page(page_number)
+
+SYNC_LOG_LIST_FIELDS = (
+    'id', 'created_at', 'connection', 'connection__name', 'status',
+    'records_synced', 'direction', 'entity_type', 'error_message',
+    'phase', 'progress_done', 'progress_total', 'attempt', 'dead_letter',
+)
+
+def _sync_logs_queryset(hub_id):
+    """Log rows for list pages and exports, with the connection name joined in."""
+    return (
+        SyncLog.objects.filter(hub_id=hub_id, is_deleted=False)
+        .select_related('connection').only(*SYNC_LOG_LIST_FIELDS)
+    )
+
+def _search_sync_logs(qs, search_query):
+    return search_sync_logs(qs, search_query) if search_query else qs
+
+def _build_sync_logs_context(hub_id, per_page=10):
+    qs = _sync_logs_queryset(hub_id)
+    page_obj = _paginate_sync_logs(qs, 'created_at', 'desc', per_page)
     return {
         'sync_logs': page_obj,
         'page_obj': page_obj,
         'search_query': '',
-        'sort_field': 'connection',
-        'sort_dir': 'asc',
+        'sort_field': 'created_at',
+        'sort_dir': 'desc',
         'current_view': 'table',
         'per_page': per_page,
     }
@@ -218,34 +302,34 @@ def _render_sync_logs_list(request, hub_id, per_page=10):
 def sync_logs_list(request):
     hub_id = request.session.get('hub_id')
     search_query = request.GET.get('q', '').strip()
-    sort_field = request.GET.get('sort', 'connection')
-    sort_dir = request.GET.get('dir', 'asc')
+    sort_field = request.GET.get('sort', 'created_at')
+    sort_dir = request.GET.get('dir', 'desc')
     page_number = request.GET.get('page', 1)
+    cursor = request.GET.get('cursor')
+    direction = request.GET.get('direction', 'next')
     current_view = request.GET.get('view', 'table')
     per_page = int(request.GET.get('per_page', 12))
     if per_page not in PER_PAGE_CHOICES:
         per_page = 12
 
-    qs = SyncLog.objects.filter(hub_id=hub_id, is_deleted=False)
-
-    if search_query:
-        qs = qs.filter(Q(direction__icontains=search_query) | Q(entity_type__icontains=search_query) | Q(status__icontains=search_query) | Q(error_message__icontains=search_query))
+    qs = _search_sync_logs(_sync_logs_queryset(hub_id), search_query)
 
-    order_by = SYNC_LOG_SORT_FIELDS.get(sort_field, 'connection')
+    if sort_field not in SYNC_LOG_SORT_FIELDS:
+        sort_field = 'created_at'
+    order_by = SYNC_LOG_SORT_FIELDS[sort_field]
     if sort_dir == 'desc':
         order_by = f'-{order_by}'
     qs = qs.order_by(order_by)
 
     export_format = request.GET.get('export')
     if export_format in ('csv', 'excel'):
-        fields = ['connection', 'status', 'records_synced', 'direction', 'entity_type', 'error_message']
-        headers = ['AccountingConnection', 'Status', 'Records Synced', 'Direction', 'Entity Type', 'Error Message']
+        fields = ['connection__name', 'status', 'records_synced', 'direction', 'entity_type', 'error_message', 'created_at']
+        headers = ['AccountingConnection', 'Status', 'Records Synced', 'Direction', 'Entity Type', 'Error Message', 'Created At']
         if export_format == 'csv':
-            return export_to_csv(qs, fields=fields, headers=headers, filename='sync_logs.csv')
-        return export_to_excel(qs, fields=fields, headers=headers, filename='sync_logs.xlsx')
+            return stream_csv(qs, fields, headers, 'sync_logs.csv')
+        return stream_excel(qs, fields, headers, 'sync_logs.xlsx')
 
-    paginator = Paginator(qs, per_page if per_page > 0 else max(qs.count(), 1))
-    page_obj = paginator.get_page(page_number)
+    page_obj = _paginate_sync_logs(qs, sort_field, sort_dir, per_page, page_number, cursor, direction)
 
     if request.htmx and request.htmx.target == 'datatable-body':
         return django_render(request, 'accounting_sync/partials/sync_logs_list.html', {
@@ -311,18 +395,72 @@ def sync_log_delete(request, pk):
 @require_POST
 def sync_logs_bulk_action(request):
     hub_id = request.session.get('hub_id')
-    ids = [i.strip() for i in request.POST.get('ids', '').split(',') if i.strip()]
     action = request.POST.get('action', '')
-    qs = SyncLog.objects.filter(hub_id=hub_id, is_deleted=False, id__in=ids)
+    qs = _bulk_selection(request, SyncLog.objects.filter(hub_id=hub_id, is_deleted=False), _search_sync_logs)
     if action == 'delete':
-        qs.update(is_deleted=True, deleted_at=timezone.now())
+        bulk.delete_logs(qs)
+    elif action == 'retry':
+        bulk.retry_failed_logs(qs)
     return _render_sync_logs_list(request, hub_id)
 
 
+@login_required
+def sync_progress_stream(request):
+    """
+    Server-sent events with live progress of the hub's running syncs.
+
+    The response stays open for minutes; deploy behind an async or threaded server.
+    """
+    response = StreamingHttpResponse(
+        progress_events(request.session.get('hub_id')), content_type='text/event-stream',
+    )
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+# ======================================================================
+# Metrics
+# ======================================================================
+
+def metrics_view(request):
+    """
+    Prometheus metrics for all hubs, for the monitoring scraper.
+
+    Disabled (404) unless ``ACCOUNTING_SYNC_METRICS_TOKEN`` is set; scrapers
+    send it as ``Authorization: Bearer <token>``.
+    """
+    token = getattr(settings, 'ACCOUNTING_SYNC_METRICS_TOKEN', '')
+    if not token:
+        raise Http404
+    if not hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}'):
+        response = HttpResponse(status=401)
+        response['WWW-Authenticate'] = 'Bearer'
+        return response
+    return HttpResponse(metrics.render_metrics(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
 @login_required
 @permission_required('accounting_sync.manage_settings')
 @with_module_nav('accounting_sync', 'settings')
 @htmx_view('accounting_sync/pages/settings.html', 'accounting_sync/partials/settings_content.html')
 def settings_view(request):
-    return {}
+    hub_id = request.session.get('hub_id')
+    saved, error = False, ''
+    if request.method == 'POST':
+        try:
+            days = int(request.POST.get('retention_days', ''))
+        except ValueError:
+            days = 0
+        if days < 1:
+            error = _('Retention must be at least one day.')
+        else:
+            retention.set_retention_days(hub_id, days)
+            saved = True
+    return {
+        'retention_days': retention.get_retention_days(hub_id),
+        'default_retention_days': retention.default_retention_days(),
+        'saved': saved,
+        'error': error,
+    }
 